@@ -1,6 +1,6 @@
+import math
 import numpy as np
 import base64
-import struct
 
 class AudioAnalyzer:
     def __init__(self):
@@ -30,30 +30,39 @@ class AudioAnalyzer:
             # Convert bytes to numpy array (16-bit PCM)
             audio_data = np.frombuffer(audio_bytes, dtype=np.int16)
             
-            if len(audio_data) == 0:
-                return None
-            
-            # Calculate RMS (Root Mean Square) - volume level
-            rms = np.sqrt(np.mean(audio_data.astype(np.float32) ** 2))
-            
-            # Calculate energy
-            energy = np.sum(audio_data.astype(np.float32) ** 2) / len(audio_data)
-            
-            # Detect speech/vocalization
-            is_speech = rms > self.speech_threshold
-            is_silence = rms < self.silence_threshold
-            
-            return {
-                "rms": float(rms),
-                "energy": float(energy),
-                "is_speech": is_speech,
-                "is_silence": is_silence,
-                "volume_level": self._categorize_volume(rms)
-            }
+            return self.analyze_samples(audio_data)
             
         except Exception as e:
             print(f"Error analyzing audio: {e}")
             return None
+
+    def analyze_samples(self, audio_data, sample_rate=None):
+        """
+        Analyzes 16-bit PCM samples already in memory (binary /ws/audio path).
+        audio_data may be a read-only view into the received message.
+        """
+        if len(audio_data) == 0:
+            return None
+
+        sample_rate = sample_rate or self.sample_rate
+
+        # One float conversion; energy is the mean square, RMS its root
+        samples = audio_data.astype(np.float32)
+        energy = float(np.dot(samples, samples)) / len(samples)
+        rms = math.sqrt(energy)
+
+        # Detect speech/vocalization
+        is_speech = rms > self.speech_threshold
+        is_silence = rms < self.silence_threshold
+
+        return {
+            "rms": rms,
+            "energy": energy,
+            "is_speech": is_speech,
+            "is_silence": is_silence,
+            "volume_level": self._categorize_volume(rms),
+            "duration_sec": len(audio_data) / sample_rate
+        }
     
     def _categorize_volume(self, rms):
         """Categorize volume into levels"""
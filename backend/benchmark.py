@@ -0,0 +1,262 @@
+"""
+Microbenchmarks for the backend hot paths.
+
+Times each stage of frame and audio processing separately on synthetic
+data and on the photos bundled in public/images (re-encoded like webcam
+frames), and prints per-stage latency distributions in microseconds.
+
+    python benchmark.py                     # run and compare to the baseline
+    python benchmark.py --save-baseline     # record the current numbers
+    python benchmark.py --stages imdecode,logic_analyze
+
+With a baseline present, any stage whose median is more than `--tolerance`
+slower than its baseline median fails the run (exit code 1). Baselines are
+machine specific: record one on the machine that runs the comparison.
+Stages needing MediaPipe graphs are skipped when the graphs cannot be built.
+"""
+
+import argparse
+import base64
+import glob
+import itertools
+import json
+import math
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from audio_analyzer import audio_analyzer
+from frame_decoder import FrameDecoder
+from logic_engine import logic_engine
+from pose_tracker import LANDMARK_NAMES, LEFT_WRIST, RIGHT_WRIST, PoseTracker
+from tracking_engine import TrackingEngine
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BACKEND_DIR, "..", "public", "images")
+DEFAULT_BASELINE = os.path.join(BACKEND_DIR, "benchmark_baseline.json")
+
+FRAME_SIZE = (640, 480)
+JPEG_QUALITY = 70  # matches canvas.toDataURL('image/jpeg', 0.7)
+
+TASKS = ("eye_contact", "name_response", "gestures", "repetitive")
+
+
+def load_frame_fixtures():
+    """JPEG frames: bundled photos resized to webcam size, plus a synthetic frame."""
+    frames = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.jpg"))):
+        image = cv2.imread(path, cv2.IMREAD_REDUCED_COLOR_4)
+        if image is not None:
+            frames.append(cv2.resize(image, FRAME_SIZE, interpolation=cv2.INTER_AREA))
+
+    rng = np.random.default_rng(0)
+    noise = rng.integers(0, 256, (FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=np.uint8)
+    frames.append(cv2.GaussianBlur(noise, (9, 9), 3))
+
+    return [
+        cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])[1].tobytes()
+        for frame in frames
+    ]
+
+
+def synthetic_pose_landmarks(count=120):
+    """Per-frame landmark arrays with flapping wrists and a rocking torso."""
+    rng = np.random.default_rng(1)
+    base = rng.uniform(0.2, 0.8, (len(LANDMARK_NAMES), 4))
+    base[:, 3] = 0.99                                   # visibility
+    frames = []
+    for i in range(count):
+        coords = base.copy()
+        coords[:, :3] += rng.normal(0, 0.005, (len(LANDMARK_NAMES), 3))
+        coords[[LEFT_WRIST, RIGHT_WRIST], 1] += 0.15 * math.sin(i * 0.9)
+        coords[:, 0] += 0.05 * math.sin(i * 0.3)        # rocking
+        frames.append(coords)
+    return frames
+
+
+def synthetic_audio_chunks():
+    rng = np.random.default_rng(2)
+    speech = rng.integers(-5000, 5000, 4096, dtype=np.int16)
+    silence = rng.integers(-50, 50, 4096, dtype=np.int16)
+    return [speech, silence]
+
+
+def eye_contact_metrics():
+    return {
+        "totalFrames": 300, "framesFaceDetected": 270, "framesSocialSide": 90,
+        "framesGeometricSide": 150, "sideSwitchCount": 4,
+        "startTime": 0, "endTime": 10, "durationSec": 10,
+    }
+
+
+def build_stages():
+    """{name: zero-argument callable}; each call processes one item."""
+    jpegs = load_frame_fixtures()
+    b64_frames = [base64.b64encode(jpeg).decode() for jpeg in jpegs]
+    arrays = [np.frombuffer(jpeg, np.uint8) for jpeg in jpegs]
+    audio = synthetic_audio_chunks()
+    audio_b64 = [base64.b64encode(chunk.tobytes()).decode() for chunk in audio]
+    landmarks = synthetic_pose_landmarks()
+    metrics = eye_contact_metrics()
+    metrics_batch = [metrics] * 1000
+
+    def cycle(items):
+        state = {"i": 0}
+
+        def next_item():
+            item = items[state["i"] % len(items)]
+            state["i"] += 1
+            return item
+        return next_item
+
+    next_b64, next_array, next_jpeg = cycle(b64_frames), cycle(arrays), cycle(jpegs)
+    next_audio, next_audio_b64, next_landmarks = cycle(audio), cycle(audio_b64), cycle(landmarks)
+
+    stages = {
+        "base64_decode": lambda: base64.b64decode(next_b64()),
+        "imdecode": lambda: cv2.imdecode(next_array(), cv2.IMREAD_COLOR),
+        "audio_analyze_chunk": lambda: audio_analyzer.analyze_audio_chunk(next_audio_b64()),
+        "audio_analyze_samples": lambda: audio_analyzer.analyze_samples(next_audio()),
+        "logic_analyze": lambda: logic_engine.analyze(metrics),
+        # One call scores a whole batch; compare p50 / 1000 with logic_analyze
+        "logic_analyze_batch[1000]": lambda: list(logic_engine.analyze_batch(metrics_batch)),
+    }
+
+    decoder = FrameDecoder()
+    for task in TASKS:
+        stages[f"decode_rgb[{task}]"] = lambda task=task: decoder.decode(next_jpeg(), task)
+
+    tracker = PoseTracker()
+
+    def detect_movements():
+        tracker._detect_movements(next_landmarks())
+
+    clock = itertools.count()
+
+    def detect_patterns():
+        # Frames 1/30 s apart, so the spectrum has a real time window
+        tracker._detect_patterns(next_landmarks(), next(clock) / 30)
+
+    stages["pose_detect_movements"] = detect_movements
+    stages["pose_detect_patterns"] = detect_patterns
+
+    engine = TrackingEngine(preload=[])
+    for task in TASKS:
+        stages[f"process_frame[{task}]"] = lambda task=task: _process_frame(engine, next_b64(), task)
+
+    return stages
+
+
+class StageUnavailable(Exception):
+    pass
+
+
+def _process_frame(engine, image_data, task):
+    try:
+        engine.load_task_models(task)
+    except Exception as e:
+        raise StageUnavailable(str(e))
+    engine.process_frame(image_data, task)
+
+
+def time_stage(fn, iterations, warmup):
+    for _ in range(warmup):
+        fn()
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter_ns()
+        fn()
+        samples[i] = time.perf_counter_ns() - start
+    samples /= 1000.0
+    p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+    return {
+        "iterations": iterations,
+        "mean_us": round(float(samples.mean()), 2),
+        "p50_us": round(float(p50), 2),
+        "p90_us": round(float(p90), 2),
+        "p99_us": round(float(p99), 2),
+        "min_us": round(float(samples.min()), 2),
+        "max_us": round(float(samples.max()), 2),
+    }
+
+
+def run(selected=None, iterations=200, warmup=20):
+    results = {}
+    skipped = {}
+    for name, fn in build_stages().items():
+        if selected and name not in selected:
+            continue
+        try:
+            results[name] = time_stage(fn, iterations, warmup)
+        except StageUnavailable as e:
+            skipped[name] = e.args[0]
+    return results, skipped
+
+
+def compare(results, baseline, tolerance):
+    """[(stage, baseline p50, current p50)] for stages slower than allowed."""
+    regressions = []
+    for name, stats in results.items():
+        reference = baseline.get(name)
+        if reference and stats["p50_us"] > reference["p50_us"] * (1 + tolerance):
+            regressions.append((name, reference["p50_us"], stats["p50_us"]))
+    return regressions
+
+
+def print_report(results, skipped, baseline):
+    print(f"{'stage':32} {'p50':>10} {'p90':>10} {'p99':>10} {'mean':>10} {'vs base':>9}")
+    for name, stats in results.items():
+        change = ""
+        if name in baseline:
+            change = f"{(stats['p50_us'] / baseline[name]['p50_us'] - 1) * 100:+.1f}%"
+        print(f"{name:32} {stats['p50_us']:>10.1f} {stats['p90_us']:>10.1f} "
+              f"{stats['p99_us']:>10.1f} {stats['mean_us']:>10.1f} {change:>9}")
+    for name, reason in skipped.items():
+        print(f"{name:32} skipped: {reason}")
+    print("(times in microseconds per item)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark backend hot paths")
+    parser.add_argument("--stages", help="comma separated subset of stages to run")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed median slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    selected = set(args.stages.split(",")) if args.stages else None
+    results, skipped = run(selected, args.iterations, args.warmup)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print_report(results, skipped, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"results": results, "skipped": skipped}, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for name, before, after in regressions:
+        print(f"REGRESSION: {name} p50 {before:.1f}us -> {after:.1f}us")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
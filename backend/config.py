@@ -0,0 +1,125 @@
+import os
+import tempfile
+
+# Runtime configuration for the NeuroLens backend.
+# Every setting can be overridden with an environment variable so the same
+# build can run on a laptop or on autoscaled instances.
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    if value is None or value == "":
+        return default
+    return int(value)
+
+
+def _env_list(name, default=""):
+    value = os.environ.get(name, default)
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _env_task_map(name, defaults, cast):
+    """Per-task settings, overridable with e.g. NAME="repetitive:256,gestures:320"."""
+    values = dict(defaults)
+    for item in _env_list(name):
+        task, value = item.split(":")
+        values[task.strip()] = cast(value)
+    return values
+
+
+# Inference executor: "thread", "process" or "shm" (dedicated worker
+# processes fed through shared memory, see inference_workers.py)
+EXECUTOR_MODE = os.environ.get("NEUROLENS_EXECUTOR", "thread").lower()
+
+# Upper bound on concurrently running frame analyses (in "shm" mode, the
+# number of inference worker processes)
+INFERENCE_WORKERS = _env_int("NEUROLENS_INFERENCE_WORKERS", os.cpu_count() or 1)
+
+# Size of a shared-memory frame slot in "shm" mode; larger frames are sent inline
+SHM_SLOT_BYTES = _env_int("NEUROLENS_SHM_SLOT_KB", 512) * 1024
+
+# Seconds to wait for an inference worker to answer a non-frame call
+# (reset, warm-up, model status) in "shm" mode
+SHM_CALL_TIMEOUT = float(os.environ.get("NEUROLENS_SHM_CALL_TIMEOUT", "60"))
+
+# Number of TrackingEngines (one per concurrent screening session)
+ENGINE_POOL_SIZE = _env_int("NEUROLENS_ENGINE_POOL_SIZE", os.cpu_count() or 1)
+
+# Seconds a new session waits for a free engine before being turned away
+ENGINE_LEASE_TIMEOUT = float(os.environ.get("NEUROLENS_ENGINE_LEASE_TIMEOUT", "30"))
+
+# MediaPipe graphs built when an engine is created instead of on first use,
+# e.g. "face_mesh,hands,pose_tracker". Empty means fully lazy.
+PRELOAD_MODELS = _env_list("NEUROLENS_PRELOAD_MODELS")
+
+# Engines built and warmed up at startup when PRELOAD_MODELS is set
+WARMUP_ENGINES = _env_int("NEUROLENS_WARMUP_ENGINES", 1)
+
+# Width (px) each task's frames are decoded/resized to before inference.
+# Override with e.g. NEUROLENS_INFERENCE_WIDTHS="repetitive:256,gestures:320";
+# 0 keeps the frame at its original size.
+INFERENCE_WIDTHS = _env_task_map("NEUROLENS_INFERENCE_WIDTHS", {
+    "eye_contact": 640,     # iris landmarks need the detail
+    "name_response": 640,
+    "gestures": 480,
+    "repetitive": 320,
+}, int)
+
+# Fair-share weight of a session in the inference scheduler, by task.
+# A session with weight 2 gets twice the inference time of a weight 1 session.
+TASK_WEIGHTS = _env_task_map("NEUROLENS_TASK_WEIGHTS", {}, float)
+
+# Initial per-frame inference cost estimates (ms); refined from measurements
+TASK_COST_ESTIMATES = {
+    "eye_contact": 15.0,
+    "name_response": 15.0,
+    "gestures": 10.0,
+    "repetitive": 30.0,
+}
+
+# Frames still waiting for inference this long after arrival are dropped
+FRAME_DEADLINE_MS = float(os.environ.get("NEUROLENS_FRAME_DEADLINE_MS", "500"))
+
+# Per-session profiling traces (opt in with ?trace=1 on a WebSocket URL)
+TRACE_DIR = os.environ.get(
+    "NEUROLENS_TRACE_DIR", os.path.join(tempfile.gettempdir(), "neurolens-traces")
+)
+
+# Interval of the CPU stack sampler for ?trace=profile sessions
+TRACE_SAMPLE_INTERVAL_MS = float(os.environ.get("NEUROLENS_TRACE_SAMPLE_INTERVAL_MS", "5"))
+
+# Movement audit log written per session by PoseTracker: "" (off), "csv"
+# or "binary" (see session_log.py), into NEUROLENS_SESSION_LOG_DIR
+MOVEMENT_LOG_FORMAT = os.environ.get("NEUROLENS_MOVEMENT_LOG", "").lower()
+SESSION_LOG_DIR = os.environ.get("NEUROLENS_SESSION_LOG_DIR", "session_logs")
+
+# /api/analyze/video: largest accepted upload, and how many videos are
+# analysed at once (each uses up to INFERENCE_WORKERS processes)
+VIDEO_MAX_UPLOAD_BYTES = _env_int("NEUROLENS_VIDEO_MAX_UPLOAD_MB", 500) * 1024 * 1024
+VIDEO_MAX_JOBS = _env_int("NEUROLENS_VIDEO_MAX_JOBS", 1)
+
+# Record every /ws/analyze session's per-frame engine output for replay.py
+RECORD_SESSIONS = os.environ.get("NEUROLENS_RECORD_SESSIONS", "").lower() in ("1", "true", "yes")
+RECORDING_DIR = os.environ.get("NEUROLENS_RECORDING_DIR", "recordings")
+
+# Checkpoints of live /ws/analyze and /ws/audio sessions, so clients can
+# resume after a dropped connection (see session_store.py). The SQLite file
+# is shared by every API process on the host.
+SESSION_STORE_PATH = os.environ.get(
+    "NEUROLENS_SESSION_STORE", os.path.join(tempfile.gettempdir(), "neurolens-sessions.db")
+)
+SESSION_TTL_SECONDS = float(os.environ.get("NEUROLENS_SESSION_TTL_SECONDS", "900"))
+SESSION_CHECKPOINT_SECONDS = float(os.environ.get("NEUROLENS_SESSION_CHECKPOINT_SECONDS", "5"))
+
+# Length of the windows live sessions keep per-task sub-scores for (the
+# score timeline, see session_metrics.py)
+SCORE_WINDOW_SECONDS = float(os.environ.get("NEUROLENS_SCORE_WINDOW_SECONDS", "5"))
+
+# Logic engine threshold overrides, e.g. "preference:0.65,min_frames:60"
+# (names in logic_engine.DEFAULT_THRESHOLDS)
+SCORING_THRESHOLDS = _env_task_map("NEUROLENS_SCORING_THRESHOLDS", {}, float)
+
+# /api/analyze results kept for identical re-posted payloads (see
+# result_cache.py); 0 entries disables the cache
+RESULT_CACHE_SIZE = _env_int("NEUROLENS_RESULT_CACHE_SIZE", 10000)
+RESULT_CACHE_TTL_SECONDS = float(os.environ.get("NEUROLENS_RESULT_CACHE_TTL_SECONDS", "600"))
@@ -0,0 +1,131 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import config
+from inference_executor import inference_executor
+
+
+class EnginePool:
+    """
+    Pool of TrackingEngines leased to one WebSocket session at a time.
+
+    A session holds its engine for the whole connection, so gaze smoothing,
+    pose histories and movement counters never mix between children. When
+    the session ends the engine's temporal state is reset and the engine goes
+    back to the pool, so the MediaPipe graphs are built once and reused.
+    Engines are created lazily, up to `size`.
+    """
+
+    def __init__(self, factory, size=config.ENGINE_POOL_SIZE,
+                 lease_timeout=config.ENGINE_LEASE_TIMEOUT):
+        if size < 1:
+            raise ValueError("Engine pool size must be at least 1")
+
+        self.factory = factory
+        self.size = size
+        self.lease_timeout = lease_timeout
+
+        self._slots = asyncio.Semaphore(size)
+        self._idle = []
+        self.created = 0
+        self.leased = 0
+        self.waiting = 0
+
+    async def acquire(self):
+        """Wait for a free engine. Raises asyncio.TimeoutError if none frees up."""
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.lease_timeout)
+        finally:
+            self.waiting -= 1
+
+        try:
+            engine = self._pop_idle()
+            if engine is None:
+                loop = asyncio.get_running_loop()
+                engine = await loop.run_in_executor(None, self.factory)
+                self.created += 1
+        except BaseException:
+            self._slots.release()
+            raise
+
+        self.leased += 1
+        return engine
+
+    def _pop_idle(self):
+        """
+        A live idle engine, or None. Dead ones (e.g. hosted by an inference
+        worker that exited, see SharedEngine.alive) are discarded.
+        """
+        while self._idle:
+            engine = self._idle.pop()
+            if getattr(engine, "alive", True):
+                return engine
+            print("Discarding idle engine whose worker has exited")
+            self.created -= 1
+            self._close(engine)
+        return None
+
+    async def release(self, engine):
+        """Reset the engine's session state and return it to the pool."""
+        self.leased -= 1
+        try:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, engine.reset_session)
+            self._idle.append(engine)
+        except Exception as e:
+            # A broken engine is dropped; a fresh one is built on next lease
+            print(f"Engine reset failed, discarding engine: {e}")
+            self.created -= 1
+            self._close(engine)
+        finally:
+            self._slots.release()
+
+    async def prewarm(self, count=config.WARMUP_ENGINES, models=config.PRELOAD_MODELS):
+        """
+        Builds up to `count` engines ahead of the first session and pushes a
+        synthetic frame through `models` on each. Returns the model status
+        of the last engine warmed.
+        """
+        status = {}
+        engines = []
+        try:
+            for _ in range(min(count, self.size)):
+                engine = await self.acquire()
+                engines.append(engine)
+                loop = asyncio.get_running_loop()
+                status = await loop.run_in_executor(None, engine.warm_up, models)
+        finally:
+            for engine in engines:
+                await self.release(engine)
+        return status
+
+    @asynccontextmanager
+    async def lease(self):
+        engine = await self.acquire()
+        try:
+            yield engine
+        finally:
+            await self.release(engine)
+
+    def stats(self):
+        return {
+            "size": self.size,
+            "created": self.created,
+            "leased": self.leased,
+            "idle": len(self._idle),
+            "waiting": self.waiting,
+        }
+
+    def shutdown(self):
+        while self._idle:
+            self._close(self._idle.pop())
+
+    @staticmethod
+    def _close(engine):
+        if hasattr(engine, "shutdown"):
+            engine.shutdown()
+
+
+# Singleton instance
+engine_pool = EnginePool(inference_executor.create_engine)
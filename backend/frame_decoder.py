@@ -0,0 +1,106 @@
+import cv2
+import numpy as np
+
+import config
+
+# libjpeg can scale by 1/2, 1/4 and 1/8 while decoding (DCT scaling),
+# which is much cheaper than decoding at full size and resizing afterwards
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# Start-of-frame markers carrying the image size (C4, C8 and CC are not SOF)
+_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def jpeg_dimensions(buffer):
+    """
+    Reads (width, height) from a JPEG's start-of-frame header without
+    decoding it. Returns None for anything that is not a parseable JPEG.
+    """
+    data = memoryview(buffer).cast("B")
+    size = len(data)
+    if size < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+
+    i = 2
+    while i + 9 <= size:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Standalone markers have no length field
+            i += 2
+            continue
+        if marker in _SOF_MARKERS:
+            height = (data[i + 5] << 8) | data[i + 6]
+            width = (data[i + 7] << 8) | data[i + 8]
+            return width, height
+        i += 2 + ((data[i + 2] << 8) | data[i + 3])
+    return None
+
+
+class FrameDecoder:
+    """
+    Decodes JPEG frames straight to an RGB image at the task's inference
+    width (config.INFERENCE_WIDTHS). Uses reduced-scale JPEG decoding when
+    the frame is at least twice the target width, resizes the remainder
+    bilinearly (area-averaged for a 2x+ shrink, e.g. full-size video
+    frames), and converts to RGB once into a buffer reused between frames.
+
+    The returned image is only valid until the next decode() call, so one
+    decoder belongs to one engine.
+    """
+
+    def __init__(self, target_widths=None):
+        self.target_widths = config.INFERENCE_WIDTHS if target_widths is None else target_widths
+        self._resize_buffers = {}
+        self._rgb_buffers = {}
+
+    def _buffer(self, buffers, shape):
+        buffer = buffers.get(shape)
+        if buffer is None:
+            buffer = np.empty(shape, dtype=np.uint8)
+            buffers[shape] = buffer
+        return buffer
+
+    def decode(self, jpeg, task=None):
+        """jpeg: uint8 array or bytes-like. Returns an RGB image or None."""
+        target_width = self.target_widths.get(task, 0)
+
+        flags = cv2.IMREAD_COLOR
+        if target_width:
+            dimensions = jpeg_dimensions(jpeg)
+            if dimensions:
+                for factor, reduced_flag in REDUCED_DECODE_FLAGS:
+                    if dimensions[0] // factor >= target_width:
+                        flags = reduced_flag
+                        break
+
+        image = cv2.imdecode(np.frombuffer(jpeg, np.uint8), flags)
+        if image is None:
+            return None
+        return self.prepare(image, task)
+
+    def prepare(self, image, task=None):
+        """Resize an already decoded BGR image (e.g. a video frame) and convert to RGB."""
+        target_width = self.target_widths.get(task, 0)
+        height, width = image.shape[:2]
+        if target_width and width > target_width:
+            target_height = max(1, round(height * target_width / width))
+            resized = self._buffer(self._resize_buffers, (target_height, target_width, 3))
+            # After reduced decoding the remaining factor is small and bilinear
+            # is several times faster than INTER_AREA; larger shrinks (video
+            # frames skip reduced decoding) would alias with bilinear
+            interpolation = cv2.INTER_AREA if width >= 2 * target_width else cv2.INTER_LINEAR
+            image = cv2.resize(image, (target_width, target_height), dst=resized,
+                               interpolation=interpolation)
+
+        rgb = self._buffer(self._rgb_buffers, image.shape)
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=rgb)
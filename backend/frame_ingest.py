@@ -0,0 +1,90 @@
+import asyncio
+import time
+from collections import deque
+
+from fastapi import WebSocketDisconnect
+
+from frame_protocol import parse_frame_message
+from metrics import DROPPED_FRAMES, STAGE_SECONDS
+
+
+class FrameIngest:
+    """
+    Per-connection ingest stage for /ws/analyze (latest frame wins).
+
+    A reader task drains the socket continuously. Frames overwrite a single
+    slot, so when inference is slower than the client's send rate the
+    handler always analyses the newest frame and older ones are counted as
+    dropped instead of queueing up. Control messages (commands, protocol
+    errors) are never dropped and are delivered in arrival order relative
+    to the pending frame.
+    """
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.received = 0
+        self.dropped = 0
+
+        self._arrivals = 0
+        self._latest = None
+        self._control = deque()
+        self._error = None
+        self._wakeup = asyncio.Event()
+
+    async def run(self):
+        """Reader task: receive until the socket closes."""
+        try:
+            while True:
+                received = await self.websocket.receive()
+                if received["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(received.get("code", 1000))
+
+                data = received.get("bytes")
+                if data is None:
+                    data = received.get("text") or ""
+
+                self._arrivals += 1
+                start = time.perf_counter()
+                try:
+                    message = parse_frame_message(data)
+                except ValueError as e:
+                    self._control.append((self._arrivals, {"error": str(e)}))
+                    self._wakeup.set()
+                    continue
+                received_at = time.perf_counter()
+                STAGE_SECONDS.observe(received_at - start, endpoint="analyze", stage="parse")
+
+                self.received += 1
+                # Deadlines in the inference scheduler count from arrival
+                message["received_at"] = received_at
+                if message.get("command"):
+                    self._control.append((self._arrivals, message))
+                else:
+                    if self._latest is not None:
+                        self.dropped += 1
+                        DROPPED_FRAMES.inc(task=self._latest[1]["task"], reason="superseded")
+                    self._latest = (self._arrivals, message)
+                self._wakeup.set()
+        except Exception as e:
+            self._error = e
+            self._wakeup.set()
+
+    async def next(self):
+        """
+        Next message to handle. Once the socket is gone, queued control
+        messages are still handed out (the pending frame is not), then the
+        reader's error (for example WebSocketDisconnect) is re-raised.
+        """
+        while True:
+            if self._error is not None:
+                if self._control:
+                    return self._control.popleft()[1]
+                raise self._error
+            if self._control and (self._latest is None or self._control[0][0] < self._latest[0]):
+                return self._control.popleft()[1]
+            if self._latest is not None:
+                message = self._latest[1]
+                self._latest = None
+                return message
+            self._wakeup.clear()
+            await self._wakeup.wait()
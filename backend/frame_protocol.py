@@ -0,0 +1,186 @@
+"""
+Binary message format for /ws/analyze.
+
+Every binary WebSocket message is a fixed 16-byte little-endian header
+followed by the raw JPEG bytes of the frame:
+
+    offset  size  field
+    0       1     version      (FRAME_PROTOCOL_VERSION)
+    1       1     task id      (see TASK_IDS)
+    2       1     command id   (see COMMAND_IDS, 0 = none)
+    3       1     reserved     (0)
+    4       4     sequence     uint32, chosen by the client
+    8       8     captured_at  float64, client capture time in ms
+
+Text messages keep the legacy JSON format:
+    {"task": "...", "image": "data:image/jpeg;base64,...", "command": "..."}
+
+or carry landmarks the client computed itself instead of an image, which
+the server analyses without decoding or inference (see landmark_analysis):
+    {"task": "...", "landmarks": {"face": [...], "pose": [...], "hands": n},
+     "seq": n, "captured_at": ms}
+
+Binary messages on /ws/audio are raw 16-bit little-endian mono PCM,
+optionally prefixed with a 12-byte header:
+
+    offset  size  field
+    0       4     magic        b"NLA1"
+    4       4     sample_rate  uint32, Hz
+    8       4     sequence     uint32, chosen by the client
+
+Chunks without the magic prefix are treated as headerless PCM at the
+analyzer's default sample rate.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+FRAME_PROTOCOL_VERSION = 1
+
+HEADER = struct.Struct("<BBBBId")
+HEADER_SIZE = HEADER.size
+
+TASK_IDS = {
+    0: "eye_contact",
+    1: "name_response",
+    2: "gestures",
+    3: "repetitive",
+}
+
+COMMAND_IDS = {
+    0: None,
+    1: "reset_yaw",
+    2: "start_trace",       # record a profiling trace of this session
+    3: "start_profile",     # trace plus sampled CPU stacks
+    4: "report",            # reply with the task's result and score timeline
+}
+
+
+def parse_binary_frame(data):
+    """
+    Split a binary message into its header fields and image payload.
+
+    The image is returned as a memoryview into `data`, so it can be fed to
+    np.frombuffer without copying. Raises ValueError on malformed input.
+    """
+    if len(data) < HEADER_SIZE:
+        raise ValueError(f"Binary frame too short ({len(data)} bytes)")
+
+    version, task_id, command_id, _, seq, captured_at = HEADER.unpack_from(data)
+    if version != FRAME_PROTOCOL_VERSION:
+        raise ValueError(f"Unsupported frame protocol version {version}")
+    if task_id not in TASK_IDS:
+        raise ValueError(f"Unknown task id {task_id}")
+    if command_id not in COMMAND_IDS:
+        raise ValueError(f"Unknown command id {command_id}")
+
+    return {
+        "task": TASK_IDS[task_id],
+        "command": COMMAND_IDS[command_id],
+        "seq": seq,
+        "captured_at": captured_at,
+        "image": memoryview(data)[HEADER_SIZE:],
+    }
+
+
+def parse_frame_message(data):
+    """
+    Parse one /ws/analyze message, binary or JSON text, into a dict with
+    at least "task", "image" and "command" ("landmarks" too for JSON).
+    Raises ValueError on malformed binary frames and on unknown tasks or
+    commands.
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return parse_binary_frame(data)
+
+    # Expect JSON: { "task": "...", "image": "base64..." }
+    try:
+        message = json.loads(data)
+        if not isinstance(message, dict):
+            raise ValueError("JSON message is not an object")
+    except ValueError:
+        # Fallback for legacy raw string (if any)
+        return {"task": "eye_contact", "image": data, "command": None}
+
+    message.setdefault("task", "eye_contact")
+    message.setdefault("image", "")
+    message.setdefault("landmarks", None)
+    message.setdefault("command", None)
+
+    # Both end up as metric labels and scheduler keys: only known names
+    task = message["task"]
+    if not isinstance(task, str) or task not in _TASKS:
+        raise ValueError(f"Unknown task {_describe(task)}")
+    command = message["command"]
+    if command == "":
+        message["command"] = None
+    elif command is not None and (not isinstance(command, str) or command not in _COMMANDS):
+        raise ValueError(f"Unknown command {_describe(command)}")
+    return message
+
+
+_TASKS = frozenset(TASK_IDS.values())
+_COMMANDS = frozenset(name for name in COMMAND_IDS.values() if name)
+
+
+def _describe(value):
+    """Short form of a client-supplied value for error replies."""
+    return f"'{value[:32]}'" if isinstance(value, str) else f"of type {type(value).__name__}"
+
+
+def pack_binary_frame(task, image_bytes, seq=0, captured_at=0.0, command=None):
+    """Build a binary message (used by tests and Python clients)."""
+    task_id = _lookup_id(TASK_IDS, task, "task")
+    command_id = _lookup_id(COMMAND_IDS, command, "command")
+    header = HEADER.pack(FRAME_PROTOCOL_VERSION, task_id, command_id, 0, seq, captured_at)
+    return header + bytes(image_bytes)
+
+
+def _lookup_id(table, name, kind):
+    for key, value in table.items():
+        if value == name:
+            return key
+    raise ValueError(f"Unknown {kind} '{name}'")
+
+
+AUDIO_MAGIC = b"NLA1"
+AUDIO_HEADER = struct.Struct("<4sII")
+AUDIO_HEADER_SIZE = AUDIO_HEADER.size
+
+
+def parse_audio_chunk(data):
+    """
+    Interpret a binary /ws/audio message as int16 PCM.
+
+    Returns sample_rate and seq (None when the header is absent) and the
+    samples as a read-only np.int16 view into `data` (no copy).
+    Raises ValueError on malformed input.
+    """
+    sample_rate = None
+    seq = None
+    offset = 0
+
+    if len(data) >= AUDIO_HEADER_SIZE and bytes(data[:4]) == AUDIO_MAGIC:
+        _, sample_rate, seq = AUDIO_HEADER.unpack_from(data)
+        if sample_rate == 0:
+            raise ValueError("Audio header sample rate must be positive")
+        offset = AUDIO_HEADER_SIZE
+
+    if (len(data) - offset) % 2:
+        raise ValueError("Audio payload is not a whole number of int16 samples")
+
+    return {
+        "sample_rate": sample_rate,
+        "seq": seq,
+        "samples": np.frombuffer(data, dtype="<i2", offset=offset),
+    }
+
+
+def pack_audio_chunk(samples, sample_rate=None, seq=0):
+    """Build a binary audio message; the header is omitted without sample_rate."""
+    payload = np.asarray(samples, dtype="<i2").tobytes()
+    if sample_rate is None:
+        return payload
+    return AUDIO_HEADER.pack(AUDIO_MAGIC, sample_rate, seq) + payload
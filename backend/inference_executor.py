@@ -0,0 +1,208 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+import config
+from inference_workers import InferenceWorkerPool
+from tracking_engine import TrackingEngine
+
+# Engine owned by a worker process (process mode only)
+_worker_engine = None
+
+
+def _init_worker():
+    """Build the TrackingEngine once per worker process."""
+    global _worker_engine
+    _worker_engine = TrackingEngine()
+
+
+def _process_frame_in_worker(image_data, task, timestamp=None):
+    """Runs inside a worker process. Returns (analysis, compute seconds)."""
+    return _timed_process_frame(_worker_engine, image_data, task, timestamp)
+
+
+def _reset_worker_session():
+    _worker_engine.reset_session()
+
+
+def _warm_up_worker(models):
+    return _worker_engine.warm_up(models)
+
+
+def _worker_model_status():
+    return _worker_engine.model_status()
+
+
+def _timed_process_frame(engine, image_data, task, timestamp=None):
+    # The thread the leased engine runs on, for profiled sessions (session_trace.py)
+    engine.active_thread = threading.get_ident()
+    start = time.perf_counter()
+    try:
+        analysis = engine.process_frame(image_data, task, timestamp)
+    finally:
+        engine.active_thread = None
+    return analysis, time.perf_counter() - start
+
+
+class WorkerEngine:
+    """
+    Handle to a TrackingEngine living in its own worker process.
+    Pinning a session to one process keeps its temporal state in one place.
+    """
+
+    def __init__(self):
+        self.pool = ProcessPoolExecutor(max_workers=1, initializer=_init_worker)
+
+    def reset_session(self):
+        self.pool.submit(_reset_worker_session).result()
+
+    def warm_up(self, models=None):
+        return self.pool.submit(_warm_up_worker, models).result()
+
+    def model_status(self):
+        return self.pool.submit(_worker_model_status).result()
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class InferenceExecutor:
+    """
+    Runs TrackingEngine frame analysis off the asyncio event loop.
+
+    mode="thread" runs leased TrackingEngines on a thread pool (MediaPipe
+    and OpenCV release the GIL for most of their work), mode="process" gives
+    every engine its own worker process (see WorkerEngine), and mode="shm"
+    hosts all engines in max_workers dedicated processes fed through shared
+    memory (see inference_workers.py). The number of in-flight analyses is
+    bounded by max_workers in every mode; extra frames wait in the thread
+    pool's queue, for a process slot, or in an inference worker's pipe.
+    """
+
+    MODES = ("thread", "process", "shm")
+
+    def __init__(self, mode=config.EXECUTOR_MODE, max_workers=config.INFERENCE_WORKERS,
+                 history_length=1000):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown executor mode '{mode}', expected one of {self.MODES}")
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+
+        self.mode = mode
+        self.max_workers = max_workers
+        self._pool = None
+        self._workers = InferenceWorkerPool(max_workers) if mode == "shm" else None
+        # Each WorkerEngine has its own process, so bound them together here
+        self._process_slots = asyncio.Semaphore(max_workers) if mode == "process" else None
+
+        # Per-task timing: total (queue + compute) and compute-only seconds,
+        # for the engine's tasks only
+        tasks = TrackingEngine.TASK_MODELS
+        self.total_times = {task: deque(maxlen=history_length) for task in tasks}
+        self.compute_times = {task: deque(maxlen=history_length) for task in tasks}
+        self.frames_processed = dict.fromkeys(tasks, 0)
+        self.in_flight = 0
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="inference"
+            )
+        return self._pool
+
+    def create_engine(self):
+        """Build an engine for the EnginePool (blocking; call off the loop)."""
+        if self.mode == "process":
+            return WorkerEngine()
+        if self.mode == "shm":
+            return self._workers.create_engine()
+        return TrackingEngine()
+
+    async def process_frame(self, engine, image_data, task, timestamp=None):
+        """
+        Analyse one frame on a leased engine without blocking the event loop.
+        The caller must hold the lease: engines are not re-entrant.
+        timestamp is the frame's capture time in seconds (see TrackingEngine).
+        """
+        if task not in self.frames_processed:
+            raise ValueError(f"Unknown task '{task}'")
+        loop = asyncio.get_running_loop()
+
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            if self.mode == "process":
+                if isinstance(image_data, memoryview):
+                    # Worker processes receive a pickled copy anyway
+                    image_data = image_data.tobytes()
+                async with self._process_slots:
+                    analysis, compute_time = await loop.run_in_executor(
+                        engine.pool, _process_frame_in_worker, image_data, task, timestamp
+                    )
+            elif self.mode == "shm":
+                analysis, compute_time = await asyncio.wrap_future(
+                    engine.process_frame(image_data, task, timestamp)
+                )
+            else:
+                analysis, compute_time = await loop.run_in_executor(
+                    self._get_pool(), _timed_process_frame, engine, image_data, task, timestamp
+                )
+        finally:
+            self.in_flight -= 1
+
+        self.total_times[task].append(time.perf_counter() - start)
+        self.compute_times[task].append(compute_time)
+        self.frames_processed[task] += 1
+        return analysis
+
+    def stats(self):
+        """Latency summary per task, in milliseconds."""
+        tasks = {}
+        for task, samples in self.total_times.items():
+            if not samples:
+                continue
+            total = np.asarray(samples) * 1000
+            compute = np.asarray(self.compute_times[task]) * 1000
+            tasks[task] = {
+                "frames": self.frames_processed[task],
+                "total_ms": _summarize(total),
+                "compute_ms": _summarize(compute),
+            }
+        stats = {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "tasks": tasks,
+        }
+        if self._workers is not None:
+            stats["workers"] = self._workers.stats()
+        return stats
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._workers is not None:
+            self._workers.shutdown()
+
+
+def _summarize(samples_ms):
+    if len(samples_ms) == 0:
+        return {}
+    p50, p95, p99 = np.percentile(samples_ms, [50, 95, 99])
+    return {
+        "mean": round(float(samples_ms.mean()), 2),
+        "p50": round(float(p50), 2),
+        "p95": round(float(p95), 2),
+        "p99": round(float(p99), 2),
+        "max": round(float(samples_ms.max()), 2),
+    }
+
+
+# Singleton instance
+inference_executor = InferenceExecutor()
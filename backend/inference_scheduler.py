@@ -0,0 +1,165 @@
+import asyncio
+import heapq
+import itertools
+import time
+import config
+from inference_executor import inference_executor
+from tracking_engine import TrackingEngine
+
+
+class FrameExpired(Exception):
+    """The frame waited past its deadline and was dropped unprocessed."""
+
+
+class _Job:
+    __slots__ = ("session_id", "engine", "image_data", "task", "timestamp", "deadline",
+                 "future", "enqueued_at")
+
+    def __init__(self, session_id, engine, image_data, task, timestamp, deadline, future):
+        self.session_id = session_id
+        self.engine = engine
+        self.image_data = image_data
+        self.task = task
+        self.timestamp = timestamp
+        self.deadline = deadline
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class InferenceScheduler:
+    """
+    Central scheduler for frame jobs from every /ws/analyze session.
+
+    Jobs wait in per-task queues and are dispatched to the inference
+    executor, at most `concurrency` at a time, using start-time fair
+    queuing across sessions: each job is tagged with its session's virtual
+    start time, and a session's virtual clock advances by the job's
+    estimated cost divided by the session's weight. A repetitive session
+    therefore gets as much inference time as a gestures session, not as
+    many frames. Costs are an exponential moving average of measured
+    inference time per task.
+
+    Jobs still queued after their deadline are dropped with FrameExpired.
+    Queues and statistics exist for the engine's tasks only; other tasks
+    are rejected with ValueError.
+    """
+
+    def __init__(self, executor, concurrency=config.INFERENCE_WORKERS,
+                 deadline_ms=config.FRAME_DEADLINE_MS, task_weights=config.TASK_WEIGHTS,
+                 cost_estimates=config.TASK_COST_ESTIMATES, cost_smoothing=0.1):
+        if concurrency < 1:
+            raise ValueError("Scheduler concurrency must be at least 1")
+
+        self.executor = executor
+        self.concurrency = concurrency
+        self.deadline = deadline_ms / 1000
+        self.task_weights = task_weights
+        self.tasks = tuple(TrackingEngine.TASK_MODELS)
+        self.cost_ms = {task: cost_estimates.get(task, 20.0) for task in self.tasks}
+        self.cost_smoothing = cost_smoothing
+
+        self._queues = {task: [] for task in self.tasks}   # task -> heap of (start tag, order, job)
+        self._order = itertools.count()
+        self._virtual_time = 0.0
+        self._session_finish = {}           # session -> virtual finish of its last job
+        self.running = 0
+
+        self.dispatched = dict.fromkeys(self.tasks, 0)
+        self.expired = dict.fromkeys(self.tasks, 0)
+        self.wait_ms = dict.fromkeys(self.tasks, 0.0)   # moving average of queueing delay
+
+    def submit(self, session_id, engine, image_data, task, received_at=None, timestamp=None):
+        """
+        Queue a frame for inference. Returns an awaitable resolving to the
+        analysis, or raising FrameExpired. received_at (perf_counter) lets
+        time already spent in the ingest stage count towards the deadline;
+        timestamp (the frame's capture time) is passed on to the engine.
+        """
+        if task not in self._queues:
+            raise ValueError(f"Unknown task '{task}'")
+        loop = asyncio.get_running_loop()
+        start = received_at if received_at is not None else time.perf_counter()
+        job = _Job(session_id, engine, image_data, task, timestamp,
+                   start + self.deadline, loop.create_future())
+
+        weight = self.task_weights.get(task, 1.0)
+        start_tag = max(self._virtual_time, self._session_finish.get(session_id, 0.0))
+        self._session_finish[session_id] = start_tag + self.cost_ms[task] / weight
+
+        heapq.heappush(self._queues[task], (start_tag, next(self._order), job))
+        self._dispatch()
+        return job.future
+
+    def forget(self, session_id):
+        """Drop a finished session's fair-queuing state."""
+        self._session_finish.pop(session_id, None)
+
+    def _pop_next(self):
+        best = None
+        for queue in self._queues.values():
+            if queue and (best is None or queue[0] < best[0]):
+                best = queue
+        if best is None:
+            return None, 0.0
+        start_tag, _, job = heapq.heappop(best)
+        return job, start_tag
+
+    def _dispatch(self):
+        now = time.perf_counter()
+        while self.running < self.concurrency:
+            job, start_tag = self._pop_next()
+            if job is None:
+                return
+            if job.future.done():
+                # Waiter went away (e.g. session cancelled)
+                continue
+            if now > job.deadline:
+                self.expired[job.task] += 1
+                job.future.set_exception(FrameExpired())
+                continue
+
+            self._virtual_time = max(self._virtual_time, start_tag)
+            self.wait_ms[job.task] += 0.1 * ((now - job.enqueued_at) * 1000 - self.wait_ms[job.task])
+            self.dispatched[job.task] += 1
+            self.running += 1
+            asyncio.ensure_future(self._run(job))
+
+    async def _run(self, job):
+        start = time.perf_counter()
+        try:
+            analysis = await self.executor.process_frame(
+                job.engine, job.image_data, job.task, job.timestamp
+            )
+            if not job.future.done():
+                job.future.set_result(analysis)
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.cost_ms[job.task] += self.cost_smoothing * (elapsed_ms - self.cost_ms[job.task])
+            self.running -= 1
+            self._dispatch()
+
+    def stats(self):
+        return {
+            "concurrency": self.concurrency,
+            "running": self.running,
+            "sessions": len(self._session_finish),
+            "deadline_ms": self.deadline * 1000,
+            "tasks": {
+                task: {
+                    "queue_depth": len(self._queues[task]),
+                    "dispatched": self.dispatched[task],
+                    "expired": self.expired[task],
+                    "avg_wait_ms": round(self.wait_ms[task], 2),
+                    "cost_ms": round(self.cost_ms[task], 2),
+                    "weight": self.task_weights.get(task, 1.0),
+                }
+                for task in self.tasks
+            },
+        }
+
+
+# Singleton instance
+inference_scheduler = InferenceScheduler(inference_executor)
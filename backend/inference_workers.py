@@ -0,0 +1,347 @@
+"""
+Dedicated inference worker processes with shared-memory frame handoff
+(InferenceExecutor mode "shm").
+
+A fixed set of worker processes hosts every TrackingEngine, so the API
+process only handles sockets and session metrics and the Python work of
+frame analysis runs on as many cores as there are workers, with one copy
+of each engine's graphs.
+
+Each worker owns a FrameRing: a shared-memory block split into fixed-size
+slots. The API process copies a frame into a free slot and sends the
+worker a small request over a pipe; the worker decodes straight from the
+slot, without copying, and sends the analysis back on the same pipe.
+Frames larger than a slot, legacy base64 frames and frames arriving while
+every slot is busy travel inline in the request instead.
+
+Engines are spread over the workers when they are created and stay on
+their worker, so a session's temporal state lives in one process.
+"""
+
+import itertools
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from multiprocessing import resource_tracker, shared_memory
+
+import config
+from tracking_engine import TrackingEngine
+
+
+class FrameRing:
+    """Fixed-size frame slots in one shared-memory block."""
+
+    def __init__(self, slots, slot_size, name=None):
+        self.slots = slots
+        self.slot_size = slot_size
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_size)
+        else:
+            self.shm = _attach(name)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, slot, data):
+        """Copy `data` into a slot; returns its length."""
+        start = slot * self.slot_size
+        length = len(data)
+        self.shm.buf[start:start + length] = data
+        return length
+
+    def view(self, slot, length):
+        """memoryview of a slot's frame. Release it before close()."""
+        start = slot * self.slot_size
+        return self.shm.buf[start:start + length]
+
+    def close(self):
+        self.shm.close()
+
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        # Older Pythons track attached blocks too; only the creator unlinks
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _worker_main(conn, ring_name, slots, slot_size, engine_factory):
+    """Worker process loop: one request at a time, replies in order."""
+    ring = FrameRing(slots, slot_size, ring_name)
+    engines = {}
+
+    def engine_for(engine_id):
+        engine = engines.get(engine_id)
+        if engine is None:
+            engine = engines[engine_id] = engine_factory()
+        return engine
+
+    try:
+        while True:
+            request = conn.recv()
+            op, request_id = request[0], request[1]
+            if op == "stop":
+                break
+            try:
+                if op == "frame":
+                    engine_id, slot, payload, task, timestamp = request[2:]
+                    engine = engine_for(engine_id)
+                    image_data = payload if slot is None else ring.view(slot, payload)
+                    start = time.perf_counter()
+                    analysis = engine.process_frame(image_data, task, timestamp)
+                    result = (analysis, time.perf_counter() - start)
+                    del image_data
+                elif op == "call":
+                    engine_id, method, args = request[2:]
+                    result = getattr(engine_for(engine_id), method)(*args)
+                elif op == "close":
+                    engine = engines.pop(request[2], None)
+                    if engine is not None and hasattr(engine, "shutdown"):
+                        engine.shutdown()
+                    result = None
+                else:
+                    raise ValueError(f"Unknown worker request '{op}'")
+            except Exception as e:
+                conn.send((request_id, False, f"{type(e).__name__}: {e}"))
+            else:
+                conn.send((request_id, True, result))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        for engine in engines.values():
+            if hasattr(engine, "shutdown"):
+                engine.shutdown()
+        ring.close()
+
+
+class InferenceWorker:
+    """
+    API-side handle to one worker process. Requests may be sent from any
+    thread; a reader thread resolves their futures as replies arrive.
+    """
+
+    def __init__(self, index, slots, slot_size, engine_factory=TrackingEngine):
+        context = multiprocessing.get_context("spawn")
+        self.ring = FrameRing(slots, slot_size)
+        self._conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, self.ring.name, slots, slot_size, engine_factory),
+            name=f"inference-{index}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+        self.engines = 0
+        self.inline_frames = 0
+        self._free_slots = list(range(slots))
+        self._pending = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._reader = threading.Thread(target=self._read, name=f"inference-{index}-results", daemon=True)
+        self._reader.start()
+
+    def request(self, op, *args):
+        """Send a request; returns a concurrent.futures.Future of the reply."""
+        future = Future()
+        # Running futures cannot be cancelled, so a reply always has a taker
+        future.set_running_or_notify_cancel()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Inference worker has exited")
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            try:
+                self._conn.send((op, request_id) + args)
+            except OSError as e:
+                del self._pending[request_id]
+                raise RuntimeError(f"Inference worker unreachable: {e}") from e
+        return future
+
+    def submit_frame(self, engine_id, image_data, task, timestamp=None):
+        """Future of (analysis, compute seconds) for one frame."""
+        slot = None
+        if not isinstance(image_data, str) and len(image_data) <= self.ring.slot_size:
+            with self._lock:
+                if self._free_slots:
+                    slot = self._free_slots.pop()
+
+        if slot is None:
+            self.inline_frames += 1
+            payload = image_data if isinstance(image_data, str) else bytes(image_data)
+        else:
+            payload = self.ring.write(slot, image_data)
+
+        try:
+            future = self.request("frame", engine_id, slot, payload, task, timestamp)
+        except BaseException:
+            if slot is not None:
+                self._release_slot(slot)
+            raise
+        if slot is not None:
+            # The worker is done with the slot once it has replied
+            future.add_done_callback(lambda _: self._release_slot(slot))
+        return future
+
+    def _release_slot(self, slot):
+        with self._lock:
+            self._free_slots.append(slot)
+
+    def _read(self):
+        while True:
+            try:
+                request_id, ok, result = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                future = self._pending.pop(request_id, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(RuntimeError(result))
+
+        # Worker gone: fail whatever is still waiting
+        with self._lock:
+            self._closed = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            future.set_exception(RuntimeError("Inference worker exited"))
+
+    @property
+    def alive(self):
+        return not self._closed and self.process.is_alive()
+
+    def stats(self):
+        return {
+            "pid": self.process.pid,
+            "alive": self.alive,
+            "engines": self.engines,
+            "free_slots": len(self._free_slots),
+            "inline_frames": self.inline_frames,
+        }
+
+    def stop(self, timeout=5.0):
+        with self._lock:
+            if not self._closed:
+                try:
+                    self._conn.send(("stop", None))
+                except OSError:
+                    pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        # The worker's exit ends the reader thread
+        self._reader.join(timeout)
+        self._conn.close()
+        self.ring.close()
+        self.ring.shm.unlink()
+
+
+class SharedEngine:
+    """
+    Handle to a TrackingEngine hosted by an inference worker; what the
+    EnginePool leases in "shm" mode. Blocking methods are called off the
+    event loop by the pool, like WorkerEngine's.
+    """
+
+    def __init__(self, worker, engine_id, call_timeout=config.SHM_CALL_TIMEOUT):
+        self.worker = worker
+        self.engine_id = engine_id
+        self.call_timeout = call_timeout
+
+    @property
+    def alive(self):
+        """False once the hosting worker has exited (the engine is gone)."""
+        return self.worker.alive
+
+    def process_frame(self, image_data, task, timestamp=None):
+        """Future of (analysis, compute seconds)."""
+        return self.worker.submit_frame(self.engine_id, image_data, task, timestamp)
+
+    def _call(self, method, *args):
+        future = self.worker.request("call", self.engine_id, method, args)
+        try:
+            return future.result(self.call_timeout)
+        except TimeoutError:
+            raise RuntimeError(f"Inference worker did not answer {method} "
+                               f"within {self.call_timeout}s") from None
+
+    def reset_session(self):
+        self._call("reset_session")
+
+    def warm_up(self, models=None):
+        return self._call("warm_up", models)
+
+    def model_status(self):
+        return self._call("model_status")
+
+    def shutdown(self):
+        self.worker.engines -= 1
+        try:
+            self.worker.request("close", self.engine_id)
+        except RuntimeError:
+            pass
+
+
+class InferenceWorkerPool:
+    """
+    The fixed set of inference worker processes, started on the first
+    engine. Each worker gets enough frame slots for its share of the
+    engine pool (one frame in flight per engine).
+    """
+
+    def __init__(self, workers=config.INFERENCE_WORKERS, slots=None,
+                 slot_size=config.SHM_SLOT_BYTES, engine_factory=TrackingEngine):
+        if workers < 1:
+            raise ValueError("At least one inference worker is needed")
+        self.size = workers
+        self.slots = slots or max(1, math.ceil(config.ENGINE_POOL_SIZE / workers))
+        self.slot_size = slot_size
+        self.engine_factory = engine_factory
+
+        self._workers = []
+        self._engine_ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def _start_worker(self, index):
+        return InferenceWorker(index, self.slots, self.slot_size, self.engine_factory)
+
+    def create_engine(self):
+        """
+        A new engine on the least loaded worker (blocking on first use).
+        Workers that have died are restarted first; engines they hosted
+        fail their frames and are replaced by the engine pool.
+        """
+        with self._lock:
+            if not self._workers:
+                self._workers = [self._start_worker(index) for index in range(self.size)]
+            for index, worker in enumerate(self._workers):
+                if not worker.alive:
+                    print(f"Inference worker {worker.process.pid} exited "
+                          f"(code {worker.process.exitcode}); restarting")
+                    worker.stop()
+                    self._workers[index] = self._start_worker(index)
+            worker = min(self._workers, key=lambda w: w.engines)
+            worker.engines += 1
+            return SharedEngine(worker, next(self._engine_ids))
+
+    def stats(self):
+        return [worker.stats() for worker in self._workers]
+
+    def shutdown(self):
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
@@ -0,0 +1,233 @@
+"""
+Gaze, head-yaw, hand and movement analysis on landmarks.
+
+The same logic runs on landmarks from the server's MediaPipe graphs
+(TrackingEngine) and on landmarks computed by the client. Clients that run
+MediaPipe themselves send landmark messages on /ws/analyze instead of
+frames, which skip image decoding and inference entirely:
+
+    {"task": "eye_contact", "landmarks": {"face": [[x, y], ...]}}
+    {"task": "gestures",    "landmarks": {"hands": 2}}
+    {"task": "repetitive",  "landmarks": {"pose": [[x, y, z, visibility], ...]}}
+
+"face" is either the FACE_POINTS subset in that order or the full refined
+face mesh (478 points, irises included); "pose" is either the
+LANDMARK_NAMES subset or all 33 MediaPipe Pose landmarks, visibility
+optional. Points may also be {"x", "y", ...} objects as MediaPipe's
+JavaScript API returns them. "hands" is a hand count or a list of hands.
+A missing or null entry means nothing was detected.
+"""
+
+import time
+
+import numpy as np
+
+from pose_tracker import LANDMARK_INDICES, LANDMARK_NAMES, LEFT_SHOULDER, RIGHT_SHOULDER, PoseTracker
+
+# Face mesh points the gaze and yaw estimates are computed from: nose tip,
+# ears, eye corners (left 33/133, right 362/263) and irises (468, 473).
+# Returned as results["face_points"], an (N, 2) array of x, y.
+FACE_POINTS = (1, 234, 454, 33, 133, 362, 263, 468, 473)
+NOSE, LEFT_EAR, RIGHT_EAR = 0, 1, 2
+LEFT_EYE, LEFT_IRIS = (3, 4), 7
+RIGHT_EYE, RIGHT_IRIS = (5, 6), 8
+
+# Refined face mesh size (468 points plus 10 iris points)
+FACE_MESH_POINTS = 478
+POSE_POINTS = 33
+
+_POINT_KEYS = ("x", "y", "z", "visibility")
+
+
+def _eye_ratio(points, eye, iris):
+    """Iris position across the eye, 0.0 = screen left, 1.0 = screen right."""
+    xs = points[eye, 0]
+    min_x, max_x = xs.min(), xs.max()
+    width = max_x - min_x
+    if width == 0:
+        return 0.5
+    return (points[iris, 0] - min_x) / width
+
+
+def face_results(points, gaze_ema):
+    """
+    Results for a detected face from its FACE_POINTS array. gaze_ema is the
+    session's smoothed gaze so far; the new value is results["gaze_x"].
+    """
+    nose_x, nose_y = points[NOSE].tolist()
+    # Yaw: Positive = Left turn (user's right), Negative = Right turn
+    head_yaw = nose_x - (points[LEFT_EAR, 0] + points[RIGHT_EAR, 0]) / 2
+
+    # Iris tracking, eyes averaged, with a sensitivity multiplier
+    raw_gaze = (_eye_ratio(points, LEFT_EYE, LEFT_IRIS) + _eye_ratio(points, RIGHT_EYE, RIGHT_IRIS)) / 2.0
+    sensitivity = 2.0
+    raw_gaze = (raw_gaze - 0.5) * sensitivity + 0.5
+
+    # Head turns push the gaze the same way; yaw is small (-0.1 to 0.1),
+    # so it needs a large weight
+    yaw_weight = 4.0
+    final_gaze = max(0.0, min(1.0, float(raw_gaze + head_yaw * yaw_weight)))
+
+    # Exponential moving average
+    alpha = 0.2
+    return {
+        "face_detected": True,
+        "face_points": points,
+        "face_x": nose_x,
+        "face_y": nose_y,
+        "head_yaw": float(head_yaw),
+        "gaze_x": alpha * final_gaze + (1 - alpha) * gaze_ema,
+    }
+
+
+def hand_results(hand_count):
+    if not hand_count:
+        return {"hands_detected": False}
+    return {"hands_detected": True, "hand_count": hand_count}
+
+
+def pose_results(pose_data):
+    """Results for PoseTracker output (None or undetected: no pose)."""
+    if not pose_data or not pose_data.get("pose_detected"):
+        return {"pose_detected": False}
+
+    landmarks = pose_data["landmark_array"]
+    patterns = pose_data["repetitive_patterns"]
+    return {
+        "pose_detected": True,
+        # Body centre X for basic tracking
+        "body_x": float(landmarks[LEFT_SHOULDER, 0] + landmarks[RIGHT_SHOULDER, 0]) / 2,
+        "landmarks": pose_data["landmarks"],
+        "pose_landmarks": landmarks,
+        "movement_counters": pose_data["movement_counters"],
+        "repetitive_patterns": patterns,
+        "movement_score": patterns.get("total_movements", 0),
+        "hand_flapping_detected": patterns.get("hand_flapping", False),
+        "rocking_detected": patterns.get("rocking", False),
+        "arm_swaying_detected": patterns.get("arm_swaying", False),
+    }
+
+
+def _point_array(points, columns, name):
+    """Client points as a float (N, >= columns) array; raises ValueError."""
+    if not isinstance(points, list) or not points:
+        raise ValueError(f"'{name}' landmarks must be a non-empty list")
+    if isinstance(points[0], dict):
+        keys = _POINT_KEYS[:columns]
+        # Pose visibility is optional; MediaPipe's JavaScript API omits it for some models
+        optional = ("visibility",) if columns == 3 else ()
+        try:
+            points = [[point[key] for key in keys] + [point.get(key, 1.0) for key in optional]
+                      for point in points]
+        except (KeyError, TypeError, AttributeError):
+            raise ValueError(f"'{name}' landmarks need {', '.join(keys)}") from None
+    try:
+        array = np.array(points, dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError(f"Malformed '{name}' landmarks") from None
+    if array.ndim != 2 or array.shape[1] < columns:
+        raise ValueError(f"'{name}' landmarks need at least {columns} coordinates each")
+    if not np.isfinite(array).all():
+        raise ValueError(f"'{name}' landmarks must be finite")
+    return array
+
+
+def parse_face(points):
+    """FACE_POINTS array from a client "face" entry, None if absent."""
+    if points is None:
+        return None
+    array = _point_array(points, 2, "face")
+    if len(array) >= FACE_MESH_POINTS:
+        array = array[list(FACE_POINTS)]
+    elif len(array) != len(FACE_POINTS):
+        raise ValueError(
+            f"'face' needs {len(FACE_POINTS)} points or the {FACE_MESH_POINTS}-point mesh, got {len(array)}"
+        )
+    return array[:, :2]
+
+
+def parse_pose(points):
+    """(len(LANDMARK_NAMES), 4) array from a client "pose" entry, None if absent."""
+    if points is None:
+        return None
+    array = _point_array(points, 3, "pose")
+    if len(array) == POSE_POINTS:
+        array = array[list(LANDMARK_INDICES)]
+    elif len(array) != len(LANDMARK_NAMES):
+        raise ValueError(
+            f"'pose' needs {len(LANDMARK_NAMES)} or {POSE_POINTS} landmarks, got {len(array)}"
+        )
+    if array.shape[1] == 3:
+        array = np.column_stack((array, np.ones(len(array))))
+    return np.ascontiguousarray(array[:, :4])
+
+
+def parse_hands(hands):
+    """Hand count from a client "hands" entry (count or list of hands)."""
+    if hands is None:
+        return 0
+    if isinstance(hands, list):
+        return len(hands)
+    if isinstance(hands, bool) or not isinstance(hands, int) or hands < 0:
+        raise ValueError("'hands' must be a hand count or a list of hands")
+    return hands
+
+
+class LandmarkAnalyzer:
+    """
+    Per-session analysis of client-supplied landmarks: the gaze smoothing
+    and pose tracker state TrackingEngine keeps for image sessions, without
+    any MediaPipe graph. Cheap enough to run on the event loop.
+    """
+
+    def __init__(self, movement_threshold=0.02):
+        self.movement_threshold = movement_threshold
+        self.gaze_ema = 0.5
+        self._pose_tracker = None
+
+    @property
+    def pose_tracker(self):
+        # Only the detection stages are used, so its Pose graph is never built
+        if self._pose_tracker is None:
+            self._pose_tracker = PoseTracker(movement_threshold=self.movement_threshold)
+        return self._pose_tracker
+
+    def analyze(self, task_type, landmarks, timestamp=None):
+        """
+        Results for one landmark message, in the same form as
+        TrackingEngine.process_frame. Raises ValueError on malformed landmarks.
+        """
+        if not isinstance(landmarks, dict):
+            raise ValueError("'landmarks' must be an object")
+
+        start = time.perf_counter()
+        timings = {}
+        results = {"timings": timings, "started_at": start}
+
+        if task_type in ["eye_contact", "name_response"]:
+            points = parse_face(landmarks.get("face"))
+            if points is None:
+                results["face_detected"] = False
+            else:
+                results.update(face_results(points, self.gaze_ema))
+                self.gaze_ema = results["gaze_x"]
+
+        if task_type == "gestures":
+            results.update(hand_results(parse_hands(landmarks.get("hands"))))
+
+        if task_type == "repetitive":
+            pose = parse_pose(landmarks.get("pose"))
+            pose_data = None if pose is None else self.pose_tracker.process_landmarks(pose, timestamp)
+            results.update(pose_results(pose_data))
+
+        timings["landmarks"] = time.perf_counter() - start
+        return results
+
+    def reset(self):
+        self.gaze_ema = 0.5
+        if self._pose_tracker is not None:
+            self._pose_tracker.reset_counters()
+
+    def close(self):
+        if self._pose_tracker is not None:
+            self._pose_tracker.close_log()
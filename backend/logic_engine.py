@@ -1,8 +1,112 @@
+import hashlib
+import json
 import math
+import operator
+
+import numpy as np
+
+import config
+
+# Fields analyze() reads besides totalFrames
+SCORED_FIELDS = ("framesFaceDetected", "framesSocialSide", "framesGeometricSide", "sideSwitchCount")
+
+# Bump when the scoring logic changes in a way the thresholds don't capture
+# (cached results are keyed by it, see rules_version)
+RULES_VERSION = 1
+
+# Decision thresholds, overridable with NEUROLENS_SCORING_THRESHOLDS (e.g.
+# "preference:0.65,min_frames:60") or set_thresholds()
+DEFAULT_THRESHOLDS = {
+    "min_frames": 40,
+    "preference": 0.7,              # share of face frames on one side for a dominant focus
+    "engagement_high": 0.8,
+    "engagement_moderate": 0.5,
+    "shifts_flexible": 5,
+    "shifts_moderate": 2,
+    "repetitive_movement": 5.0,     # movement score above which movement is elevated
+    "vocal_low_percent": 20,
+    "vocal_some_percent": 50,
+    "min_audio_chunks": 20,         # about two seconds of 4096-sample chunks
+}
+
+INSUFFICIENT_DATA_ERROR = "Insufficient data collected. Please ensure the participant stays within camera frame and retry the demo."
+INSUFFICIENT_AUDIO_ERROR = "Insufficient audio collected. Please check the microphone and retry the recording."
+
+# Class labels and summary sentences, indexed by the class numbers that
+# analyze() and analyze_batch() derive
+FOCUS_LABELS = ("mixed/no strong preference", "geometric", "social")
+ENGAGEMENT_LABELS = ("low engagement", "moderate engagement", "high engagement")
+FLEXIBILITY_LABELS = ("low flexibility", "moderate flexibility", "flexible attention")
+
+PREFERENCE_SUMMARIES = (
+    "The participant showed a balanced interest between social and geometric visuals. ",
+    "In this demo, the participant looked more at geometric visual patterns compared to social visuals. ",
+    "In this demo, the participant showed more focus on social visual content compared to geometric patterns. ",
+)
+ENGAGEMENT_SUMMARIES = (
+    "Engagement was relatively low, with several periods where the participant was not detected in the camera frame. ",
+    "Engagement level was moderate with occasional periods of disengagement. ",
+    "Engagement level was consistently high throughout the demo. ",
+)
+SHIFT_SUMMARIES = (
+    "Very few attention shifts were observed during the demo. ",
+    "Some natural shifting of visual attention was observed. ",
+    "Frequent visual shifts were observed between the two types of content. ",
+)
+DISCLAIMER = "This demo reflects only momentary behavior during a short session and is not a diagnostic tool. For real behavioral concerns, consult a qualified professional."
+
+# Every interpretation, indexed by focus * 9 + engagement * 3 + flexibility
+INTERPRETATIONS = tuple(
+    preference + engagement + shifts + DISCLAIMER
+    for preference in PREFERENCE_SUMMARIES
+    for engagement in ENGAGEMENT_SUMMARIES
+    for shifts in SHIFT_SUMMARIES
+)
+
+# Per-task results (analyze_task). screeningScore follows the modules'
+# 0/1/2 convention: 0 typical, 2 a marker worth a closer look.
+REPETITIVE_PATTERNS = ("hand_flapping", "rocking", "arm_swaying")
+
+
+def _insufficient_data(error=INSUFFICIENT_DATA_ERROR):
+    return {
+        "error": error,
+        "scores": {},
+        "interpretation": "Insufficient data."
+    }
+
 
 class NeuroLensLogicEngine:
-    def __init__(self):
-        pass
+    def __init__(self, thresholds=None):
+        self.set_thresholds(**(config.SCORING_THRESHOLDS if thresholds is None else thresholds))
+        self._task_analyzers = {
+            "eye_contact": self.analyze,
+            "name_response": self._analyze_name_response,
+            "gestures": self._analyze_gestures,
+            "repetitive": self._analyze_repetitive,
+            "vocalization": self._analyze_vocalization,
+        }
+
+    def set_thresholds(self, **overrides):
+        """Score with DEFAULT_THRESHOLDS updated by `overrides` from now on."""
+        unknown = set(overrides) - set(DEFAULT_THRESHOLDS)
+        if unknown:
+            raise ValueError(f"Unknown scoring thresholds: {', '.join(sorted(unknown))}")
+        self.thresholds = {**DEFAULT_THRESHOLDS, **overrides}
+        fingerprint = hashlib.blake2b(json.dumps(self.thresholds, sort_keys=True).encode(),
+                                      digest_size=8).hexdigest()
+        # Identifies the scoring rules in effect: results cached under another
+        # version are stale
+        self.rules_version = f"{RULES_VERSION}:{fingerprint}"
+
+    def analyze_task(self, task, raw_metrics):
+        """
+        Result for one task's session metrics, in the legacy camelCase
+        fields its session state writes (see session_metrics.py), or None
+        for an unknown task.
+        """
+        analyzer = self._task_analyzers.get(task)
+        return None if analyzer is None else analyzer(raw_metrics)
 
     def analyze(self, raw_metrics):
         """
@@ -21,13 +125,11 @@ class NeuroLensLogicEngine:
         }
         """
         
+        thresholds = self.thresholds
+
         # 1. Validate Data
-        if raw_metrics.get("totalFrames", 0) < 40:
-            return {
-                "error": "Insufficient data collected. Please ensure the participant stays within camera frame and retry the demo.",
-                "scores": {},
-                "interpretation": "Insufficient data."
-            }
+        if raw_metrics.get("totalFrames", 0) < thresholds["min_frames"]:
+            return _insufficient_data()
 
         total_frames = raw_metrics["totalFrames"]
         frames_face_detected = raw_metrics["framesFaceDetected"]
@@ -56,72 +158,231 @@ class NeuroLensLogicEngine:
         # 3. Derive Classifications
         
         # Dominant Focus
-        dominant_focus = "mixed/no strong preference"
-        if geometric_preference > 0.7:
-            dominant_focus = "geometric"
-        elif social_preference > 0.7:
-            dominant_focus = "social"
+        focus = 0
+        if geometric_preference > thresholds["preference"]:
+            focus = 1
+        elif social_preference > thresholds["preference"]:
+            focus = 2
 
         # Engagement Classification
-        engagement_class = "low engagement"
-        if engagement_score > 0.8:
-            engagement_class = "high engagement"
-        elif engagement_score > 0.5:
-            engagement_class = "moderate engagement"
+        engagement = 0
+        if engagement_score > thresholds["engagement_high"]:
+            engagement = 2
+        elif engagement_score > thresholds["engagement_moderate"]:
+            engagement = 1
 
         # Attention Flexibility
-        attention_flexibility = "low flexibility"
-        if attention_shifts >= 5:
-            attention_flexibility = "flexible attention"
-        elif attention_shifts >= 2:
-            attention_flexibility = "moderate flexibility"
-
-        # 4. Generate Interpretation Summary
-        pattern_summary = ""
-
-        # A. Preference Patterns
-        if geometric_preference > 0.7:
-            pattern_summary += "In this demo, the participant looked more at geometric visual patterns compared to social visuals. "
-        elif social_preference > 0.7:
-            pattern_summary += "In this demo, the participant showed more focus on social visual content compared to geometric patterns. "
-        else:
-            pattern_summary += "The participant showed a balanced interest between social and geometric visuals. "
+        flexibility = 0
+        if attention_shifts >= thresholds["shifts_flexible"]:
+            flexibility = 2
+        elif attention_shifts >= thresholds["shifts_moderate"]:
+            flexibility = 1
+
+        # 4. Construct Final Output (labels and summary from the tables above)
+        return self._result(raw_metrics, round(engagement_score, 2), round(social_preference, 2),
+                            round(geometric_preference, 2), attention_shifts, focus, engagement,
+                            flexibility)
+
+    def analyze_batch(self, metrics_list, chunk_size=1024):
+        """
+        Scores many sessions' metrics, yielding one result per entry in
+        order: what analyze() returns, or None for an entry analyze() fails
+        on (e.g. a missing or non-numeric field).
+
+        Scores and classifications are computed with NumPy over chunks of
+        `chunk_size` entries, so results start streaming before the whole
+        batch is scored.
+        """
+        for start in range(0, len(metrics_list), chunk_size):
+            yield from self._score_chunk(metrics_list[start:start + chunk_size])
+
+    def _score_chunk(self, chunk):
+        try:
+            return self._score_columns(chunk)
+        except (AttributeError, KeyError, TypeError):
+            # Some entry is malformed: fall back to scoring one at a time
+            return [self._try_analyze(raw_metrics) for raw_metrics in chunk]
+
+    def _try_analyze(self, raw_metrics):
+        try:
+            return self.analyze(raw_metrics)
+        except Exception:
+            return None
+
+    def _score_columns(self, chunk):
+        totals = _numeric_array([raw_metrics.get("totalFrames", 0) for raw_metrics in chunk])
+        thresholds = self.thresholds
+        insufficient = totals < thresholds["min_frames"]
+        outcome = [_insufficient_data() if low else None for low in insufficient.tolist()]
+        scored = np.flatnonzero(~insufficient).tolist()
+        if not scored:
+            return outcome
+
+        values = _numeric_array([_scored_fields(chunk[i]) for i in scored]).astype(np.float64)
+        face, social, geometric, shifts = values.T
+        total = totals[scored].astype(np.float64)
+
+        engagement_score = np.divide(face, total, out=np.zeros_like(total), where=total > 0)
+        has_face = face > 0
+        social_preference = np.divide(social, face, out=np.zeros_like(face), where=has_face)
+        geometric_preference = np.divide(geometric, face, out=np.zeros_like(face), where=has_face)
+
+        preference = thresholds["preference"]
+        focus = np.select([geometric_preference > preference, social_preference > preference], [1, 2], 0)
+        engagement = np.select([engagement_score > thresholds["engagement_high"],
+                                engagement_score > thresholds["engagement_moderate"]], [2, 1], 0)
+        flexibility = np.select([shifts >= thresholds["shifts_flexible"],
+                                 shifts >= thresholds["shifts_moderate"]], [2, 1], 0)
+
+        columns = zip(scored, _round2(engagement_score), _round2(social_preference),
+                      _round2(geometric_preference), focus.tolist(), engagement.tolist(),
+                      flexibility.tolist())
+        for i, engagement_i, social_i, geometric_i, focus_i, engagement_class, flexibility_i in columns:
+            raw_metrics = chunk[i]
+            outcome[i] = self._result(raw_metrics, engagement_i, social_i, geometric_i,
+                                      raw_metrics["sideSwitchCount"], focus_i, engagement_class,
+                                      flexibility_i)
+        return outcome
+
+    def _result(self, raw_metrics, engagement_score, social_preference, geometric_preference,
+                attention_shifts, focus, engagement, flexibility):
+        return {
+            "metrics": raw_metrics,
+            "scores": {
+                "engagementScore": engagement_score,
+                "socialPreference": social_preference,
+                "geometricPreference": geometric_preference,
+                "attentionShifts": attention_shifts
+            },
+            "classifications": {
+                "dominantFocus": FOCUS_LABELS[focus],
+                "engagementClass": ENGAGEMENT_LABELS[engagement],
+                "attentionFlexibility": FLEXIBILITY_LABELS[flexibility]
+            },
+            "interpretation": INTERPRETATIONS[focus * 9 + engagement * 3 + flexibility]
+        }
 
-        # B. Engagement Interpretation
-        if engagement_score > 0.8:
-            pattern_summary += "Engagement level was consistently high throughout the demo. "
-        elif engagement_score > 0.5:
-            pattern_summary += "Engagement level was moderate with occasional periods of disengagement. "
+    def _analyze_name_response(self, raw_metrics):
+        total_frames = raw_metrics["totalFrames"]
+        if total_frames < self.thresholds["min_frames"]:
+            return _insufficient_data()
+        turn_frames = raw_metrics["headTurnFrames"]
+        responded = turn_frames > 0
+        if responded:
+            summary = "A head turn was observed after the participant's name was called. "
         else:
-            pattern_summary += "Engagement was relatively low, with several periods where the participant was not detected in the camera frame. "
+            summary = "No head turn was observed after the participant's name was called. "
+        return {
+            "metrics": raw_metrics,
+            "scores": {
+                "maxYawChange": round(raw_metrics["maxYawChange"], 3),
+                # Share of the frames since the name was called (reset_yaw)
+                "headTurnRate": round(turn_frames / (raw_metrics.get("responseFrames") or total_frames), 2),
+            },
+            "classifications": {
+                "nameResponse": "responded" if responded else "no response observed",
+            },
+            "screeningScore": 0 if responded else 2,
+            "interpretation": summary + DISCLAIMER
+        }
 
-        # C. Attention Shifting Interpretation
-        if attention_shifts >= 5:
-            pattern_summary += "Frequent visual shifts were observed between the two types of content. "
-        elif attention_shifts >= 2:
-            pattern_summary += "Some natural shifting of visual attention was observed. "
+    def _analyze_gestures(self, raw_metrics):
+        total_frames = raw_metrics["totalFrames"]
+        if total_frames < self.thresholds["min_frames"]:
+            return _insufficient_data()
+        hands_frames = raw_metrics["handsDetectedFrames"]
+        if hands_frames > 0:
+            summary = "The participant used their hands during the gesture task. "
         else:
-            pattern_summary += "Very few attention shifts were observed during the demo. "
+            summary = "No hand gestures were observed during the gesture task. "
+        return {
+            "metrics": raw_metrics,
+            "scores": {
+                "handsRate": round(hands_frames / total_frames, 2),
+            },
+            "classifications": {
+                "gestureUse": "hands used" if hands_frames > 0 else "no hand gestures observed",
+            },
+            "screeningScore": 0 if hands_frames > 0 else 2,
+            "interpretation": summary + DISCLAIMER
+        }
 
-        # D. Final Neutral Summary Line
-        pattern_summary += "This demo reflects only momentary behavior during a short session and is not a diagnostic tool. For real behavioral concerns, consult a qualified professional."
+    def _analyze_repetitive(self, raw_metrics):
+        total_frames = raw_metrics["totalFrames"]
+        if total_frames < self.thresholds["min_frames"]:
+            return _insufficient_data()
+        # Movement per frame * 1000, as in the live feedback
+        movement_score = raw_metrics["bodyMovementSum"] / total_frames * 1000
+        patterns = raw_metrics["repetitivePatterns"]
+        observed = [pattern for pattern in REPETITIVE_PATTERNS if patterns.get(pattern)]
+        elevated = movement_score > self.thresholds["repetitive_movement"]
+        if elevated:
+            summary = "Body movement was elevated, with repeated movements during the task. "
+        else:
+            summary = "Body movement stayed within a typical range during the task. "
+        return {
+            "metrics": raw_metrics,
+            "scores": {
+                "movementScore": round(movement_score, 2),
+                "repetitiveMovements": raw_metrics["totalRepetitiveMovements"],
+            },
+            "classifications": {
+                "movementLevel": "elevated movement" if elevated else "typical movement",
+                "patternsObserved": observed,
+            },
+            "screeningScore": 2 if elevated else 0,
+            "interpretation": summary + DISCLAIMER
+        }
 
-        # 5. Construct Final Output
+    def _analyze_vocalization(self, raw_metrics):
+        total_chunks = raw_metrics["totalChunks"]
+        if total_chunks < self.thresholds["min_audio_chunks"]:
+            return _insufficient_data(INSUFFICIENT_AUDIO_ERROR)
+        vocal_percentage = raw_metrics["speechChunks"] / total_chunks * 100
+        if vocal_percentage < self.thresholds["vocal_low_percent"]:
+            level, score = "limited vocalization", 2
+            summary = "Very little vocalization was detected during the recording. "
+        elif vocal_percentage < self.thresholds["vocal_some_percent"]:
+            level, score = "some vocalization", 1
+            summary = "Some vocalization was detected during the recording. "
+        else:
+            level, score = "frequent vocalization", 0
+            summary = "Frequent vocalization was detected during the recording. "
         return {
             "metrics": raw_metrics,
             "scores": {
-                "engagementScore": round(engagement_score, 2),
-                "socialPreference": round(social_preference, 2),
-                "geometricPreference": round(geometric_preference, 2),
-                "attentionShifts": attention_shifts
+                "vocalPercentage": round(vocal_percentage, 1),
+                "meanRms": round(raw_metrics["totalRMS"] / total_chunks, 4),
+                "maxRms": round(raw_metrics["maxRMS"], 4),
             },
             "classifications": {
-                "dominantFocus": dominant_focus,
-                "engagementClass": engagement_class,
-                "attentionFlexibility": attention_flexibility
+                "vocalization": level,
             },
-            "interpretation": pattern_summary
+            "screeningScore": score,
+            "interpretation": summary + DISCLAIMER
         }
 
+
+_scored_fields = operator.itemgetter(*SCORED_FIELDS)
+
+
+def _numeric_array(values):
+    """values as an array, or TypeError if any is not a number."""
+    array = np.array(values)
+    if array.dtype.kind not in "biuf":
+        raise TypeError("Metrics must be numbers")
+    return array
+
+
+def _round2(values):
+    """round(value, 2) of each value, as a list."""
+    scaled = values * 100
+    rounded = np.rint(scaled) / 100
+    # Close to a half, the scaling's rounding error can tip the result the
+    # other way; redo those exactly
+    for i in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6).tolist():
+        rounded[i] = round(float(values[i]), 2)
+    return rounded.tolist()
+
 # Singleton instance
 logic_engine = NeuroLensLogicEngine()
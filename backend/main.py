@@ -1,11 +1,34 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from logic_engine import logic_engine
-from tracking_engine import TrackingEngine
+from inference_executor import inference_executor
+from inference_scheduler import FrameExpired, inference_scheduler
+from engine_pool import engine_pool
 from audio_analyzer import audio_analyzer
+from frame_ingest import FrameIngest
+from session_metrics import SessionMetrics
+from video_analyzer import DEFAULT_CHUNK_SECONDS, analyze_video
+from frame_protocol import parse_audio_chunk
+from session_trace import TRACE_COMMANDS, SessionTrace, trace_mode
+from session_recording import SessionRecorder
+from landmark_analysis import LandmarkAnalyzer
+from response_encoder import ResponseEncoder, dumps
+from session_store import session_store
+from result_cache import payload_key, result_cache
+from metrics import (
+    ACTIVE_SESSIONS, AUDIO_CHUNKS, DROPPED_FRAMES, FAILED_DECODES, FRAMES,
+    INFERENCE_SECONDS, RESULT_CACHE_LOOKUPS, STAGE_SECONDS, metrics,
+)
+import asyncio
+import config
 import json
+import os
+import sqlite3
+import tempfile
 import time
+import uuid
 
 app = FastAPI(title="NeuroLens Backend")
 
@@ -17,7 +40,51 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-tracking_engine = TrackingEngine()
+# Videos being analysed by /api/analyze/video (see config.VIDEO_MAX_JOBS)
+video_jobs = asyncio.Semaphore(config.VIDEO_MAX_JOBS)
+
+# Model readiness, filled in by the startup warm-up
+readiness = {"ready": not config.PRELOAD_MODELS, "models": {}, "error": None}
+
+async def warm_up_engines():
+    try:
+        readiness["models"] = await engine_pool.prewarm()
+        readiness["ready"] = True
+        print(f"Models warmed up: {readiness['models']}")
+    except Exception as e:
+        readiness["error"] = str(e)
+        print(f"Model warm-up failed: {e}")
+
+@app.on_event("startup")
+async def start_warm_up():
+    # Serve health checks while the preload list is built in the background
+    if config.PRELOAD_MODELS:
+        app.state.warm_up_task = asyncio.create_task(warm_up_engines())
+
+@app.get("/api/ready")
+async def ready():
+    """Readiness probe: 503 until the configured preload models are warm."""
+    status_code = 200 if readiness["ready"] else 503
+    return JSONResponse(readiness, status_code=status_code)
+
+@app.on_event("shutdown")
+async def shutdown_inference():
+    engine_pool.shutdown()
+    inference_executor.shutdown()
+
+@app.get("/api/inference/stats")
+async def inference_stats():
+    """Per-task frame analysis latency, scheduler queues, engine pool occupancy and result cache hits."""
+    stats = inference_executor.stats()
+    stats["scheduler"] = inference_scheduler.stats()
+    stats["engine_pool"] = engine_pool.stats()
+    stats["result_cache"] = result_cache.stats()
+    return stats
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Stage latency histograms and frame/session counters, Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 class MetricsPayload(BaseModel):
     # Flexible payload to accept various module metrics
@@ -36,186 +103,339 @@ class MetricsPayload(BaseModel):
 
 @app.post("/api/analyze")
 async def analyze_metrics(payload: dict): # Accept dict to be flexible
+    # Results pages re-post identical payloads on every render. The encoded
+    # body is cached, so a hit skips scoring and serialization alike
+    key = payload_key(payload)
+    version = logic_engine.rules_version
+    body = result_cache.get(key, version)
+    RESULT_CACHE_LOOKUPS.inc(result="miss" if body is None else "hit")
+    if body is not None:
+        return Response(body, media_type="application/json")
     try:
-        # For now, just pass through to logic engine or return simple analysis
-        # The logic engine currently only handles Eye Contact metrics fully.
-        # We can expand it later.
-        result = logic_engine.analyze(payload)
-        return result
+        # Eye contact metrics by default; other tasks name themselves with
+        # "task" and send the fields their session state writes
+        task = payload.get("task", "eye_contact")
+        result = logic_engine.analyze_task(task, payload)
+        if result is None:
+            raise ValueError(f"Unknown task '{task}'")
+        body = dumps(result)
+        result_cache.put(key, version, body)
+        return Response(body, media_type="application/json")
     except Exception as e:
         # If logic engine fails on new fields, return generic success for now
         return {"status": "received", "data": payload}
 
+@app.post("/api/analyze/batch")
+async def analyze_metrics_batch(payload: list[dict]):
+    """
+    Score many eye contact sessions' metrics at once (a JSON array of
+    /api/analyze payloads). Results stream back as NDJSON, one line per
+    session in order, each what /api/analyze would have returned for it.
+    """
+    def lines():
+        results = logic_engine.analyze_batch(payload)
+        for raw_metrics, result in zip(payload, results):
+            if result is None:
+                result = {"status": "received", "data": raw_metrics}
+            yield dumps(result) + "\n"
+
+    # A plain generator is iterated in the thread pool, off the event loop
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.get("/api/sessions/{session_id}")
+async def session_scores(session_id: str, endpoint: str = "analyze"):
+    """
+    Results and score timelines of every task of a live or recently closed
+    WebSocket session (endpoint "analyze" or "audio"), from its last
+    checkpoint (see session_store.py).
+    """
+    try:
+        checkpoint = await asyncio.to_thread(session_store.load, session_id, endpoint)
+    except (sqlite3.Error, ValueError) as e:
+        raise HTTPException(status_code=503, detail=f"Session store unavailable: {e}")
+    if checkpoint is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+    session_metrics = SessionMetrics.restore(checkpoint["metrics"])
+    return {
+        "session_id": session_id,
+        "task": checkpoint["task"],
+        "tasks": {
+            task: {"report": session_metrics.report(task), "timeline": session_metrics.timeline(task)}
+            for task in session_metrics.states
+        },
+    }
+
+@app.post("/api/analyze/video")
+async def analyze_video_upload(request: Request, tasks: str = "eye_contact",
+                               stride: int = 1, chunk_seconds: float = DEFAULT_CHUNK_SECONDS):
+    """
+    Analyse a recorded screening video sent as the raw request body.
+    Chunks are processed in parallel worker processes (see video_analyzer.py).
+    Uploads are capped at VIDEO_MAX_UPLOAD_BYTES (413), and at most
+    VIDEO_MAX_JOBS videos are analysed at once (503 beyond that).
+    """
+    task_list = [task.strip() for task in tasks.split(",") if task.strip()]
+    suffix = os.path.splitext(request.headers.get("x-filename", ""))[1] or ".mp4"
+    too_large = HTTPException(status_code=413, detail="Video upload too large")
+    if int(request.headers.get("content-length") or 0) > config.VIDEO_MAX_UPLOAD_BYTES:
+        raise too_large
+    if video_jobs.locked():
+        raise HTTPException(status_code=503, detail="Busy analysing other videos, try again later")
+
+    async with video_jobs:
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as upload:
+            path = upload.name
+        try:
+            size = 0
+            with open(path, "wb") as upload:
+                async for block in request.stream():
+                    size += len(block)
+                    if size > config.VIDEO_MAX_UPLOAD_BYTES:
+                        raise too_large
+                    upload.write(block)
+
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, analyze_video, path, task_list, stride, chunk_seconds
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        finally:
+            os.remove(path)
+
+def frame_timestamp(message):
+    """Capture time of a frame in seconds: the client's clock when it sent one."""
+    captured_at = message.get("captured_at")
+    if captured_at and isinstance(captured_at, (int, float)):
+        return captured_at / 1000
+    return message["received_at"]
+
+async def resume_session(websocket, endpoint):
+    """
+    (session ID, checkpointed state or None, connection generation) for a
+    new connection, resuming the session named by ?session= if it has a
+    checkpoint. The client is told its ID first thing.
+    """
+    session_id = websocket.query_params.get("session")
+    state, generation = None, 0
+    if session_id:
+        try:
+            state, generation = await asyncio.to_thread(session_store.resume, session_id, endpoint)
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Could not load session checkpoint: {e}")
+    if state is None:
+        session_id = uuid.uuid4().hex
+    await websocket.send_json({"status": "session", "session_id": session_id,
+                               "resumed": state is not None})
+    return session_id, state, generation
+
+async def checkpoint_session(session_id, endpoint, state, generation):
+    try:
+        saved = await asyncio.to_thread(session_store.save, session_id, endpoint, state, generation)
+        if not saved:
+            print(f"Session {session_id} was resumed elsewhere; checkpoint skipped")
+    except (sqlite3.Error, TypeError, ValueError) as e:
+        print(f"Could not checkpoint session {session_id}: {e}")
+
+def task_report(session_metrics, task):
+    """Reply to a "report" command: the task's result and score timeline."""
+    return {
+        "status": "report",
+        "task": task,
+        "report": session_metrics.report(task),
+        "timeline": session_metrics.timeline(task),
+    }
+
+async def save_trace(trace):
+    try:
+        path = await asyncio.to_thread(trace.save)
+        print(f"Session trace written to {path}")
+    except OSError as e:
+        print(f"Could not write session trace: {e}")
+
 @app.websocket("/ws/analyze")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
+
+    # Reply format negotiated on the URL (fields, landmark encoding, deltas)
+    try:
+        encoder = ResponseEncoder.from_query(websocket.query_params)
+    except ValueError as e:
+        await websocket.send_json({"status": "error", "message": str(e)})
+        await websocket.close(code=1008)  # Policy Violation
+        return
+
+    # Each session gets its own engine so temporal state never leaks. It is
+    # leased on the first image frame: sessions that send landmarks only
+    # never hold one, and are analysed by their own LandmarkAnalyzer
+    engine = None
+    landmark_analyzer = None
     
-    # Session State
-    session = {
-        "task": "unknown",
-        "metrics": {
-            "totalFrames": 0,
-            "framesFaceDetected": 0,
-            "framesSocialSide": 0,
-            "framesGeometricSide": 0,
-            "sideSwitchCount": 0,
-            "lastSide": "none",
-            "initialYaw": None,
-            "maxYawChange": 0.0,
-            "handsDetectedFrames": 0,
-            "bodyMovementSum": 0.0,
-            "lastBodyX": None,
-            # Enhanced pose tracking metrics
-            "landmarkMovements": {},
-            "repetitivePatterns": {
-                "hand_flapping": False,
-                "rocking": False,
-                "arm_swaying": False
-            },
-            "totalRepetitiveMovements": 0
+    # Session State, resumed from its checkpoint after a dropped connection
+    session_id, checkpoint, generation = await resume_session(websocket, "analyze")
+    if checkpoint is None:
+        session = {
+            "task": "unknown",
+            "metrics": SessionMetrics()
         }
-    }
+    else:
+        session = {
+            "task": checkpoint["task"],
+            "metrics": SessionMetrics.restore(checkpoint["metrics"])
+        }
+    next_checkpoint = time.monotonic() + config.SESSION_CHECKPOINT_SECONDS
     
+    expired_frames = 0
+    ACTIVE_SESSIONS.inc(task=session["task"])
+
+    # Profiling trace, only for sessions that ask for one
+    trace = None
+    mode = trace_mode(websocket)
+    if mode:
+        trace = SessionTrace(session_id, "analyze", profile=mode == "profile")
+
+    # Per-frame engine output for offline re-scoring (replay.py)
+    recorder = SessionRecorder.for_session(session_id) if config.RECORD_SESSIONS else None
+
+    # Drain the socket continuously; only the newest frame is analysed
+    ingest = FrameIngest(websocket)
+    reader = asyncio.create_task(ingest.run())
+
     try:
         while True:
-            # Expect JSON: { "task": "...", "image": "base64..." }
-            raw_data = await websocket.receive_text()
-            try:
-                message = json.loads(raw_data)
-                task = message.get("task", "eye_contact")
-                image_data = message.get("image", "")
-            except:
-                # Fallback for legacy raw string (if any)
-                task = "eye_contact"
-                image_data = raw_data
+            # Newest frame (or pending control message) from the ingest stage
+            message = await ingest.next()
+            if "error" in message:
+                await websocket.send_json({"status": "error", "message": message["error"]})
+                continue
+
+            task = message["task"]
+            image_data = message["image"]
+            landmarks = message.get("landmarks")
 
+            if task != session["task"]:
+                ACTIVE_SESSIONS.dec(task=session["task"])
+                ACTIVE_SESSIONS.inc(task=task)
             session["task"] = task
+
+            # Commands are applied even without a frame
+            if message["command"] in TRACE_COMMANDS:
+                if trace is None:
+                    trace = SessionTrace(session_id, "analyze", profile=TRACE_COMMANDS[message["command"]])
+                    trace.attach_engine(engine)
+            elif message["command"] == "report":
+                # End-of-task result and score timeline, from the live session
+                await websocket.send_text(dumps(task_report(session["metrics"], task)))
+            elif message["command"]:
+                # Task commands such as reset_yaw go to the task states
+                session["metrics"].command(message["command"])
+            if not image_data and landmarks is None:
+                # Don't process frame if it's just a command
+                continue
+            picked_at = time.perf_counter()
+            STAGE_SECONDS.observe(picked_at - message["received_at"],
+                                  endpoint="analyze", stage="receive")
+            timestamp = frame_timestamp(message)
+
+            if landmarks is not None:
+                # Client-side landmarks: no decode or inference, analysed inline
+                if landmark_analyzer is None:
+                    landmark_analyzer = LandmarkAnalyzer()
+                try:
+                    analysis = landmark_analyzer.analyze(task, landmarks, timestamp)
+                except ValueError as e:
+                    await websocket.send_json({"status": "error", "message": str(e)})
+                    continue
+            else:
+                if engine is None:
+                    try:
+                        engine = await engine_pool.acquire()
+                    except asyncio.TimeoutError:
+                        print("No tracking engine available, closing session")
+                        await websocket.close(code=1013)  # Try Again Later
+                        return
+                    if trace is not None:
+                        trace.attach_engine(engine)
+
+                # Process Frame (fair-queued across sessions, off the event loop)
+                try:
+                    analysis = await inference_scheduler.submit(
+                        session_id, engine, image_data, task, message["received_at"], timestamp
+                    )
+                except FrameExpired:
+                    # Stale by the time a worker was free; a newer frame follows
+                    expired_frames += 1
+                    DROPPED_FRAMES.inc(task=task, reason="expired")
+                    if trace is not None:
+                        trace.instant("expired", time.perf_counter(), task=task)
+                    continue
+            FRAMES.inc(task=task)
+            if recorder is not None:
+                recorder.append(task, timestamp, analysis)
+            if trace is not None:
+                trace.frame(message, picked_at, analysis, time.perf_counter())
             
-            # Process Frame
-            analysis = tracking_engine.process_frame(image_data, task)
-            
-            response = {"status": "processed"}
+            response = {"status": "processed", "dropped_frames": ingest.dropped + expired_frames}
+            if "seq" in message:
+                # Let binary clients match replies to frames and measure latency
+                response["seq"] = message["seq"]
+                response["captured_at"] = message.get("captured_at")
             
             if analysis:
-                session["metrics"]["totalFrames"] += 1
-                
+                for stage, seconds in analysis["timings"].items():
+                    if stage in ("decode", "landmarks"):
+                        STAGE_SECONDS.observe(seconds, endpoint="analyze", stage=stage)
+                    else:
+                        INFERENCE_SECONDS.observe(seconds, model=stage)
+
                 # --- Task Specific Logic ---
-                
-                # 1. Eye Contact
-                if task == "eye_contact":
-                    response["face_detected"] = analysis["face_detected"]
-                    if analysis["face_detected"]:
-                        session["metrics"]["framesFaceDetected"] += 1
-                        # Side Logic
-                        # Side Logic (Using Gaze instead of Face Position)
-                        # Gaze X: 0.0 (Left/Social) <-> 1.0 (Right/Geometric)
-                        # Center Zone: 0.45 to 0.55 (Narrowed from 0.4-0.6)
-                        
-                        gaze = analysis.get("gaze_x", 0.5)
-                        current_side = "center"
-                        
-                        if gaze < 0.45:
-                            session["metrics"]["framesSocialSide"] += 1
-                            current_side = "social"
-                        elif gaze > 0.55:
-                            session["metrics"]["framesGeometricSide"] += 1
-                            current_side = "geometric"
-                        else:
-                            # Center - maybe track this too if needed
-                            pass
-                        
-                        if session["metrics"]["lastSide"] != "none" and current_side != "center" and current_side != session["metrics"]["lastSide"]:
-                             # Only count switches between actual sides, or include center?
-                             # Usually attention shift is Side A -> Side B.
-                             # If Side A -> Center -> Side B, that's one shift?
-                             # For now, let's count switch if we leave a side?
-                             # Let's stick to simple: if current_side changes and is not none.
-                             pass
-                             
-                        if current_side != "center":
-                             if session["metrics"]["lastSide"] != "none" and current_side != session["metrics"]["lastSide"]:
-                                 session["metrics"]["sideSwitchCount"] += 1
-                             session["metrics"]["lastSide"] = current_side
-                        
-                        response["current_side"] = current_side
-                        response["gaze_x"] = gaze
-
-                # 2. Name Response
-                elif task == "name_response":
-                    # Check for commands
-                    if message.get("command") == "reset_yaw":
-                        session["metrics"]["initialYaw"] = None
-                        session["metrics"]["maxYawChange"] = 0.0
-                        # Don't process frame if it's just a command
-                        continue
-
-                    response["face_detected"] = analysis["face_detected"]
-                    if analysis["face_detected"]:
-                        yaw = analysis["head_yaw"]
-                        if session["metrics"]["initialYaw"] is None:
-                            session["metrics"]["initialYaw"] = yaw
-                        
-                        # Calculate change from initial
-                        change = abs(yaw - session["metrics"]["initialYaw"])
-                        if change > session["metrics"]["maxYawChange"]:
-                            session["metrics"]["maxYawChange"] = change
-                        
-                        response["head_turn_detected"] = change > 0.05 # Threshold
-                        response["yaw_change"] = change
-
-                # 3. Gestures
-                elif task == "gestures":
-                    response["hands_detected"] = analysis["hands_detected"]
-                    if analysis["hands_detected"]:
-                        session["metrics"]["handsDetectedFrames"] += 1
-
-                # 4. Repetitive
-                elif task == "repetitive":
-                    response["pose_detected"] = analysis["pose_detected"]
-                    if analysis["pose_detected"]:
-                        body_x = analysis["body_x"]
-                        if session["metrics"]["lastBodyX"] is not None:
-                            movement = abs(body_x - session["metrics"]["lastBodyX"])
-                            session["metrics"]["bodyMovementSum"] += movement
-                        session["metrics"]["lastBodyX"] = body_x
-                        
-                        # Normalize movement score (Movement per frame * 1000 for readability)
-                        # This prevents it from just increasing forever
-                        avg_movement = 0
-                        if session["metrics"]["totalFrames"] > 0:
-                            avg_movement = (session["metrics"]["bodyMovementSum"] / session["metrics"]["totalFrames"]) * 1000
-                        
-                        # Enhanced pose tracking data
-                        if "landmarks" in analysis:
-                            response["landmarks"] = analysis["landmarks"]
-                        
-                        if "movement_counters" in analysis:
-                            session["metrics"]["landmarkMovements"] = analysis["movement_counters"]
-                            response["movement_counters"] = analysis["movement_counters"]
-                        
-                        if "repetitive_patterns" in analysis:
-                            patterns = analysis["repetitive_patterns"]
-                            session["metrics"]["repetitivePatterns"] = {
-                                "hand_flapping": patterns.get("hand_flapping", False),
-                                "rocking": patterns.get("rocking", False),
-                                "arm_swaying": patterns.get("arm_swaying", False)
-                            }
-                            session["metrics"]["totalRepetitiveMovements"] = patterns.get("total_movements", 0)
-                            
-                            response["repetitive_patterns"] = patterns
-                            response["hand_flapping_detected"] = analysis.get("hand_flapping_detected", False)
-                            response["rocking_detected"] = analysis.get("rocking_detected", False)
-                            response["arm_swaying_detected"] = analysis.get("arm_swaying_detected", False)
-                        
-                        response["movement_score"] = avg_movement
-                        response["total_movements"] = session["metrics"]["totalRepetitiveMovements"]
-
-            await websocket.send_json(response)
+                start = time.perf_counter()
+                session["metrics"].update(task, analysis, response, timestamp)
+                end = time.perf_counter()
+                STAGE_SECONDS.observe(end - start, endpoint="analyze", stage="session_update")
+                if trace is not None:
+                    trace.span("session_update", start, end, task=task)
+
+                if time.monotonic() >= next_checkpoint:
+                    next_checkpoint = time.monotonic() + config.SESSION_CHECKPOINT_SECONDS
+                    await checkpoint_session(session_id, "analyze", {
+                        "task": session["task"], "metrics": session["metrics"].snapshot()
+                    }, generation)
+            else:
+                FAILED_DECODES.inc(endpoint="analyze", task=task)
+
+            start = time.perf_counter()
+            payload = encoder.encode(response, analysis)
+            if payload is None:
+                # Thinned out by the negotiated reply rate
+                continue
+            await websocket.send_text(payload)
+            end = time.perf_counter()
+            STAGE_SECONDS.observe(end - start, endpoint="analyze", stage="send")
+            if trace is not None:
+                trace.span("send", start, end, task=task)
             
     except WebSocketDisconnect:
         print("Client disconnected")
     except Exception as e:
         print(f"WebSocket Error: {e}")
+    finally:
+        reader.cancel()
+        ACTIVE_SESSIONS.dec(task=session["task"])
+        inference_scheduler.forget(session_id)
+        if engine is not None:
+            await engine_pool.release(engine)
+        if landmark_analyzer is not None:
+            landmark_analyzer.close()
+        if session["metrics"].total_frames:
+            await checkpoint_session(session_id, "analyze", {
+                "task": session["task"], "metrics": session["metrics"].snapshot()
+            }, generation)
+        if recorder is not None:
+            recorder.close()
+            print(f"Session recorded to {recorder.path} ({recorder.frames} frames)")
+        if trace is not None:
+            await save_trace(trace)
 
 @app.websocket("/ws/audio")
 async def websocket_audio_endpoint(websocket: WebSocket):
@@ -224,52 +444,93 @@ async def websocket_audio_endpoint(websocket: WebSocket):
     """
     await websocket.accept()
     
-    # Session metrics for vocalization
-    session_metrics = {
-        "totalChunks": 0,
-        "speechChunks": 0,
-        "silenceChunks": 0,
-        "totalRMS": 0.0,
-        "maxRMS": 0.0,
-        "startTime": time.time()
-    }
+    # Session metrics for vocalization, resumed after a dropped connection
+    session_id, checkpoint, generation = await resume_session(websocket, "audio")
+    if checkpoint is None:
+        session_metrics = SessionMetrics()
+    else:
+        session_metrics = SessionMetrics.restore(checkpoint["metrics"])
+    next_checkpoint = time.monotonic() + config.SESSION_CHECKPOINT_SECONDS
+    ACTIVE_SESSIONS.inc(task="vocalization")
+
+    trace = None
+    mode = trace_mode(websocket)
+    if mode:
+        trace = SessionTrace(session_id, "audio", profile=mode == "profile")
     
     try:
         while True:
-            # Receive audio chunk (base64 encoded PCM)
-            data = await websocket.receive_text()
-            
-            # Analyze audio
-            analysis = audio_analyzer.analyze_audio_chunk(data)
+            received = await websocket.receive()
+            if received["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(received.get("code", 1000))
+
+            chunk = None
+            start = received_at = time.perf_counter()
+            if received.get("bytes") is not None:
+                # Binary int16 PCM, optional header (see frame_protocol.py)
+                try:
+                    chunk = parse_audio_chunk(received["bytes"])
+                except ValueError as e:
+                    await websocket.send_json({"status": "error", "message": str(e)})
+                    continue
+                analysis = audio_analyzer.analyze_samples(chunk["samples"], chunk["sample_rate"])
+            else:
+                text = received.get("text") or ""
+                if text.startswith("{"):
+                    # JSON control message, e.g. {"command": "start_trace"}
+                    try:
+                        command = json.loads(text).get("command")
+                    except (ValueError, AttributeError):
+                        command = None
+                    if command in TRACE_COMMANDS:
+                        if trace is None:
+                            trace = SessionTrace(session_id, "audio",
+                                                 profile=TRACE_COMMANDS[command])
+                    elif command == "report":
+                        await websocket.send_text(dumps(task_report(session_metrics, "vocalization")))
+                    else:
+                        await websocket.send_json({"status": "error", "message": "Unknown command"})
+                    continue
+                # Receive audio chunk (base64 encoded PCM)
+                analysis = audio_analyzer.analyze_audio_chunk(text)
+            end = time.perf_counter()
+            STAGE_SECONDS.observe(end - start, endpoint="audio", stage="analyze")
+            if trace is not None:
+                trace.span("analyze", start, end)
             
-            if analysis:
-                session_metrics["totalChunks"] += 1
-                session_metrics["totalRMS"] += analysis["rms"]
-                
-                if analysis["rms"] > session_metrics["maxRMS"]:
-                    session_metrics["maxRMS"] = analysis["rms"]
-                
-                if analysis["is_speech"]:
-                    session_metrics["speechChunks"] += 1
-                elif analysis["is_silence"]:
-                    session_metrics["silenceChunks"] += 1
-                
-                # Calculate vocalization percentage
-                vocal_percentage = 0
-                if session_metrics["totalChunks"] > 0:
-                    vocal_percentage = (session_metrics["speechChunks"] / session_metrics["totalChunks"]) * 100
-                
-                # Send real-time feedback
-                await websocket.send_json({
-                    "rms": analysis["rms"],
-                    "is_speech": analysis["is_speech"],
-                    "volume_level": analysis["volume_level"],
-                    "vocal_percentage": vocal_percentage,
-                    "speech_chunks": session_metrics["speechChunks"],
-                    "total_chunks": session_metrics["totalChunks"]
-                })
+            if not analysis:
+                FAILED_DECODES.inc(endpoint="audio", task="vocalization")
+            else:
+                AUDIO_CHUNKS.inc()
+                # Send real-time feedback (totals kept by the vocalization state)
+                feedback = {}
+                session_metrics.update("vocalization", analysis, feedback, received_at)
+                if chunk is not None and chunk["seq"] is not None:
+                    feedback["seq"] = chunk["seq"]
+                if trace is not None:
+                    trace.span("session_update", end, time.perf_counter())
+                start = time.perf_counter()
+                await websocket.send_json(feedback)
+                end = time.perf_counter()
+                STAGE_SECONDS.observe(end - start, endpoint="audio", stage="send")
+                if trace is not None:
+                    trace.span("send", start, end)
+
+                if time.monotonic() >= next_checkpoint:
+                    next_checkpoint = time.monotonic() + config.SESSION_CHECKPOINT_SECONDS
+                    await checkpoint_session(session_id, "audio", {
+                        "task": "vocalization", "metrics": session_metrics.snapshot()
+                    }, generation)
                 
     except WebSocketDisconnect:
         print("Audio client disconnected")
     except Exception as e:
         print(f"Audio WebSocket Error: {e}")
+    finally:
+        ACTIVE_SESSIONS.dec(task="vocalization")
+        if session_metrics.total_frames:
+            await checkpoint_session(session_id, "audio", {
+                "task": "vocalization", "metrics": session_metrics.snapshot()
+            }, generation)
+        if trace is not None:
+            await save_trace(trace)
@@ -0,0 +1,184 @@
+"""
+In-process metrics with Prometheus text exposition (served on /metrics).
+
+Counters, gauges and histograms are keyed by label values. Everything runs
+on the event loop thread, so no locking is needed.
+"""
+
+import bisect
+import math
+
+# Latency buckets in seconds, 0.5 ms to 2.5 s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    body = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return "{" + body + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_order(item):
+    # As text, so label values of mixed types still sort
+    return tuple(str(value) for value in item[0])
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(labels[name] for name in self.labelnames)
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        for key, value in sorted(self._values.items(), key=_label_order):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        series = self._values.get(key)
+        if series is None:
+            # Per-bucket (non-cumulative) counts, sum, count
+            series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            self._values[key] = series
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def _samples(self):
+        for key, (counts, total, count) in sorted(self._values.items(), key=_label_order):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Singleton registry and the backend's metrics
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    "neurolens_stage_seconds",
+    "Time spent per frame/chunk in each handler stage "
+    "(receive = arrival until the handler picks the message up)",
+    ("endpoint", "stage"),
+)
+INFERENCE_SECONDS = metrics.histogram(
+    "neurolens_inference_seconds",
+    "Model inference time per frame",
+    ("model",),
+)
+FRAMES = metrics.counter(
+    "neurolens_frames_total",
+    "Frames analysed on /ws/analyze",
+    ("task",),
+)
+DROPPED_FRAMES = metrics.counter(
+    "neurolens_dropped_frames_total",
+    "Frames dropped before analysis (superseded by a newer frame, or expired in the scheduler)",
+    ("task", "reason"),
+)
+FAILED_DECODES = metrics.counter(
+    "neurolens_failed_decodes_total",
+    "Frames or audio chunks that could not be decoded",
+    ("endpoint", "task"),
+)
+AUDIO_CHUNKS = metrics.counter(
+    "neurolens_audio_chunks_total",
+    "Audio chunks analysed on /ws/audio",
+)
+ACTIVE_SESSIONS = metrics.gauge(
+    "neurolens_active_sessions",
+    "Open WebSocket sessions by current task",
+    ("task",),
+)
+RESULT_CACHE_LOOKUPS = metrics.counter(
+    "neurolens_result_cache_lookups_total",
+    "/api/analyze result cache lookups by outcome (hit or miss)",
+    ("result",),
+)
@@ -0,0 +1,61 @@
+import time
+
+import mediapipe as mp
+
+
+def _solution_class(solution):
+    if solution == "face_mesh":
+        return mp.solutions.face_mesh.FaceMesh
+    if solution == "pose":
+        return mp.solutions.pose.Pose
+    if solution == "hands":
+        return mp.solutions.hands.Hands
+    raise ValueError(f"Unknown MediaPipe solution '{solution}'")
+
+
+class ModelRegistry:
+    """
+    Hands out MediaPipe solution graphs keyed by solution type and settings.
+
+    Asking twice for the same solution with the same settings returns the
+    same graph, so TrackingEngine and its PoseTracker share one Pose graph
+    instead of each building their own. Graphs are not re-entrant: a
+    registry belongs to one engine and must only be used by whoever holds
+    that engine's lease.
+    """
+
+    def __init__(self):
+        self._graphs = {}
+        self.build_times = {}
+
+    @staticmethod
+    def _key(solution, settings):
+        return (solution, tuple(sorted(settings.items())))
+
+    def get(self, solution, **settings):
+        """Returns the shared graph for (solution, settings), building it once."""
+        key = self._key(solution, settings)
+        graph = self._graphs.get(key)
+        if graph is None:
+            solution_class = _solution_class(solution)
+            start = time.perf_counter()
+            graph = solution_class(**settings)
+            self.build_times[key] = time.perf_counter() - start
+            self._graphs[key] = graph
+        return graph
+
+    def is_loaded(self, solution, **settings):
+        return self._key(solution, settings) in self._graphs
+
+    def loaded(self):
+        """[(solution, settings dict, build ms)] for every graph held."""
+        return [
+            (solution, dict(settings), round(self.build_times[(solution, settings)] * 1000, 1))
+            for solution, settings in self._graphs
+        ]
+
+    def close(self):
+        for graph in self._graphs.values():
+            graph.close()
+        self._graphs.clear()
+        self.build_times.clear()
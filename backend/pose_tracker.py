@@ -1,9 +1,69 @@
-import mediapipe as mp
 import cv2
 import numpy as np
-import csv
-from datetime import datetime
-from collections import defaultdict
+import time
+import config
+from model_registry import ModelRegistry
+from session_log import session_log_sink
+from rolling_window import RollingWindow
+from sliding_spectrum import SlidingSpectrum
+
+# Pose graph settings, shared with TrackingEngine through the ModelRegistry
+POSE_SETTINGS = {
+    "min_detection_confidence": 0.5,
+    "min_tracking_confidence": 0.5
+}
+
+# Key landmarks to track: MediaPipe Pose index -> name. Landmark state is
+# kept as (len(LANDMARK_NAMES), 4) arrays of x, y, z, visibility in this order.
+LANDMARK_INDICES = (0, 11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28)
+LANDMARK_NAMES = (
+    "NOSE",
+    "LEFT_SHOULDER",
+    "RIGHT_SHOULDER",
+    "LEFT_ELBOW",
+    "RIGHT_ELBOW",
+    "LEFT_WRIST",
+    "RIGHT_WRIST",
+    "LEFT_HIP",
+    "RIGHT_HIP",
+    "LEFT_KNEE",
+    "RIGHT_KNEE",
+    "LEFT_ANKLE",
+    "RIGHT_ANKLE",
+)
+LANDMARK_ROWS = {name: row for row, name in enumerate(LANDMARK_NAMES)}
+LEFT_SHOULDER, RIGHT_SHOULDER = LANDMARK_ROWS["LEFT_SHOULDER"], LANDMARK_ROWS["RIGHT_SHOULDER"]
+LEFT_WRIST, RIGHT_WRIST = LANDMARK_ROWS["LEFT_WRIST"], LANDMARK_ROWS["RIGHT_WRIST"]
+
+# Frames of history the oscillation variance is measured over
+PATTERN_WINDOW = 10
+
+# Signals analysed for rhythmic motion, and the frequency bands (Hz) in
+# which a periodic signal counts as hand flapping or rocking
+OSCILLATION_SIGNALS = ("LEFT_WRIST", "RIGHT_WRIST", "SHOULDER_CENTER")
+FLAPPING_BAND = (1.0, 6.0)
+ROCKING_BAND = (0.25, 2.0)
+MIN_PERIODICITY = 0.5
+
+# Names the movement log's landmark and pattern codes refer to
+LOG_LANDMARKS = LANDMARK_NAMES + ("HANDS", "BODY")
+LOG_PATTERNS = ("", "hand_flapping", "rocking")
+LOG_LANDMARK_CODES = {name: code for code, name in enumerate(LOG_LANDMARKS)}
+LOG_PATTERN_CODES = {name: code for code, name in enumerate(LOG_PATTERNS)}
+
+
+def landmarks_to_dict(landmarks):
+    """{name: {"x", "y", "z", "visibility"}} for a landmark array (API output)."""
+    return {
+        name: {"x": x, "y": y, "z": z, "visibility": visibility}
+        for name, (x, y, z, visibility) in zip(LANDMARK_NAMES, landmarks.tolist())
+    }
+
+
+def _is_rhythmic(oscillation, band):
+    return (oscillation is not None and oscillation["periodicity"] >= MIN_PERIODICITY
+            and band[0] <= oscillation["frequency_hz"] <= band[1])
+
 
 class PoseTracker:
     """
@@ -11,79 +71,89 @@ class PoseTracker:
     using MediaPipe Pose landmarks
     """
     
-    def __init__(self, movement_threshold=0.02, log_to_csv=False):
-        self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+    def __init__(self, movement_threshold=0.02, log_to_csv=False, model_registry=None,
+                 log_format=config.MOVEMENT_LOG_FORMAT):
+        # Pose graph comes from the owner's registry so it can be shared;
+        # it is built on first use, so the detection stages work without it
+        if model_registry is None:
+            model_registry = ModelRegistry()
+        self.model_registry = model_registry
         
         self.movement_threshold = movement_threshold
-        self.log_to_csv_enabled = log_to_csv
         
-        # Movement tracking
-        self.prev_landmarks = {}
-        self.movement_counters = defaultdict(int)
+        # Movement tracking (one row / counter per landmark)
+        self.prev_landmarks = None
+        self.movement_counts = np.zeros(len(LANDMARK_NAMES), dtype=np.int64)
         
         # Pattern detection
-        self.hand_movement_history = []
-        self.body_sway_history = []
         self.max_history_length = 30  # frames
+        self.hand_movement_history = RollingWindow(self.max_history_length, PATTERN_WINDOW)
+        self.body_sway_history = RollingWindow(self.max_history_length, PATTERN_WINDOW)
+        self.oscillation = SlidingSpectrum(len(OSCILLATION_SIGNALS))
         
-        # CSV logging setup
-        self.csv_file = None
-        if self.log_to_csv_enabled:
-            self.csv_file = f"pose_tracking_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            self.init_csv()
-    
-    def init_csv(self):
-        """Initialize CSV file for logging movements"""
-        try:
-            with open(self.csv_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    'timestamp', 'landmark', 'x', 'y', 'z', 
-                    'movement_detected', 'pattern_type'
-                ])
-        except Exception as e:
-            print(f"CSV init error: {e}")
+        # Movement log ("csv" or "binary"), one file per session, written
+        # in the background by session_log_sink; opened on the first record
+        self.log_format = "csv" if log_to_csv else (log_format or None)
+        self.movement_log = None
     
+    @property
+    def movement_counters(self):
+        """{landmark name: movements so far}, for landmarks that have moved."""
+        return {
+            LANDMARK_NAMES[row]: int(self.movement_counts[row])
+            for row in np.flatnonzero(self.movement_counts)
+        }
+
+    @property
+    def pose(self):
+        return self.model_registry.get("pose", **POSE_SETTINGS)
+
+    def _log(self):
+        if self.movement_log is None:
+            self.movement_log = session_log_sink.open(self.log_format, LOG_LANDMARKS, LOG_PATTERNS)
+        return self.movement_log
+
     def log_movement(self, landmark_name, coords, movement_detected, pattern_type=""):
-        """Log movement to CSV"""
-        if not self.csv_file:
+        """Queue one movement record for the session log (no file I/O here)"""
+        if not self.log_format:
             return
-            
-        try:
-            with open(self.csv_file, 'a', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    datetime.now().isoformat(),
-                    landmark_name,
-                    coords.get('x', 0),
-                    coords.get('y', 0),
-                    coords.get('z', 0),
-                    movement_detected,
-                    pattern_type
-                ])
-        except Exception as e:
-            print(f"CSV logging error: {e}")
+        self._log().pattern(
+            LOG_LANDMARK_CODES[landmark_name], LOG_PATTERN_CODES[pattern_type],
+            coords.get('x', 0), coords.get('y', 0), coords.get('z', 0)
+        )
+
+    def close_log(self):
+        """End the session's movement log; the writer flushes and closes it"""
+        if self.movement_log is not None:
+            self.movement_log.close()
+            self.movement_log = None
     
-    def process_frame(self, image):
+    def process_frame(self, image, timestamp=None):
         """
         Process a frame and detect pose landmarks and repetitive patterns
         
         Args:
             image: OpenCV image (BGR format)
+            timestamp: capture time in seconds (defaults to now)
             
         Returns:
             dict: Contains pose_detected, landmarks, movement_counters, repetitive_patterns
         """
+        if image is None:
+            return None
+
+        # Convert to RGB for MediaPipe
+        return self.process_rgb(cv2.cvtColor(image, cv2.COLOR_BGR2RGB), timestamp)
+
+    def process_rgb(self, image_rgb, timestamp=None):
+        """
+        Same as process_frame for an image that is already RGB, so callers
+        that decoded to RGB once can share the buffer without converting again.
+        """
         try:
-            if image is None:
+            if image_rgb is None:
                 return None
-            
-            # Convert to RGB for MediaPipe
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
             results = self.pose.process(image_rgb)
             
             if not results.pose_landmarks:
@@ -93,156 +163,132 @@ class PoseTracker:
             
             # Extract landmarks
             landmarks = self._extract_landmarks(results.pose_landmarks)
-            
-            # Detect movements
-            movements = self._detect_movements(landmarks)
-            
-            # Detect repetitive patterns
-            patterns = self._detect_patterns(landmarks)
-            
-            return {
-                "pose_detected": True,
-                "landmarks": landmarks,
-                "movement_counters": dict(self.movement_counters),
-                "repetitive_patterns": patterns
-            }
+            return self.process_landmarks(landmarks, timestamp)
             
         except Exception as e:
             print(f"Pose tracking error: {e}")
             return None
-    
-    def _extract_landmarks(self, pose_landmarks):
-        """Extract key landmarks from MediaPipe results"""
-        landmarks = {}
-        
-        # Key landmarks to track
-        landmark_names = {
-            0: "NOSE",
-            11: "LEFT_SHOULDER",
-            12: "RIGHT_SHOULDER",
-            13: "LEFT_ELBOW",
-            14: "RIGHT_ELBOW",
-            15: "LEFT_WRIST",
-            16: "RIGHT_WRIST",
-            23: "LEFT_HIP",
-            24: "RIGHT_HIP",
-            25: "LEFT_KNEE",
-            26: "RIGHT_KNEE",
-            27: "LEFT_ANKLE",
-            28: "RIGHT_ANKLE"
-        }
+
+    def process_landmarks(self, landmarks, timestamp=None):
+        """
+        Movement and pattern detection on an (N, 4) landmark array in
+        LANDMARK_NAMES order, whether extracted here or supplied by a client.
+        """
+        # Detect movements
+        self._detect_movements(landmarks)
         
-        for idx, name in landmark_names.items():
-            lm = pose_landmarks.landmark[idx]
-            landmarks[name] = {
-                "x": lm.x,
-                "y": lm.y,
-                "z": lm.z,
-                "visibility": lm.visibility
-            }
+        # Detect repetitive patterns
+        patterns = self._detect_patterns(landmarks, timestamp)
         
-        return landmarks
+        return {
+            "pose_detected": True,
+            "landmarks": landmarks_to_dict(landmarks),
+            "landmark_array": landmarks,
+            "movement_counters": self.movement_counters,
+            "repetitive_patterns": patterns
+        }
+    
+    def _extract_landmarks(self, pose_landmarks):
+        """Key landmarks from MediaPipe results as an (N, 4) array"""
+        points = pose_landmarks.landmark
+        return np.array([
+            (lm.x, lm.y, lm.z, lm.visibility)
+            for lm in (points[idx] for idx in LANDMARK_INDICES)
+        ])
     
     def _detect_movements(self, landmarks):
-        """Detect significant movements in landmarks"""
-        movements = {}
-        
-        for name, coords in landmarks.items():
-            if name in self.prev_landmarks:
-                prev = self.prev_landmarks[name]
-                
-                # Calculate Euclidean distance
-                distance = np.sqrt(
-                    (coords['x'] - prev['x'])**2 +
-                    (coords['y'] - prev['y'])**2 +
-                    (coords['z'] - prev['z'])**2
-                )
-                
-                if distance > self.movement_threshold:
-                    self.movement_counters[name] += 1
-                    movements[name] = True
-                    self.log_movement(name, coords, True)
-                else:
-                    movements[name] = False
-        
-        # Update previous landmarks
-        self.prev_landmarks = landmarks.copy()
-        
-        return movements
+        """
+        Flags landmarks that moved more than the threshold since the last
+        frame (Euclidean distance in x, y, z, all joints at once).
+        Returns a boolean array, all False on the first frame.
+        """
+        prev = self.prev_landmarks
+        self.prev_landmarks = landmarks
+        if prev is None:
+            return np.zeros(len(landmarks), dtype=bool)
+
+        displacement = landmarks[:, :3] - prev[:, :3]
+        moved = np.einsum("ij,ij->i", displacement, displacement) > self.movement_threshold ** 2
+        self.movement_counts += moved
+
+        if self.log_format and moved.any():
+            # One queue entry per frame; the writer expands it into rows
+            self._log().movements(moved, landmarks)
+
+        return moved
     
-    def _detect_patterns(self, landmarks):
-        """Detect repetitive behavior patterns"""
+    def _oscillation(self, landmarks, timestamp):
+        """
+        Feed wrist heights and the shoulder centre to the streaming spectrum.
+        Returns {signal: {"frequency_hz", "periodicity"}}, empty until the
+        window holds enough samples.
+        """
+        shoulder_center_x = (landmarks[LEFT_SHOULDER, 0] + landmarks[RIGHT_SHOULDER, 0]) / 2
+        self.oscillation.update(
+            time.perf_counter() if timestamp is None else timestamp,
+            (landmarks[LEFT_WRIST, 1], landmarks[RIGHT_WRIST, 1], shoulder_center_x),
+        )
+        dominant = self.oscillation.dominant()
+        if dominant is None:
+            return {}
+        return {
+            name: {"frequency_hz": frequency, "periodicity": round(periodicity, 3)}
+            for name, frequency, periodicity in zip(OSCILLATION_SIGNALS, *(d.tolist() for d in dominant))
+        }
+
+    def _detect_patterns(self, landmarks, timestamp=None):
+        """
+        Detect repetitive behavior patterns. Flapping and rocking need both
+        enough movement (variance over the last frames) and a rhythmic signal
+        in the pattern's frequency band, so one large movement is not flagged.
+        """
+        oscillation = self._oscillation(landmarks, timestamp)
         patterns = {
             "hand_flapping": False,
             "rocking": False,
             "arm_swaying": False,
-            "total_movements": sum(self.movement_counters.values())
+            "total_movements": int(self.movement_counts.sum()),
+            "oscillation": oscillation
         }
         
-        # Hand flapping detection
-        if "LEFT_WRIST" in landmarks and "RIGHT_WRIST" in landmarks:
-            left_wrist_y = landmarks["LEFT_WRIST"]["y"]
-            right_wrist_y = landmarks["RIGHT_WRIST"]["y"]
-            
-            # Track hand vertical movement
-            current_hand_height = (left_wrist_y + right_wrist_y) / 2
-            self.hand_movement_history.append(current_hand_height)
-            
-            if len(self.hand_movement_history) > self.max_history_length:
-                self.hand_movement_history.pop(0)
-            
-            # Detect oscillation (hand flapping)
-            if len(self.hand_movement_history) >= 10:
-                recent_movements = self.hand_movement_history[-10:]
-                movement_variance = np.var(recent_movements)
-                
-                # High variance indicates flapping
-                if movement_variance > 0.01:
-                    patterns["hand_flapping"] = True
-                    self.log_movement("HANDS", {"x": 0, "y": current_hand_height, "z": 0}, 
-                                    True, "hand_flapping")
+        # Hand flapping detection: track hand vertical movement
+        current_hand_height = (landmarks[LEFT_WRIST, 1] + landmarks[RIGHT_WRIST, 1]) / 2
+        self.hand_movement_history.append(current_hand_height)
+        
+        # Detect oscillation (hand flapping): high variance, rhythmic wrists
+        if (self.hand_movement_history.window_full and self.hand_movement_history.variance > 0.01
+                and (_is_rhythmic(oscillation.get("LEFT_WRIST"), FLAPPING_BAND)
+                     or _is_rhythmic(oscillation.get("RIGHT_WRIST"), FLAPPING_BAND))):
+            patterns["hand_flapping"] = True
+            self.log_movement("HANDS", {"x": 0, "y": float(current_hand_height), "z": 0},
+                            True, "hand_flapping")
         
         # Rocking detection (body sway)
-        if "LEFT_SHOULDER" in landmarks and "RIGHT_SHOULDER" in landmarks:
-            shoulder_center_x = (landmarks["LEFT_SHOULDER"]["x"] + 
-                                landmarks["RIGHT_SHOULDER"]["x"]) / 2
-            
-            self.body_sway_history.append(shoulder_center_x)
-            
-            if len(self.body_sway_history) > self.max_history_length:
-                self.body_sway_history.pop(0)
-            
-            # Detect side-to-side rocking
-            if len(self.body_sway_history) >= 10:
-                recent_sway = self.body_sway_history[-10:]
-                sway_variance = np.var(recent_sway)
-                
-                # High variance indicates rocking
-                if sway_variance > 0.005:
-                    patterns["rocking"] = True
-                    self.log_movement("BODY", {"x": shoulder_center_x, "y": 0, "z": 0},
-                                    True, "rocking")
+        shoulder_center_x = (landmarks[LEFT_SHOULDER, 0] + landmarks[RIGHT_SHOULDER, 0]) / 2
+        self.body_sway_history.append(shoulder_center_x)
         
-        # Arm swaying detection
-        if ("LEFT_WRIST" in self.movement_counters and 
-            "RIGHT_WRIST" in self.movement_counters):
-            
-            total_arm_movements = (self.movement_counters["LEFT_WRIST"] + 
-                                  self.movement_counters["RIGHT_WRIST"])
-            
-            if total_arm_movements > 20:  # Threshold for repetitive arm movement
-                patterns["arm_swaying"] = True
+        # Detect side-to-side rocking: high variance, rhythmic sway
+        if (self.body_sway_history.window_full and self.body_sway_history.variance > 0.005
+                and _is_rhythmic(oscillation.get("SHOULDER_CENTER"), ROCKING_BAND)):
+            patterns["rocking"] = True
+            self.log_movement("BODY", {"x": float(shoulder_center_x), "y": 0, "z": 0},
+                            True, "rocking")
+        
+        # Arm swaying detection: both wrists moving, many times in total
+        left_moves = self.movement_counts[LEFT_WRIST]
+        right_moves = self.movement_counts[RIGHT_WRIST]
+        if left_moves and right_moves and left_moves + right_moves > 20:
+            patterns["arm_swaying"] = True
         
         return patterns
     
     def reset_counters(self):
         """Reset all movement counters for a new session"""
-        self.movement_counters.clear()
+        self.movement_counts[:] = 0
         self.hand_movement_history.clear()
         self.body_sway_history.clear()
-        self.prev_landmarks.clear()
+        self.oscillation.clear()
+        self.prev_landmarks = None
         
-        # Create new CSV file only if enabled
-        if self.log_to_csv_enabled:
-            self.csv_file = f"pose_tracking_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            self.init_csv()
+        # The next session logs to a new file
+        self.close_log()
@@ -0,0 +1,127 @@
+"""
+Re-score recorded sessions without re-running MediaPipe.
+
+Feeds every frame of a session recording (see session_recording.py)
+through the same session-metric logic as the live /ws/analyze handler,
+with the decision thresholds given on the command line, and scores each
+task from its own state with the logic engine, as the live "report"
+command does. Repetitive-behaviour frames re-run the pose tracker's
+movement and pattern detection on the recorded landmarks.
+
+    python replay.py recordings/*.nlrec
+    python replay.py recordings/*.nlrec --gaze-band 0.4,0.6 --yaw-threshold 0.08
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from frame_protocol import TASK_IDS
+from pose_tracker import PoseTracker
+from session_metrics import DEFAULT_THRESHOLDS, SessionMetrics
+from session_recording import (ANALYZED, FACE_DETECTED, HANDS_DETECTED, POSE_DETECTED,
+                               open_recording)
+
+
+def replay_records(records, thresholds=DEFAULT_THRESHOLDS, movement_threshold=0.02):
+    """SessionMetrics for a record array, as the live handler would have built them."""
+    session = SessionMetrics(thresholds)
+    tracker = PoseTracker(movement_threshold=movement_threshold, log_format="")
+
+    # Column lists: per-row access to a memmap is far slower than to lists
+    timestamps = records["timestamp"].tolist()
+    tasks = records["task"].tolist()
+    flags = records["flags"].tolist()
+    gaze = records["gaze_x"].tolist()
+    yaw = records["head_yaw"].tolist()
+    body_x = records["body_x"].tolist()
+    hand_count = records["hand_count"].tolist()
+    pose = records["pose"]
+
+    for i in range(len(records)):
+        frame_flags = flags[i]
+        if not frame_flags & ANALYZED:
+            # Failed decodes never reach the session metrics
+            continue
+
+        task = TASK_IDS.get(tasks[i], "eye_contact")
+        analysis = {}
+        if task in ("eye_contact", "name_response"):
+            analysis["face_detected"] = bool(frame_flags & FACE_DETECTED)
+            analysis["gaze_x"] = gaze[i]
+            analysis["head_yaw"] = yaw[i]
+        elif task == "gestures":
+            analysis["hands_detected"] = bool(frame_flags & HANDS_DETECTED)
+            analysis["hand_count"] = hand_count[i]
+        elif task == "repetitive":
+            analysis["pose_detected"] = bool(frame_flags & POSE_DETECTED)
+            if analysis["pose_detected"]:
+                tracked = tracker.process_landmarks(pose[i].astype(np.float64), timestamps[i])
+                analysis["body_x"] = body_x[i]
+                analysis["movement_counters"] = tracked["movement_counters"]
+                analysis["repetitive_patterns"] = tracked["repetitive_patterns"]
+
+        session.update(task, analysis, {})
+    return session
+
+
+def replay_file(path, thresholds=DEFAULT_THRESHOLDS, movement_threshold=0.02):
+    """Per-task metrics and results for one recording."""
+    header, records = open_recording(path)
+    session = replay_records(records, thresholds, movement_threshold)
+    timestamps = records["timestamp"]
+    return {
+        "session_id": header["session_id"],
+        "frames": len(records),
+        "duration_sec": float(timestamps[-1] - timestamps[0]) if len(records) else 0.0,
+        "tasks": {
+            task: {"metrics": state.task_metrics(), "analysis": session.report(task)}
+            for task, state in session.states.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score recorded sessions")
+    parser.add_argument("recordings", nargs="+")
+    parser.add_argument("--gaze-band", default=None,
+                        help="social,geometric gaze_x thresholds (default %s,%s)" % (
+                            DEFAULT_THRESHOLDS["gaze_social"], DEFAULT_THRESHOLDS["gaze_geometric"]))
+    parser.add_argument("--yaw-threshold", type=float, default=DEFAULT_THRESHOLDS["head_turn_yaw"])
+    parser.add_argument("--movement-threshold", type=float, default=0.02)
+    parser.add_argument("--json", help="write the full results to this file")
+    args = parser.parse_args()
+
+    thresholds = dict(DEFAULT_THRESHOLDS, head_turn_yaw=args.yaw_threshold)
+    if args.gaze_band:
+        social, geometric = (float(value) for value in args.gaze_band.split(","))
+        thresholds.update(gaze_social=social, gaze_geometric=geometric)
+
+    start = time.perf_counter()
+    results = {}
+    frames = 0
+    for path in args.recordings:
+        try:
+            results[path] = replay_file(path, thresholds, args.movement_threshold)
+        except (OSError, ValueError) as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            continue
+        frames += results[path]["frames"]
+        for task, result in results[path]["tasks"].items():
+            analysis = result["analysis"]
+            print(f"{path} {task}: {result['metrics']['totalFrames']} frames, "
+                  f"score {analysis.get('screeningScore')}, {json.dumps(analysis.get('scores', {}))}")
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {frames} frames from {len(results)} sessions in {elapsed:.2f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"thresholds": thresholds, "sessions": results}, f, indent=2, default=str)
+    return 0 if results else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Per-session encoding of /ws/analyze replies, negotiated on the socket URL:
+
+    fields=a,b,...          send only these reply fields
+    landmarks=dict          pose landmarks as {name: {x, y, z, visibility}} (default)
+    landmarks=array         as [[x, y, z, visibility], ...] in LANDMARK_NAMES order,
+                            rounded to LANDMARK_DECIMALS
+    landmarks=none          no landmarks
+    delta=1                 omit fields unchanged since the last reply sent and
+                            send null for fields no longer present; clients
+                            merge each reply into the previous state
+    every=N                 reply to one analysed frame in N
+
+"status", "seq" and "captured_at" are always sent, and errors are never
+thinned out. Without parameters replies are the full legacy payload.
+Replies are serialized with orjson when it is installed, otherwise with
+compact stdlib JSON.
+"""
+
+import json
+
+import numpy as np
+
+from pose_tracker import LANDMARK_NAMES
+
+try:
+    import orjson
+except ImportError:  # optional, only faster
+    orjson = None
+
+LANDMARK_MODES = ("dict", "array", "none")
+LANDMARK_DECIMALS = 4
+
+# Reply fields sent whatever was negotiated
+ALWAYS_SENT = ("status", "seq", "captured_at")
+
+_TRUE = ("1", "true", "yes", "on")
+
+
+def dumps(payload):
+    """JSON text for a reply."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(payload, separators=(",", ":"))
+
+
+class ResponseEncoder:
+    """Applies one session's negotiated reply format. Stateful in delta mode."""
+
+    def __init__(self, fields=None, landmarks="dict", delta=False, every=1):
+        if landmarks not in LANDMARK_MODES:
+            raise ValueError(f"Unknown landmarks format '{landmarks}', expected one of {LANDMARK_MODES}")
+        if every < 1:
+            raise ValueError("every must be at least 1")
+        self.fields = None if fields is None else frozenset(fields).union(ALWAYS_SENT)
+        self.landmarks = landmarks
+        self.delta = delta
+        self.every = every
+
+        self._frames = 0
+        self._sent = {}
+
+    @classmethod
+    def from_query(cls, query_params):
+        """Encoder for a socket's query parameters; raises ValueError if malformed."""
+        fields = query_params.get("fields")
+        if fields is not None:
+            fields = [field.strip() for field in fields.split(",") if field.strip()]
+        try:
+            every = int(query_params.get("every", 1))
+        except ValueError:
+            raise ValueError("every must be an integer") from None
+        return cls(
+            fields=fields,
+            landmarks=query_params.get("landmarks", "dict").lower(),
+            delta=query_params.get("delta", "").lower() in _TRUE,
+            every=every,
+        )
+
+    @property
+    def is_default(self):
+        return self.fields is None and self.landmarks == "dict" and not self.delta and self.every == 1
+
+    def encode(self, response, analysis=None):
+        """
+        JSON text of one frame's reply, or None when this frame gets no reply
+        (every=N). `analysis` supplies the landmark array for landmarks=array.
+        """
+        self._frames += 1
+        if (self._frames - 1) % self.every:
+            return None
+        if self.is_default:
+            return dumps(response)
+
+        reply = {}
+        for key, value in response.items():
+            if self.fields is not None and key not in self.fields:
+                continue
+            if key == "landmarks":
+                if self.landmarks == "none":
+                    continue
+                if self.landmarks == "array":
+                    value = self._landmark_rows(value, analysis)
+            if self.delta and key not in ALWAYS_SENT:
+                if key in self._sent and self._sent[key] == value:
+                    continue
+                self._sent[key] = value
+            reply[key] = value
+        if self.delta:
+            # Fields the client still holds but this reply no longer has
+            for key in [key for key in self._sent if key not in response]:
+                del self._sent[key]
+                reply[key] = None
+        return dumps(reply)
+
+    @staticmethod
+    def _landmark_rows(landmarks, analysis):
+        array = None if analysis is None else analysis.get("pose_landmarks")
+        if array is None:
+            array = np.array([
+                [landmarks[name][key] for key in ("x", "y", "z", "visibility")]
+                for name in LANDMARK_NAMES
+            ])
+        return np.round(array, LANDMARK_DECIMALS).tolist()
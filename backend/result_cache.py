@@ -0,0 +1,86 @@
+"""
+Cache of /api/analyze results. Results pages re-post the same metrics on
+every render or reload, so identical payloads are scored and serialized
+once: the cache holds the encoded response body.
+
+Entries are keyed by a hash of the payload's canonical JSON (sorted keys,
+compact separators; orjson when installed) and live until RESULT_CACHE_TTL_SECONDS after they
+were stored or until evicted as least recently used. A lookup under a new
+scoring-rules version (logic_engine.rules_version, which changes with the
+thresholds) empties the cache first.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import config
+
+try:
+    import orjson
+except ImportError:  # optional, only faster
+    orjson = None
+
+
+def payload_key(payload):
+    """Hash of the payload's canonical JSON."""
+    if orjson is not None:
+        canonical = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+    else:
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.blake2b(canonical, digest_size=16).hexdigest()
+
+
+class ResultCache:
+    """Bounded LRU cache with a TTL, counting hits and misses."""
+
+    def __init__(self, max_entries=config.RESULT_CACHE_SIZE, ttl=config.RESULT_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()     # key -> (expires_at, result)
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        """The body cached under `key` by rules `version`, or None."""
+        with self._lock:
+            if version != self._version:
+                # Scoring rules changed: nothing cached is valid any more
+                self._entries.clear()
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, result):
+        with self._lock:
+            if self.max_entries <= 0 or version != self._version:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {"entries": len(self._entries), "max_entries": self.max_entries,
+                "hits": self.hits, "misses": self.misses}
+
+
+# Singleton instance
+result_cache = ResultCache()
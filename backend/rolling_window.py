@@ -0,0 +1,69 @@
+import numpy as np
+
+
+class RollingWindow:
+    """
+    Fixed-size ring buffer of the last `capacity` samples, with the mean and
+    (population) variance of the newest `window` samples kept up to date in
+    O(1) per append (sliding Welford update) instead of recomputing them.
+    """
+
+    def __init__(self, capacity, window=None):
+        self.capacity = capacity
+        self.window = capacity if window is None else window
+        if not 0 < self.window <= capacity:
+            raise ValueError("window must be between 1 and capacity")
+
+        self._buffer = np.zeros(capacity)
+        self._head = 0          # index the next sample is written to
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, value):
+        value = float(value)
+        in_window = min(self._count, self.window)
+        if in_window == self.window:
+            # Replace the sample leaving the window
+            old = self._buffer[(self._head - self.window) % self.capacity]
+            delta = value - old
+            old_mean = self._mean
+            self._mean += delta / self.window
+            self._m2 += delta * (value - self._mean + old - old_mean)
+        else:
+            delta = value - self._mean
+            self._mean += delta / (in_window + 1)
+            self._m2 += delta * (value - self._mean)
+
+        self._buffer[self._head] = value
+        self._head = (self._head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    @property
+    def window_full(self):
+        return self._count >= self.window
+
+    @property
+    def mean(self):
+        """Mean of the newest `window` samples (or of all, before the window fills)."""
+        return self._mean
+
+    @property
+    def variance(self):
+        n = min(self._count, self.window)
+        return max(self._m2 / n, 0.0) if n else 0.0
+
+    def values(self):
+        """Buffered samples, oldest first (a copy)."""
+        if self._count < self.capacity:
+            return self._buffer[:self._count].copy()
+        return np.roll(self._buffer, -self._head)
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
@@ -0,0 +1,95 @@
+import numpy as np
+
+
+class ScoreTimeline:
+    """
+    One task's counters over time, in fixed-length windows: for each closed
+    window a row of the task's cumulative counters at its end, plus its
+    start time. Rows live in one float64 array grown by doubling, so a
+    frame costs a comparison and a window close one row write.
+
+    Per-window sub-scores are derived on demand from the differences of
+    consecutive rows (see TaskState.window_scores).
+    """
+
+    def __init__(self, columns, window_seconds):
+        self.columns = columns
+        self.window_seconds = window_seconds
+
+        self._starts = np.zeros(16)
+        self._rows = np.zeros((16, columns))
+        self._count = 0
+        self._origin = None         # counters before the first frame
+        self._first_time = None
+        self._window_start = None
+        self._resumed = False
+
+    def __len__(self):
+        """Number of windows, including the open one."""
+        return self._count + (self._window_start is not None)
+
+    def record(self, timestamp, counters):
+        """
+        Call before a frame at `timestamp` is counted; `counters` is a
+        callable giving the task's cumulative counters so far. Closes the
+        open window when the frame falls outside it.
+        """
+        start = self._window_start
+        if start is None:
+            self._origin = counters()
+            self._first_time = timestamp
+            self._window_start = timestamp
+        elif self._resumed:
+            # First frame on a new connection, whose clock may differ: the
+            # offsets continue one window after the checkpointed ones
+            offset = start - self._first_time
+            self._close(counters())
+            self._first_time = timestamp - offset - self.window_seconds
+            self._window_start = timestamp
+            self._resumed = False
+        elif not start <= timestamp < start + self.window_seconds:
+            # Past the window, or the clock went back
+            self._close(counters())
+            self._window_start = timestamp
+
+    def _close(self, row):
+        if self._count == len(self._starts):
+            self._starts = np.concatenate([self._starts, np.zeros(self._count)])
+            self._rows = np.concatenate([self._rows, np.zeros((self._count, self.columns))])
+        self._starts[self._count] = self._window_start - self._first_time
+        self._rows[self._count] = row
+        self._count += 1
+
+    def windows(self, current):
+        """
+        (start offsets in seconds, per-window counter deltas), the open
+        window ending at the `current` counters.
+        """
+        if self._window_start is None:
+            return np.zeros(0), np.zeros((0, self.columns))
+        starts = np.append(self._starts[:self._count], self._window_start - self._first_time)
+        cumulative = np.vstack([self._origin, self._rows[:self._count], current])
+        return starts, np.diff(cumulative, axis=0)
+
+    def snapshot(self):
+        return {
+            "origin": None if self._origin is None else list(self._origin),
+            "first_time": self._first_time,
+            "window_start": self._window_start,
+            "starts": self._starts[:self._count].tolist(),
+            "rows": self._rows[:self._count].tolist(),
+        }
+
+    @classmethod
+    def restore(cls, columns, window_seconds, values):
+        timeline = cls(columns, window_seconds)
+        timeline._origin = values["origin"]
+        timeline._first_time = values["first_time"]
+        timeline._window_start = values["window_start"]
+        timeline._resumed = timeline._window_start is not None
+        count = len(values["starts"])
+        if count:
+            timeline._starts = np.array(values["starts"], dtype=np.float64)
+            timeline._rows = np.array(values["rows"], dtype=np.float64).reshape(count, columns)
+            timeline._count = count
+        return timeline
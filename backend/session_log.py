@@ -0,0 +1,223 @@
+"""
+Asynchronous per-session movement logs.
+
+The inference path only appends one entry per frame to an in-memory queue
+(MovementLog.movements / .pattern); a single background thread expands the
+entries into records and writes them in batches. Each session gets its own
+file, opened by the writer thread on its first batch, in one of two formats:
+
+    csv     timestamp (ISO 8601), landmark, x, y, z, movement_detected, pattern_type
+    binary  header + fixed-width little-endian records (RECORD_DTYPE), about
+            a quarter of the CSV size; read back with read_binary_log()
+
+Binary header: BINARY_MAGIC, a uint32 length and a JSON object with the
+record dtype and the landmark / pattern names the integer codes refer to.
+"""
+
+import atexit
+import csv
+import json
+import os
+import struct
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+import config
+
+FORMATS = ("csv", "binary")
+
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),           # Unix time, seconds
+    ("landmark", "u1"),             # index into the header's landmarks
+    ("x", "<f4"),
+    ("y", "<f4"),
+    ("z", "<f4"),
+    ("movement_detected", "u1"),
+    ("pattern", "u1"),              # index into the header's patterns ("" = none)
+])
+
+BINARY_MAGIC = b"NLML"
+_HEADER_LENGTH = struct.Struct("<I")
+
+
+class MovementLog:
+    """One session's log. Appends are cheap and safe from any thread."""
+
+    def __init__(self, sink, path, log_format, landmarks, patterns):
+        self.sink = sink
+        self.path = path
+        self.format = log_format
+        self.landmarks = tuple(landmarks)
+        self.patterns = tuple(patterns)
+        self.records_written = 0
+        self.dropped = 0
+        self.closed = False
+
+        self._entries = deque()
+        self._file = None
+
+    def movements(self, moved, landmarks, timestamp=None):
+        """Log the landmarks flagged in the boolean array `moved` (rows of `landmarks`)."""
+        self._append((timestamp or time.time(), moved, landmarks))
+
+    def pattern(self, landmark, pattern, x=0.0, y=0.0, z=0.0, timestamp=None):
+        """Log one detected pattern; landmark and pattern are indices into the names."""
+        self._append((timestamp or time.time(), landmark, (x, y, z), pattern))
+
+    def _append(self, entry):
+        if len(self._entries) >= self.sink.max_pending:
+            # The writer cannot keep up; never let the queue grow without bound
+            self.dropped += 1
+            return
+        self._entries.append(entry)
+
+    def close(self):
+        """Flush the remaining entries and close the file (in the background)."""
+        self.closed = True
+        self.sink.wakeup()
+
+    def _records(self):
+        """Drain queued entries into a record array (writer thread only)."""
+        chunks = []
+        for _ in range(len(self._entries)):
+            entry = self._entries.popleft()
+            if len(entry) == 3:
+                timestamp, moved, landmarks = entry
+                rows = np.flatnonzero(moved)
+                chunk = np.zeros(len(rows), RECORD_DTYPE)
+                chunk["landmark"] = rows
+                chunk["x"], chunk["y"], chunk["z"] = landmarks[rows, :3].T
+                chunk["movement_detected"] = 1
+            else:
+                timestamp, landmark, (x, y, z), pattern = entry
+                chunk = np.zeros(1, RECORD_DTYPE)
+                chunk[0] = (0.0, landmark, x, y, z, 1, pattern)
+            chunk["timestamp"] = timestamp
+            chunks.append(chunk)
+        return np.concatenate(chunks) if chunks else np.zeros(0, RECORD_DTYPE)
+
+    def _write(self, records):
+        if self._file is None:
+            self._open()
+        if self.format == "binary":
+            records.tofile(self._file)
+        else:
+            writer = csv.writer(self._file)
+            landmarks, patterns = self.landmarks, self.patterns
+            writer.writerows(
+                (datetime.fromtimestamp(timestamp).isoformat(), landmarks[landmark],
+                 f"{x:.7g}", f"{y:.7g}", f"{z:.7g}", bool(detected), patterns[pattern])
+                for timestamp, landmark, x, y, z, detected, pattern in records.tolist()
+            )
+        self._file.flush()
+        self.records_written += len(records)
+
+    def _open(self):
+        if self.format == "binary":
+            self._file = open(self.path, "wb")
+            header = json.dumps({
+                "dtype": RECORD_DTYPE.descr,
+                "landmarks": self.landmarks,
+                "patterns": self.patterns,
+            }).encode()
+            self._file.write(BINARY_MAGIC + _HEADER_LENGTH.pack(len(header)) + header)
+        else:
+            self._file = open(self.path, "w", newline="")
+            csv.writer(self._file).writerow([
+                "timestamp", "landmark", "x", "y", "z", "movement_detected", "pattern_type"
+            ])
+
+    def _finish(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SessionLogSink:
+    """
+    Owns the background writer thread shared by every MovementLog in the
+    process. Batches are written every `flush_interval` seconds, or sooner
+    when a log is closed.
+    """
+
+    def __init__(self, directory=config.SESSION_LOG_DIR, flush_interval=1.0, max_pending=100_000):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._logs = []
+        self._lock = threading.Lock()           # guards _logs, held briefly
+        self._write_lock = threading.Lock()     # one flush at a time
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def open(self, log_format, landmarks, patterns, name="movements"):
+        """Start a new session log. The file itself is created by the writer."""
+        if log_format not in FORMATS:
+            raise ValueError(f"Unknown log format '{log_format}', expected one of {FORMATS}")
+
+        extension = "bin" if log_format == "binary" else "csv"
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.directory, f"{name}_{stamp}_{uuid.uuid4().hex[:8]}.{extension}")
+        log = MovementLog(self, path, log_format, landmarks, patterns)
+
+        with self._lock:
+            self._logs.append(log)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="session-log", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+        return log
+
+    def wakeup(self):
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Write every queued entry now (also runs at interpreter exit)."""
+        with self._lock:
+            logs = list(self._logs)
+        if not logs:
+            return
+
+        with self._write_lock:
+            os.makedirs(self.directory, exist_ok=True)
+            for log in logs:
+                # Read before draining so a concurrent close() loses nothing
+                closed = log.closed
+                try:
+                    records = log._records()
+                    if len(records):
+                        log._write(records)
+                except OSError as e:
+                    print(f"Session log error ({log.path}): {e}")
+                if closed:
+                    log._finish()
+                    with self._lock:
+                        if log in self._logs:
+                            self._logs.remove(log)
+
+
+def read_binary_log(path):
+    """(header dict, record array) of a binary session log."""
+    with open(path, "rb") as f:
+        if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError(f"'{path}' is not a binary session log")
+        (length,) = _HEADER_LENGTH.unpack(f.read(_HEADER_LENGTH.size))
+        header = json.loads(f.read(length))
+        dtype = np.dtype([tuple(field) for field in header["dtype"]])
+        return header, np.fromfile(f, dtype=dtype)
+
+
+# Singleton instance
+session_log_sink = SessionLogSink()
@@ -0,0 +1,510 @@
+"""
+Per-session metric accumulation for /ws/analyze, offline video analysis
+and replay.
+
+Each task has a slotted state class with its own update(); TASK_STATES
+maps task names to them. A SessionMetrics only creates the state of the
+tasks its frames actually carry, so the per-frame path is one lookup and
+one call whatever the number of tasks. as_dict() renders the legacy
+camelCase metrics the logic engine and reports consume.
+
+Live sessions also pass frame timestamps: each task then keeps a
+ScoreTimeline of its counters in SCORE_WINDOW_SECONDS windows, and
+report() / timeline() give the end-of-task result and per-window
+sub-scores straight from the session, without resubmitting counters.
+"""
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+import config
+from logic_engine import logic_engine
+from score_timeline import ScoreTimeline
+
+# Decision thresholds, overridable per call (e.g. by replay.py when tuning)
+DEFAULT_THRESHOLDS = {
+    "gaze_social": 0.45,        # gaze_x below this looks at the social side
+    "gaze_geometric": 0.55,     # gaze_x above this looks at the geometric side
+    "head_turn_yaw": 0.05,      # yaw change counted as a head turn
+}
+
+
+def _ratio(numerator, denominator, scale=1.0):
+    """Elementwise numerator / denominator * scale, 0 where the denominator is 0."""
+    out = np.zeros_like(denominator)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out * scale
+
+
+def create_session_metrics():
+    """Empty legacy metrics dict (all tasks), as as_dict() fills it in."""
+    return {
+        "totalFrames": 0,
+        "framesFaceDetected": 0,
+        "framesSocialSide": 0,
+        "framesGeometricSide": 0,
+        "sideSwitchCount": 0,
+        "lastSide": "none",
+        "initialYaw": None,
+        "maxYawChange": 0.0,
+        "handsDetectedFrames": 0,
+        "bodyMovementSum": 0.0,
+        "lastBodyX": None,
+        # Enhanced pose tracking metrics
+        "landmarkMovements": {},
+        "repetitivePatterns": {
+            "hand_flapping": False,
+            "rocking": False,
+            "arm_swaying": False
+        },
+        "totalRepetitiveMovements": 0,
+        "headTurnFrames": 0,
+        "responseFrames": 0,
+        # Vocalization (/ws/audio)
+        "totalChunks": 0,
+        "speechChunks": 0,
+        "silenceChunks": 0,
+        "totalRMS": 0.0,
+        "maxRMS": 0.0
+    }
+
+
+class TaskState(ABC):
+    """
+    One task's state within a session. `frames` counts the task's frames;
+    COUNTERS names the cumulative counters its timeline windows record.
+    Subclasses must implement update() and write_metrics().
+    """
+
+    __slots__ = ("frames",)
+
+    COUNTERS = ()
+
+    def __init_subclass__(cls, **kwargs):
+        # Fail on import, not on a session's first frame of the task
+        super().__init_subclass__(**kwargs)
+        missing = sorted(name for name in TaskState.__abstractmethods__
+                         if getattr(getattr(cls, name), "__isabstractmethod__", False))
+        if missing:
+            raise TypeError(f"{cls.__name__} must implement {', '.join(missing)}")
+
+    def __init__(self):
+        self.frames = 0
+
+    @abstractmethod
+    def update(self, session, analysis, response):
+        """Accumulate one frame's analysis and add live feedback to `response`."""
+
+    def command(self, name):
+        """Apply a session control command (most tasks ignore them)."""
+
+    @abstractmethod
+    def write_metrics(self, metrics):
+        """Fill in this task's fields of the legacy metrics dict."""
+
+    def task_metrics(self):
+        """This task's legacy metrics, totalFrames counting its own frames."""
+        metrics = {"totalFrames": self.frames}
+        self.write_metrics(metrics)
+        return metrics
+
+    def counters(self):
+        """(frames, *COUNTERS) so far."""
+        return (self.frames,) + tuple(getattr(self, name) for name in self.COUNTERS)
+
+    @staticmethod
+    def window_scores(deltas):
+        """{name: per-window sub-scores} from timeline counter deltas."""
+        return {}
+
+    @classmethod
+    def _slots(cls):
+        return [slot for klass in reversed(cls.__mro__) for slot in getattr(klass, "__slots__", ())]
+
+    def snapshot(self):
+        """JSON-serializable copy of the state (see SessionMetrics.restore)."""
+        return {slot: getattr(self, slot) for slot in self._slots()}
+
+    @classmethod
+    def restore(cls, values):
+        state = cls()
+        for slot in cls._slots():
+            if slot in values:
+                setattr(state, slot, values[slot])
+        return state
+
+
+class EyeContactState(TaskState):
+    __slots__ = ("face_frames", "social_frames", "geometric_frames", "side_switches", "last_side")
+
+    COUNTERS = ("face_frames", "social_frames", "geometric_frames", "side_switches")
+
+    def __init__(self):
+        super().__init__()
+        self.face_frames = 0
+        self.social_frames = 0
+        self.geometric_frames = 0
+        self.side_switches = 0
+        self.last_side = "none"
+
+    def update(self, session, analysis, response):
+        response["face_detected"] = analysis["face_detected"]
+        if not analysis["face_detected"]:
+            return
+        self.face_frames += 1
+
+        # Side Logic (Using Gaze instead of Face Position)
+        # Gaze X: 0.0 (Left/Social) <-> 1.0 (Right/Geometric), with a center zone
+        gaze = analysis.get("gaze_x", 0.5)
+        thresholds = session.thresholds
+        current_side = "center"
+        if gaze < thresholds["gaze_social"]:
+            self.social_frames += 1
+            current_side = "social"
+        elif gaze > thresholds["gaze_geometric"]:
+            self.geometric_frames += 1
+            current_side = "geometric"
+
+        # A switch is a move from one side to the other; the center does not count
+        if current_side != "center":
+            if self.last_side != "none" and current_side != self.last_side:
+                self.side_switches += 1
+            self.last_side = current_side
+
+        response["current_side"] = current_side
+        response["gaze_x"] = gaze
+
+    def write_metrics(self, metrics):
+        metrics["framesFaceDetected"] = self.face_frames
+        metrics["framesSocialSide"] = self.social_frames
+        metrics["framesGeometricSide"] = self.geometric_frames
+        metrics["sideSwitchCount"] = self.side_switches
+        metrics["lastSide"] = self.last_side
+
+    @staticmethod
+    def window_scores(deltas):
+        frames, face, social, geometric, switches = deltas.T
+        return {
+            "engagementScore": _ratio(face, frames),
+            "socialPreference": _ratio(social, face),
+            "geometricPreference": _ratio(geometric, face),
+            "attentionShifts": switches,
+        }
+
+
+class NameResponseState(TaskState):
+    __slots__ = ("initial_yaw", "max_yaw_change", "turn_frames", "reset_frames", "reset_turns")
+
+    COUNTERS = ("turn_frames",)
+
+    def __init__(self):
+        super().__init__()
+        self.initial_yaw = None
+        self.max_yaw_change = 0.0
+        self.turn_frames = 0
+        # Counts at the last reset_yaw: only turns after the name was called
+        # are a response. turn_frames itself stays cumulative for the timeline
+        self.reset_frames = 0
+        self.reset_turns = 0
+
+    def update(self, session, analysis, response):
+        response["face_detected"] = analysis["face_detected"]
+        if not analysis["face_detected"]:
+            return
+        yaw = analysis["head_yaw"]
+        if self.initial_yaw is None:
+            self.initial_yaw = yaw
+
+        # Calculate change from initial
+        change = abs(yaw - self.initial_yaw)
+        if change > self.max_yaw_change:
+            self.max_yaw_change = change
+
+        turned = change > session.thresholds["head_turn_yaw"]
+        if turned:
+            self.turn_frames += 1
+        response["head_turn_detected"] = turned
+        response["yaw_change"] = change
+
+    def command(self, name):
+        if name == "reset_yaw":
+            self.initial_yaw = None
+            self.max_yaw_change = 0.0
+            self.reset_frames = self.frames
+            self.reset_turns = self.turn_frames
+
+    def write_metrics(self, metrics):
+        metrics["initialYaw"] = self.initial_yaw
+        metrics["maxYawChange"] = self.max_yaw_change
+        metrics["headTurnFrames"] = self.turn_frames - self.reset_turns
+        metrics["responseFrames"] = self.frames - self.reset_frames
+
+    @staticmethod
+    def window_scores(deltas):
+        frames, turns = deltas.T
+        return {"headTurnRate": _ratio(turns, frames)}
+
+
+class GesturesState(TaskState):
+    __slots__ = ("hands_frames",)
+
+    COUNTERS = ("hands_frames",)
+
+    def __init__(self):
+        super().__init__()
+        self.hands_frames = 0
+
+    def update(self, session, analysis, response):
+        response["hands_detected"] = analysis["hands_detected"]
+        if analysis["hands_detected"]:
+            self.hands_frames += 1
+
+    def write_metrics(self, metrics):
+        metrics["handsDetectedFrames"] = self.hands_frames
+
+    @staticmethod
+    def window_scores(deltas):
+        frames, hands = deltas.T
+        return {"handsRate": _ratio(hands, frames)}
+
+
+class RepetitiveState(TaskState):
+    __slots__ = ("movement_sum", "last_body_x", "landmark_movements", "patterns", "total_movements",
+                 "counter_base", "total_base")
+
+    COUNTERS = ("movement_sum", "total_movements")
+
+    def __init__(self):
+        super().__init__()
+        self.movement_sum = 0.0
+        self.last_body_x = None
+        self.landmark_movements = {}
+        self.patterns = None
+        self.total_movements = 0
+        # Counts carried over from before a resume; the new connection's
+        # pose tracker counts from zero
+        self.counter_base = None
+        self.total_base = 0
+
+    @classmethod
+    def restore(cls, values):
+        state = super().restore(values)
+        state.counter_base = dict(state.landmark_movements)
+        state.total_base = state.total_movements
+        # Movement across the gap was not seen
+        state.last_body_x = None
+        return state
+
+    def update(self, session, analysis, response):
+        response["pose_detected"] = analysis["pose_detected"]
+        if not analysis["pose_detected"]:
+            return
+        body_x = analysis["body_x"]
+        if self.last_body_x is not None:
+            self.movement_sum += abs(body_x - self.last_body_x)
+        self.last_body_x = body_x
+
+        # Movement per frame * 1000 for readability, so the score does not
+        # just increase forever
+        avg_movement = self.movement_sum / session.total_frames * 1000
+
+        # Enhanced pose tracking data
+        if "landmarks" in analysis:
+            response["landmarks"] = analysis["landmarks"]
+
+        if "movement_counters" in analysis:
+            counters = analysis["movement_counters"]
+            if self.counter_base:
+                counters = {
+                    name: counters.get(name, 0) + self.counter_base.get(name, 0)
+                    for name in self.counter_base.keys() | counters.keys()
+                }
+            self.landmark_movements = counters
+            response["movement_counters"] = counters
+
+        if "repetitive_patterns" in analysis:
+            patterns = analysis["repetitive_patterns"]
+            self.patterns = patterns
+            self.total_movements = self.total_base + patterns.get("total_movements", 0)
+
+            response["repetitive_patterns"] = patterns
+            response["hand_flapping_detected"] = analysis.get("hand_flapping_detected", False)
+            response["rocking_detected"] = analysis.get("rocking_detected", False)
+            response["arm_swaying_detected"] = analysis.get("arm_swaying_detected", False)
+
+        response["movement_score"] = avg_movement
+        response["total_movements"] = self.total_movements
+
+    def write_metrics(self, metrics):
+        metrics["bodyMovementSum"] = self.movement_sum
+        metrics["lastBodyX"] = self.last_body_x
+        metrics["landmarkMovements"] = self.landmark_movements
+        if self.patterns is not None:
+            metrics["repetitivePatterns"] = {
+                pattern: self.patterns.get(pattern, False)
+                for pattern in ("hand_flapping", "rocking", "arm_swaying")
+            }
+        metrics["totalRepetitiveMovements"] = self.total_movements
+
+    @staticmethod
+    def window_scores(deltas):
+        frames, movement, movements = deltas.T
+        return {
+            # Movement per frame * 1000, as in the live feedback
+            "movementScore": _ratio(movement, frames, 1000),
+            "repetitiveMovements": movements,
+        }
+
+
+class VocalizationState(TaskState):
+    """/ws/audio chunks; `frames` counts the analysed chunks."""
+
+    __slots__ = ("speech_chunks", "silence_chunks", "total_rms", "max_rms")
+
+    COUNTERS = ("speech_chunks", "silence_chunks", "total_rms")
+
+    def __init__(self):
+        super().__init__()
+        self.speech_chunks = 0
+        self.silence_chunks = 0
+        self.total_rms = 0.0
+        self.max_rms = 0.0
+
+    def update(self, session, analysis, response):
+        rms = analysis["rms"]
+        self.total_rms += rms
+        if rms > self.max_rms:
+            self.max_rms = rms
+        if analysis["is_speech"]:
+            self.speech_chunks += 1
+        elif analysis["is_silence"]:
+            self.silence_chunks += 1
+
+        response["rms"] = rms
+        response["is_speech"] = analysis["is_speech"]
+        response["volume_level"] = analysis["volume_level"]
+        response["vocal_percentage"] = self.speech_chunks / self.frames * 100
+        response["speech_chunks"] = self.speech_chunks
+        response["total_chunks"] = self.frames
+
+    def write_metrics(self, metrics):
+        metrics["totalChunks"] = self.frames
+        metrics["speechChunks"] = self.speech_chunks
+        metrics["silenceChunks"] = self.silence_chunks
+        metrics["totalRMS"] = self.total_rms
+        metrics["maxRMS"] = self.max_rms
+
+    @staticmethod
+    def window_scores(deltas):
+        chunks, speech, silence, rms = deltas.T
+        return {
+            "vocalPercentage": _ratio(speech, chunks, 100),
+            "meanRms": _ratio(rms, chunks),
+        }
+
+
+# Task name -> state class. A new task only needs a TaskState subclass here.
+TASK_STATES = {
+    "eye_contact": EyeContactState,
+    "name_response": NameResponseState,
+    "gestures": GesturesState,
+    "repetitive": RepetitiveState,
+    "vocalization": VocalizationState,
+}
+
+
+class SessionMetrics:
+    """
+    One session's metrics: a frame count plus the state of each task seen
+    so far (created on the task's first frame), and each task's score
+    timeline when frames come with timestamps.
+    """
+
+    __slots__ = ("thresholds", "total_frames", "states", "timelines", "window_seconds")
+
+    def __init__(self, thresholds=DEFAULT_THRESHOLDS, window_seconds=config.SCORE_WINDOW_SECONDS):
+        self.thresholds = thresholds
+        self.total_frames = 0
+        self.states = {}
+        self.timelines = {}
+        self.window_seconds = window_seconds
+
+    def update(self, task, analysis, response, timestamp=None):
+        """Accumulate one frame's TrackingEngine analysis for `task`."""
+        self.total_frames += 1
+        state = self.states.get(task)
+        if state is None:
+            state_class = TASK_STATES.get(task)
+            if state_class is None:
+                return
+            state = self.states[task] = state_class()
+        if timestamp is not None:
+            timeline = self.timelines.get(task)
+            if timeline is None:
+                timeline = self.timelines[task] = ScoreTimeline(
+                    len(state.COUNTERS) + 1, self.window_seconds
+                )
+            timeline.record(timestamp, state.counters)
+        state.frames += 1
+        state.update(self, analysis, response)
+
+    def command(self, name):
+        for state in self.states.values():
+            state.command(name)
+
+    def report(self, task):
+        """The task's end-of-task result (see logic_engine.analyze_task), or None."""
+        state = self.states.get(task)
+        if state is None:
+            return None
+        return logic_engine.analyze_task(task, state.task_metrics())
+
+    def timeline(self, task):
+        """
+        The task's per-window sub-scores: window start offsets in seconds,
+        frames per window and {score: per-window values}, or None.
+        """
+        timeline = self.timelines.get(task)
+        if timeline is None:
+            return None
+        state = self.states[task]
+        starts, deltas = timeline.windows(state.counters())
+        scores = state.window_scores(deltas)
+        return {
+            "window_seconds": self.window_seconds,
+            "starts": np.round(starts, 3).tolist(),
+            "frames": deltas[:, 0].astype(int).tolist(),
+            "scores": {name: np.round(values, 4).tolist() for name, values in scores.items()},
+        }
+
+    def snapshot(self):
+        """JSON-serializable checkpoint of the session (see session_store.py)."""
+        return {
+            "total_frames": self.total_frames,
+            "states": {task: state.snapshot() for task, state in self.states.items()},
+            "timelines": {task: timeline.snapshot() for task, timeline in self.timelines.items()},
+        }
+
+    @classmethod
+    def restore(cls, snapshot, thresholds=DEFAULT_THRESHOLDS,
+                window_seconds=config.SCORE_WINDOW_SECONDS):
+        """Session metrics continuing from a snapshot()."""
+        session = cls(thresholds, window_seconds)
+        session.total_frames = snapshot["total_frames"]
+        for task, values in snapshot["states"].items():
+            if task in TASK_STATES:
+                session.states[task] = TASK_STATES[task].restore(values)
+        for task, values in snapshot.get("timelines", {}).items():
+            if task in session.states:
+                columns = len(TASK_STATES[task].COUNTERS) + 1
+                session.timelines[task] = ScoreTimeline.restore(columns, window_seconds, values)
+        return session
+
+    def as_dict(self):
+        """Legacy metrics dict (see create_session_metrics)."""
+        metrics = create_session_metrics()
+        metrics["totalFrames"] = self.total_frames
+        for state in self.states.values():
+            state.write_metrics(metrics)
+        return metrics
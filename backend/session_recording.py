@@ -0,0 +1,184 @@
+"""
+Compact per-session recordings of TrackingEngine output.
+
+One fixed-width record per analysed frame (RECORD_DTYPE, ~280 bytes) holds
+the values the session metrics are computed from plus the raw face key
+points and pose landmarks, so sessions can be re-scored (replay.py)
+without running MediaPipe again.
+
+File layout: RECORDING_MAGIC, a uint32 header length, a JSON header (record
+dtype, session id, point names) padded with spaces to a multiple of 64
+bytes, then the records. open_recording() memory-maps the records.
+
+Files are created and written by one background thread shared by all
+recorders, so the WebSocket handlers never block on disk I/O.
+"""
+
+import json
+import os
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import config
+from frame_protocol import TASK_IDS
+from pose_tracker import LANDMARK_NAMES
+from landmark_analysis import FACE_POINTS
+
+RECORDING_MAGIC = b"NLRC"
+RECORDING_VERSION = 1
+_HEADER_LENGTH = struct.Struct("<I")
+_ALIGNMENT = 64
+
+TASK_CODES = {task: code for code, task in TASK_IDS.items()}
+
+# One thread for every recorder: a recorder's blocks are written in order
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-recording")
+
+# Record flags
+ANALYZED = 1            # process_frame returned a result (else failed decode)
+FACE_DETECTED = 2
+HANDS_DETECTED = 4
+POSE_DETECTED = 8
+
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),                               # capture time, seconds
+    ("task", "u1"),                                     # frame_protocol.TASK_IDS
+    ("flags", "u1"),
+    ("hand_count", "u1"),
+    ("gaze_x", "<f4"),
+    ("head_yaw", "<f4"),
+    ("face_x", "<f4"),
+    ("face_y", "<f4"),
+    ("body_x", "<f4"),
+    ("face_points", "<f4", (len(FACE_POINTS), 2)),      # x, y of FACE_POINTS
+    ("pose", "<f4", (len(LANDMARK_NAMES), 4)),          # x, y, z, visibility
+])
+
+
+class SessionRecorder:
+    """
+    Appends records for one session. Records are staged in a small array
+    and handed to the writer thread a block at a time; close() hands over
+    the remainder.
+    """
+
+    def __init__(self, path, session_id="", block_size=256):
+        self.path = path
+        self.frames = 0
+        self._block = np.zeros(block_size, RECORD_DTYPE)
+        self._pending = 0
+        self._file = None
+        self._closed = False
+        self._done = None
+
+        header = json.dumps({
+            "version": RECORDING_VERSION,
+            "session_id": session_id,
+            "started_at": time.time(),
+            "dtype": RECORD_DTYPE.descr,
+            "tasks": TASK_IDS,
+            "face_points": FACE_POINTS,
+            "pose_landmarks": LANDMARK_NAMES,
+        }).encode()
+        prefix = len(RECORDING_MAGIC) + _HEADER_LENGTH.size
+        header += b" " * (-(prefix + len(header)) % _ALIGNMENT)
+        _writer.submit(self._open, RECORDING_MAGIC + _HEADER_LENGTH.pack(len(header)) + header)
+
+    @classmethod
+    def for_session(cls, session_id, directory=config.RECORDING_DIR):
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        return cls(os.path.join(directory, f"session_{stamp}_{session_id}.nlrec"), session_id)
+
+    def append(self, task, timestamp, analysis):
+        """
+        Record one frame's analysis (None for a frame that failed to
+        decode). Raises ValueError for a task without a TASK_IDS code.
+        """
+        code = TASK_CODES.get(task)
+        if code is None:
+            raise ValueError(f"Unknown task '{task}'")
+        record = self._block[self._pending]
+        record["timestamp"] = timestamp
+        record["task"] = code
+
+        flags = 0
+        if analysis:
+            flags = ANALYZED
+            if analysis.get("face_detected"):
+                flags |= FACE_DETECTED
+                record["gaze_x"] = analysis.get("gaze_x", 0.5)
+                record["head_yaw"] = analysis["head_yaw"]
+                record["face_x"] = analysis["face_x"]
+                record["face_y"] = analysis["face_y"]
+                record["face_points"] = analysis["face_points"]
+            if analysis.get("hands_detected"):
+                flags |= HANDS_DETECTED
+                record["hand_count"] = analysis.get("hand_count", 0)
+            if analysis.get("pose_detected"):
+                flags |= POSE_DETECTED
+                record["body_x"] = analysis["body_x"]
+                record["pose"] = analysis["pose_landmarks"]
+        record["flags"] = flags
+
+        self._pending += 1
+        self.frames += 1
+        if self._pending == len(self._block):
+            self._hand_over()
+
+    def _hand_over(self):
+        """Pass the staged records to the writer and stage into a fresh block."""
+        block = self._block[:self._pending]
+        self._block = np.zeros(len(self._block), RECORD_DTYPE)
+        self._pending = 0
+        return _writer.submit(self._write, block)
+
+    def _open(self, header):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "wb")
+            self._file.write(header)
+        except OSError as e:
+            print(f"Could not create session recording {self.path}: {e}")
+
+    def _write(self, block):
+        if self._file is not None:
+            block.tofile(self._file)
+
+    def _finish(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        """
+        Write the remaining records and close the file in the background.
+        Returns a Future that resolves once the file is complete.
+        """
+        if not self._closed:
+            self._closed = True
+            self._hand_over()
+            self._done = _writer.submit(self._finish)
+        return self._done
+
+
+def open_recording(path):
+    """(header dict, read-only memory-mapped record array) of a recording."""
+    with open(path, "rb") as f:
+        if f.read(len(RECORDING_MAGIC)) != RECORDING_MAGIC:
+            raise ValueError(f"'{path}' is not a session recording")
+        (length,) = _HEADER_LENGTH.unpack(f.read(_HEADER_LENGTH.size))
+        header = json.loads(f.read(length))
+
+    if header["version"] != RECORDING_VERSION:
+        raise ValueError(f"Unsupported recording version {header['version']}")
+    dtype = np.dtype([
+        (name, kind, tuple(shape[0])) if shape else (name, kind)
+        for name, kind, *shape in header["dtype"]
+    ])
+    offset = len(RECORDING_MAGIC) + _HEADER_LENGTH.size + length
+    if os.path.getsize(path) == offset:
+        return header, np.zeros(0, dtype)
+    return header, np.memmap(path, dtype=dtype, mode="r", offset=offset)
@@ -0,0 +1,141 @@
+"""
+Checkpoints of live session state, so a client whose connection drops can
+resume a screening instead of starting over.
+
+/ws/analyze and /ws/audio give every session an ID, sent as the first
+message on the socket:
+
+    {"status": "session", "session_id": "...", "resumed": false}
+
+Reconnecting with ?session=<id> restores the session's last checkpoint
+("resumed": true); an unknown or expired ID starts a new session with a
+new ID. Checkpoints are taken every SESSION_CHECKPOINT_SECONDS and when
+the socket closes, and expire SESSION_TTL_SECONDS after their last update.
+Each resume starts a new generation of the session; checkpoints from an
+older connection that is still closing are ignored, so they cannot
+overwrite the resumed connection's.
+Only the accumulated metrics are restored: tracking state such as gaze
+smoothing and pose histories starts afresh on the new connection.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+import config
+
+
+class SessionStore:
+    """
+    SQLite-backed checkpoint store, safe to use from any thread. The
+    database can be shared by several API processes on one host.
+    """
+
+    def __init__(self, path=config.SESSION_STORE_PATH, ttl=config.SESSION_TTL_SECONDS,
+                 evict_every=100):
+        self.path = path
+        self.ttl = ttl
+        self.evict_every = evict_every
+
+        self._db = None
+        self._saves = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " session_id TEXT NOT NULL,"
+                " endpoint TEXT NOT NULL,"
+                " state TEXT NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " generation INTEGER NOT NULL DEFAULT 0,"
+                " PRIMARY KEY (session_id, endpoint))"
+            )
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(sessions)")]
+            if "generation" not in columns:
+                # Store created before connection generations
+                self._db.execute("ALTER TABLE sessions ADD COLUMN generation INTEGER NOT NULL DEFAULT 0")
+            self._db.commit()
+        return self._db
+
+    def save(self, session_id, endpoint, state, generation=0):
+        """
+        Checkpoint a session's state (a JSON-serializable dict) for the
+        connection of `generation` (see resume). Returns False, saving
+        nothing, if a newer connection has resumed the session.
+        """
+        data = json.dumps(state)
+        with self._lock:
+            db = self._connect()
+            saved = db.execute(
+                "INSERT INTO sessions VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (session_id, endpoint) DO UPDATE SET"
+                " state = excluded.state, updated_at = excluded.updated_at,"
+                " generation = excluded.generation"
+                " WHERE excluded.generation >= sessions.generation",
+                (session_id, endpoint, data, time.time(), generation),
+            ).rowcount > 0
+            self._saves += 1
+            if self._saves % self.evict_every == 0:
+                self._evict(db)
+            db.commit()
+        return saved
+
+    def load(self, session_id, endpoint):
+        """The session's last checkpoint, or None if unknown or expired."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT state FROM sessions WHERE session_id = ? AND endpoint = ? AND updated_at >= ?",
+                (session_id, endpoint, time.time() - self.ttl),
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def resume(self, session_id, endpoint):
+        """
+        (last checkpoint, generation) for a new connection taking over the
+        session, or (None, 0) if unknown or expired. Saves from connections
+        of earlier generations are ignored from now on.
+        """
+        with self._lock:
+            db = self._connect()
+            db.execute(
+                "UPDATE sessions SET generation = generation + 1"
+                " WHERE session_id = ? AND endpoint = ? AND updated_at >= ?",
+                (session_id, endpoint, time.time() - self.ttl),
+            )
+            row = db.execute(
+                "SELECT state, generation FROM sessions WHERE session_id = ? AND endpoint = ? AND updated_at >= ?",
+                (session_id, endpoint, time.time() - self.ttl),
+            ).fetchone()
+            db.commit()
+        return (None, 0) if row is None else (json.loads(row[0]), row[1])
+
+    def delete(self, session_id, endpoint):
+        with self._lock:
+            db = self._connect()
+            db.execute("DELETE FROM sessions WHERE session_id = ? AND endpoint = ?",
+                       (session_id, endpoint))
+            db.commit()
+
+    def evict_expired(self):
+        with self._lock:
+            db = self._connect()
+            self._evict(db)
+            db.commit()
+
+    def _evict(self, db):
+        db.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.ttl,))
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+# Singleton instance
+session_store = SessionStore()
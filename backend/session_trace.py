@@ -0,0 +1,181 @@
+"""
+Opt-in profiling traces for a single WebSocket session.
+
+A traced session records a span for every stage a frame or audio chunk
+goes through and writes them, when the socket closes, as a Chrome trace
+event file (`<endpoint>-<time>-<session>.trace.json`, viewable in Perfetto or
+chrome://tracing). Profiled sessions additionally sample the Python stacks
+of the threads working for the session and write them in folded-stack
+format (`.folded`, for flamegraph.pl or speedscope): the event loop while
+the session's handler is running on it, and the inference thread analysing
+its frames (executor mode "thread"; in the "process" and "shm" modes
+inference runs in other processes and is not sampled).
+
+Sessions without a trace never create a SessionTrace; the handlers only
+check `trace is not None` around timestamps they take anyway for metrics.
+
+Timestamps are time.perf_counter() seconds. Engine stages measured in a
+worker process (executor mode "process") share the same monotonic clock.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+import config
+
+TRACE_COMMANDS = {"start_trace": False, "start_profile": True}
+
+# Track (tid) each kind of span is drawn on
+HANDLER_TRACK = 1
+INFERENCE_TRACK = 2
+
+
+def trace_mode(websocket):
+    """
+    The tracing mode requested on the socket URL: None, "trace" or
+    "profile" (?trace=1 / ?trace=profile).
+    """
+    value = websocket.query_params.get("trace", "").lower()
+    if value in ("profile", "cpu"):
+        return "profile"
+    if value in ("1", "true", "yes", "on"):
+        return "trace"
+    return None
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples, at a fixed interval, the Python stacks of one session's work:
+    the event loop thread while the session's handler task is the one
+    running, and the thread an engine leased by the session is analysing a
+    frame on (see inference_executor._timed_process_frame).
+    Create it from the handler task.
+    """
+
+    def __init__(self, interval_ms=config.TRACE_SAMPLE_INTERVAL_MS):
+        super().__init__(name="trace-sampler", daemon=True)
+        self.interval = interval_ms / 1000
+        self.stacks = Counter()
+        self.samples = 0
+        self.engine = None
+        self._stop_event = threading.Event()
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+        self._task = asyncio.current_task() if self._loop is not None else None
+        self._loop_thread = threading.get_ident()
+
+    def _session_threads(self):
+        threads = []
+        if self._task is not None and asyncio.current_task(self._loop) is self._task:
+            threads.append(self._loop_thread)
+        engine_thread = getattr(self.engine, "active_thread", None)
+        if engine_thread is not None:
+            threads.append(engine_thread)
+        return threads
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            threads = self._session_threads()
+            frames = sys._current_frames() if threads else {}
+            names = {thread.ident: thread.name for thread in threading.enumerate()} if threads else {}
+            for thread_id in threads:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class SessionTrace:
+    """Spans recorded for one traced session."""
+
+    def __init__(self, session_id, endpoint, profile=False):
+        self.session_id = session_id
+        self.endpoint = endpoint
+        self.started = time.time()
+        self.events = [
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": HANDLER_TRACK,
+             "args": {"name": f"/ws/{endpoint} handler"}},
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": INFERENCE_TRACK,
+             "args": {"name": "inference"}},
+        ]
+        self.sampler = None
+        if profile:
+            self.sampler = StackSampler()
+            self.sampler.start()
+
+    def attach_engine(self, engine):
+        """Sample the inference thread of the engine leased by the session."""
+        if self.sampler is not None:
+            self.sampler.engine = engine
+
+    def span(self, name, start, end, track=HANDLER_TRACK, **args):
+        event = {
+            "name": name, "ph": "X", "pid": 1, "tid": track,
+            "ts": start * 1e6, "dur": (end - start) * 1e6,
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def instant(self, name, at, **args):
+        self.events.append({
+            "name": name, "ph": "i", "s": "t", "pid": 1, "tid": HANDLER_TRACK,
+            "ts": at * 1e6, "args": args,
+        })
+
+    def frame(self, message, submitted_at, analysis, done_at):
+        """Spans for one analysed frame, from arrival to the analysis result."""
+        args = {"task": message["task"]}
+        if "seq" in message:
+            args["seq"] = message["seq"]
+
+        self.span("receive", message["received_at"], submitted_at, **args)
+        self.span("inference", submitted_at, done_at, **args)
+        if not analysis:
+            self.instant("failed_decode", done_at, **args)
+            return
+
+        # Engine stages run back to back from started_at in decode, model order
+        start = analysis["started_at"]
+        self.span("queue", submitted_at, start, track=INFERENCE_TRACK, **args)
+        for stage, seconds in analysis["timings"].items():
+            self.span(stage, start, start + seconds, track=INFERENCE_TRACK, **args)
+            start += seconds
+
+    def save(self, directory=config.TRACE_DIR):
+        """Write the trace (and CPU profile); returns the trace file's path."""
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        base = os.path.join(directory, f"{self.endpoint}-{stamp}-{self.session_id}")
+
+        other = {"session_id": self.session_id, "endpoint": self.endpoint,
+                 "started_at": self.started}
+        if self.sampler is not None:
+            self.sampler.stop()
+            other["cpu_samples"] = self.sampler.samples
+            with open(base + ".folded", "w") as f:
+                f.write(self.sampler.folded())
+
+        with open(base + ".trace.json", "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms",
+                       "otherData": other}, f)
+        return base + ".trace.json"
@@ -0,0 +1,124 @@
+import bisect
+
+import numpy as np
+
+# Frequencies (Hz) analysed by default: rocking is slow, flapping fast
+DEFAULT_FREQUENCIES = np.arange(0.25, 6.01, 0.25)
+
+
+class SlidingSpectrum:
+    """
+    Streaming DFT of a few signals over their last `capacity` samples.
+
+    Each bin keeps the running sum of x(t) * exp(-2j*pi*f*t) over the window,
+    using the samples' real timestamps, so irregular frame timing does not
+    shift the frequencies. A new sample adds its term and the sample leaving
+    the window subtracts its stored term: O(signals * bins) per update,
+    independent of the window length. The sums are rebuilt from the buffer
+    once per `capacity` updates to stop rounding errors accumulating.
+    """
+
+    def __init__(self, signals, capacity=128, frequencies=DEFAULT_FREQUENCIES,
+                 min_samples=16, min_cycles=2.0):
+        self.signals = signals
+        self.capacity = capacity
+        self.frequencies = np.sort(np.asarray(frequencies, dtype=float))
+        self.min_samples = min_samples
+        # A single step looks like about one cycle of the lowest frequencies;
+        # only frequencies completing min_cycles in the window are considered
+        self.min_cycles = min_cycles
+
+        self._angular = -2j * np.pi * self.frequencies
+        self._frequency_list = self.frequencies.tolist()
+        self._times = np.zeros(capacity)
+        # Each stored sample is (signal values..., 1); the constant row's
+        # transform is the window's sum of phasors, used to remove the mean
+        self._samples = np.zeros((capacity, signals + 1))
+        self._phasors = np.zeros((capacity, len(self.frequencies)), dtype=complex)
+        self.clear()
+
+    def clear(self):
+        self._origin = None
+        self._head = 0
+        self._count = 0
+        self._updates = 0
+        self._sums = np.zeros((self.signals + 1, len(self.frequencies)), dtype=complex)
+        self._value_sums = np.zeros(self.signals + 1)
+        self._square_sums = np.zeros(self.signals + 1)
+
+    def __len__(self):
+        return self._count
+
+    def update(self, timestamp, values):
+        """Add one sample per signal taken at `timestamp` (seconds)."""
+        if self._origin is None:
+            self._origin = timestamp
+        t = timestamp - self._origin
+        if self._count and t < self._times[self._head - 1]:
+            # Clock went backwards (new stream); start over
+            self.clear()
+            self._origin = timestamp
+            t = 0.0
+
+        sample = np.append(values, 1.0)
+        phasor = np.exp(self._angular * t)
+
+        if self._count == self.capacity:
+            old_sample = self._samples[self._head]
+            self._sums -= old_sample[:, None] * self._phasors[self._head]
+            self._value_sums -= old_sample
+            self._square_sums -= old_sample * old_sample
+        else:
+            self._count += 1
+
+        self._sums += sample[:, None] * phasor
+        self._value_sums += sample
+        self._square_sums += sample * sample
+
+        self._times[self._head] = t
+        self._samples[self._head] = sample
+        self._phasors[self._head] = phasor
+        self._head = (self._head + 1) % self.capacity
+
+        self._updates += 1
+        if self._updates % self.capacity == 0:
+            self._resync()
+
+    def _resync(self):
+        samples = self._samples[:self._count]
+        self._sums = samples.T @ self._phasors[:self._count]
+        self._value_sums = samples.sum(axis=0)
+        self._square_sums = (samples * samples).sum(axis=0)
+
+    def dominant(self):
+        """
+        (frequency Hz, periodicity) arrays with one entry per signal, or None
+        before min_samples samples. Periodicity is the share of the window's
+        variance explained by the strongest frequency: about 1 for a clean
+        oscillation, near 0 for noise or one-off movements. Frequencies above
+        the window's effective Nyquist rate are ignored.
+        """
+        n = self._count
+        if n < self.min_samples:
+            return None
+
+        newest = self._times[self._head - 1]
+        oldest = self._times[self._head % self.capacity] if n == self.capacity else self._times[0]
+        span = newest - oldest
+        if span <= 0:
+            return None
+        # Frequencies are sorted, so the usable ones are a contiguous range
+        low = bisect.bisect_left(self._frequency_list, self.min_cycles / span)
+        high = bisect.bisect_right(self._frequency_list, (n - 1) / span / 2)
+        if low >= high:
+            return None
+
+        mean = self._value_sums[:-1] / n
+        variance = self._square_sums[:-1] / n - mean * mean
+        # Transform of the mean-removed signal
+        centered = self._sums[:-1, low:high] - mean[:, None] * self._sums[-1, low:high]
+        power = centered.real ** 2 + centered.imag ** 2
+
+        best = power.argmax(axis=1)
+        periodicity = 2 * power.max(axis=1) / (n * n * np.maximum(variance, 1e-12))
+        return self.frequencies[low:high][best], np.minimum(periodicity, 1.0)
@@ -32,5 +32,20 @@ def test_audio_analyzer():
     else:
         print("FAIL: Speech/Noise not detected")
 
+def test_binary_samples_match_base64():
+    print("Testing AudioAnalyzer binary path...")
+
+    noise = np.random.randint(-5000, 5000, 16000, dtype=np.int16)
+    noise_b64 = base64.b64encode(noise.tobytes()).decode('utf-8')
+
+    from_b64 = audio_analyzer.analyze_audio_chunk(noise_b64)
+    from_samples = audio_analyzer.analyze_samples(noise, sample_rate=16000)
+
+    assert abs(from_b64['rms'] - from_samples['rms']) < 1e-3 * from_b64['rms']
+    assert from_b64['is_speech'] == from_samples['is_speech']
+    assert from_samples['duration_sec'] == 1.0
+    print("PASS: Binary samples analyzed like base64 chunks")
+
 if __name__ == "__main__":
     test_audio_analyzer()
+    test_binary_samples_match_base64()
@@ -0,0 +1,71 @@
+import asyncio
+from engine_pool import EnginePool
+
+
+class FakeEngine:
+    def __init__(self):
+        self.resets = 0
+        self.alive = True
+        self.closed = False
+
+    def shutdown(self):
+        self.closed = True
+
+    def reset_session(self):
+        self.resets += 1
+
+
+def test_engine_reused_and_reset():
+    async def run():
+        pool = EnginePool(FakeEngine, size=1, lease_timeout=1)
+        async with pool.lease() as first:
+            pass
+        async with pool.lease() as second:
+            pass
+        return pool, first, second
+
+    pool, first, second = asyncio.run(run())
+    assert first is second
+    assert first.resets == 2
+    assert pool.created == 1
+    assert pool.stats()["idle"] == 1
+
+
+def test_lease_times_out_when_exhausted():
+    async def run():
+        pool = EnginePool(FakeEngine, size=1, lease_timeout=0.05)
+        engine = await pool.acquire()
+        try:
+            await pool.acquire()
+        except asyncio.TimeoutError:
+            timed_out = True
+        else:
+            timed_out = False
+        await pool.release(engine)
+        return timed_out
+
+    assert asyncio.run(run())
+
+
+def test_dead_idle_engines_are_not_leased():
+    async def run():
+        pool = EnginePool(FakeEngine, size=2, lease_timeout=1)
+        first, second = await pool.acquire(), await pool.acquire()
+        await pool.release(first)
+        await pool.release(second)
+        # The worker hosting `second` exits while it is idle
+        second.alive = False
+        leased = [await pool.acquire(), await pool.acquire()]
+        return pool, first, second, leased
+
+    pool, first, second, leased = asyncio.run(run())
+    assert second not in leased and first in leased
+    assert second.closed
+    assert pool.created == 2
+
+
+if __name__ == "__main__":
+    test_engine_reused_and_reset()
+    test_lease_times_out_when_exhausted()
+    test_dead_idle_engines_are_not_leased()
+    print("PASS: EnginePool")
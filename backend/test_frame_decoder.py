@@ -0,0 +1,55 @@
+import cv2
+import numpy as np
+from frame_decoder import FrameDecoder, jpeg_dimensions
+
+
+def make_jpeg(width, height):
+    image = np.zeros((height, width, 3), np.uint8)
+    image[:, :, 0] = 255  # pure blue in BGR
+    ok, jpeg = cv2.imencode(".jpg", image)
+    assert ok
+    return jpeg.tobytes()
+
+
+def test_jpeg_dimensions():
+    assert jpeg_dimensions(make_jpeg(640, 480)) == (640, 480)
+    assert jpeg_dimensions(b"not a jpeg") is None
+
+
+def test_decode_to_task_width_in_rgb():
+    decoder = FrameDecoder({"repetitive": 320, "eye_contact": 0})
+    jpeg = make_jpeg(1280, 720)
+
+    small = decoder.decode(jpeg, "repetitive")
+    assert small.shape == (180, 320, 3)
+    # BGR blue becomes RGB blue
+    assert small[90, 160, 2] > 200 and small[90, 160, 0] < 50
+
+    full = decoder.decode(jpeg, "eye_contact")
+    assert full.shape == (720, 1280, 3)
+
+
+def test_buffers_are_reused_between_frames():
+    decoder = FrameDecoder({"gestures": 300})
+    first = decoder.decode(make_jpeg(640, 480), "gestures")
+    second = decoder.decode(make_jpeg(640, 480), "gestures")
+    assert first.shape == (225, 300, 3)
+    assert first is second
+
+
+def test_large_video_frames_are_area_averaged():
+    # One-pixel stripes: a 3x bilinear shrink samples them (all 0 or 255),
+    # area averaging blends them (85 or 170)
+    frame = np.zeros((1080, 1920, 3), np.uint8)
+    frame[:, ::2] = 255
+    image = FrameDecoder({"gestures": 640}).prepare(frame, "gestures")
+    assert image.shape == (360, 640, 3)
+    assert 80 <= image.min() and image.max() <= 175
+
+
+if __name__ == "__main__":
+    test_jpeg_dimensions()
+    test_decode_to_task_width_in_rgb()
+    test_buffers_are_reused_between_frames()
+    test_large_video_frames_are_area_averaged()
+    print("PASS: FrameDecoder")
@@ -0,0 +1,82 @@
+import asyncio
+import json
+from fastapi import WebSocketDisconnect
+from frame_ingest import FrameIngest
+
+
+class ScriptedWebSocket:
+    """Delivers a fixed list of text messages, then disconnects (or idles)."""
+
+    def __init__(self, texts, disconnect=True):
+        self.messages = [{"type": "websocket.receive", "text": text} for text in texts]
+        if disconnect:
+            self.messages.append({"type": "websocket.disconnect", "code": 1000})
+
+    async def receive(self):
+        await asyncio.sleep(0)
+        if not self.messages:
+            await asyncio.Event().wait()
+        return self.messages.pop(0)
+
+
+def frame(n):
+    return json.dumps({"task": "name_response", "image": f"frame-{n}"})
+
+
+def test_dropped_frames_are_counted():
+    async def run():
+        websocket = ScriptedWebSocket([
+            frame(1),
+            frame(2),
+            json.dumps({"task": "name_response", "command": "reset_yaw"}),
+            frame(3),
+            frame(4),
+        ])
+        ingest = FrameIngest(websocket)
+        reader = asyncio.create_task(ingest.run())
+        # Let the reader drain everything before the handler catches up
+        for _ in range(20):
+            await asyncio.sleep(0)
+
+        handled = []
+        try:
+            while True:
+                message = await ingest.next()
+                handled.append(message["command"] or message["image"])
+        except WebSocketDisconnect:
+            pass
+        reader.cancel()
+        return ingest, handled
+
+    ingest, handled = asyncio.run(run())
+    # After a disconnect only the queued commands are still handled
+    assert handled == ["reset_yaw"]
+    assert ingest.received == 5
+    assert ingest.dropped == 3
+
+
+def test_control_is_delivered_in_arrival_order():
+    async def run():
+        websocket = ScriptedWebSocket([
+            frame(1),
+            json.dumps({"task": "name_response", "command": "reset_yaw"}),
+            frame(2),
+        ], disconnect=False)
+        ingest = FrameIngest(websocket)
+        reader = asyncio.create_task(ingest.run())
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+        handled = [await ingest.next(), await ingest.next()]
+        reader.cancel()
+        return ingest, [m["command"] or m["image"] for m in handled]
+
+    ingest, handled = asyncio.run(run())
+    assert handled == ["reset_yaw", "frame-2"]
+    assert ingest.dropped == 1
+
+
+if __name__ == "__main__":
+    test_dropped_frames_are_counted()
+    test_control_is_delivered_in_arrival_order()
+    print("PASS: FrameIngest")
@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+from frame_protocol import (HEADER_SIZE, pack_audio_chunk, pack_binary_frame,
+                            parse_audio_chunk, parse_binary_frame, parse_frame_message)
+
+
+def test_binary_frame_round_trip():
+    jpeg = b"\xff\xd8fake-jpeg\xff\xd9"
+    data = pack_binary_frame("name_response", jpeg, seq=42,
+                             captured_at=1234.5, command="reset_yaw")
+
+    message = parse_binary_frame(data)
+    assert message["task"] == "name_response"
+    assert message["command"] == "reset_yaw"
+    assert message["seq"] == 42
+    assert message["captured_at"] == 1234.5
+    assert len(data) == HEADER_SIZE + len(jpeg)
+
+    # The payload is a view into the message, not a copy
+    pixels = np.frombuffer(message["image"], np.uint8)
+    assert pixels.tobytes() == jpeg
+    assert not pixels.flags.owndata
+
+
+def test_binary_frame_rejects_malformed_input():
+    for bad in (b"\x01\x00", b"\x09" + bytes(HEADER_SIZE - 1), b"\x01\x7f" + bytes(HEADER_SIZE - 2)):
+        try:
+            parse_binary_frame(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"Accepted malformed frame {bad!r}")
+
+
+def test_json_messages_reject_unknown_tasks_and_commands():
+    message = parse_frame_message('{"task": "gestures", "image": "abc", "command": ""}')
+    assert message["task"] == "gestures" and message["command"] is None
+    for bad in ({"task": 5}, {"task": ["eye_contact"]}, {"task": "juggling"},
+                {"task": "gestures", "command": {"reset": 1}}, {"task": "gestures", "command": "reboot"}):
+        try:
+            parse_frame_message(json.dumps(bad))
+        except ValueError:
+            continue
+        raise AssertionError(f"Accepted {bad}")
+
+
+def test_audio_chunk_with_and_without_header():
+    samples = np.array([0, 1, -1, 32767, -32768], dtype=np.int16)
+
+    with_header = parse_audio_chunk(pack_audio_chunk(samples, sample_rate=48000, seq=3))
+    assert with_header["sample_rate"] == 48000
+    assert with_header["seq"] == 3
+    assert np.array_equal(with_header["samples"], samples)
+
+    raw = parse_audio_chunk(pack_audio_chunk(samples))
+    assert raw["sample_rate"] is None
+    assert raw["seq"] is None
+    assert np.array_equal(raw["samples"], samples)
+    assert not raw["samples"].flags.owndata
+
+
+def test_audio_chunk_rejects_odd_length():
+    try:
+        parse_audio_chunk(b"\x00\x01\x02")
+    except ValueError:
+        return
+    raise AssertionError("Accepted a partial int16 sample")
+
+
+if __name__ == "__main__":
+    test_binary_frame_round_trip()
+    test_binary_frame_rejects_malformed_input()
+    test_json_messages_reject_unknown_tasks_and_commands()
+    test_audio_chunk_with_and_without_header()
+    test_audio_chunk_rejects_odd_length()
+    print("PASS: frame protocol")
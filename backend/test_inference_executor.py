@@ -0,0 +1,52 @@
+import asyncio
+import threading
+import time
+
+from inference_executor import InferenceExecutor
+
+
+class SlowEngine:
+    """Stands in for TrackingEngine; tracks how many frames run at once."""
+
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def process_frame(self, image_data, task, timestamp=None):
+        with SlowEngine.lock:
+            SlowEngine.running += 1
+            SlowEngine.peak = max(SlowEngine.peak, SlowEngine.running)
+        time.sleep(0.1)
+        with SlowEngine.lock:
+            SlowEngine.running -= 1
+        return {"task": task, "thread": threading.get_ident()}
+
+
+def test_sessions_run_concurrently_up_to_max_workers():
+    executor = InferenceExecutor(mode="thread", max_workers=2)
+
+    async def run():
+        # One leased engine per session, as the EnginePool hands them out
+        engines = [SlowEngine() for _ in range(6)]
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            executor.process_frame(engine, b"", "eye_contact") for engine in engines
+        ])
+        return results, time.perf_counter() - start, executor.in_flight
+
+    try:
+        results, elapsed, in_flight = asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    # Two at a time: three rounds of 0.1 s, not six
+    assert SlowEngine.peak == 2
+    assert 0.25 < elapsed < 0.5
+    assert len({result["thread"] for result in results}) == 2
+    assert in_flight == 0
+    assert executor.stats()["tasks"]["eye_contact"]["frames"] == 6
+
+
+if __name__ == "__main__":
+    test_sessions_run_concurrently_up_to_max_workers()
+    print("PASS: inference executor")
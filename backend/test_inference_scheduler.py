@@ -0,0 +1,90 @@
+import asyncio
+import time
+from inference_scheduler import FrameExpired, InferenceScheduler
+
+
+class RecordingExecutor:
+    """Stands in for InferenceExecutor; records the order jobs ran in."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.ran = []
+
+    async def process_frame(self, engine, image_data, task, timestamp=None):
+        self.ran.append(engine)
+        await asyncio.sleep(self.delay)
+        return {"task": task}
+
+
+def test_sessions_share_inference_time_fairly():
+    async def run():
+        executor = RecordingExecutor()
+        scheduler = InferenceScheduler(executor, concurrency=1, deadline_ms=10_000,
+                                       cost_estimates={"repetitive": 30.0, "gestures": 10.0},
+                                       cost_smoothing=0.0)
+        # Both sessions queue several frames while one job is running
+        blocker = scheduler.submit("blocker", "blocker", b"", "gestures")
+        jobs = []
+        for _ in range(3):
+            jobs.append(scheduler.submit("pose", "pose", b"", "repetitive"))
+            jobs.append(scheduler.submit("hands", "hands", b"", "gestures"))
+        await asyncio.gather(blocker, *jobs)
+        return executor.ran
+
+    ran = asyncio.run(run())
+    # The cheap gestures session is not starved behind the expensive one:
+    # all its frames fit into the virtual time of the first pose frame
+    assert ran[1:] == ["pose", "hands", "hands", "hands", "pose", "pose"]
+
+
+def test_stale_frames_expire():
+    async def run():
+        executor = RecordingExecutor(delay=0.05)
+        scheduler = InferenceScheduler(executor, concurrency=1, deadline_ms=10)
+        first = scheduler.submit("a", "a", b"", "gestures")
+        stale = scheduler.submit("b", "b", b"", "gestures")
+        await first
+        try:
+            await stale
+        except FrameExpired:
+            return scheduler.stats()
+        raise AssertionError("Stale frame was processed")
+
+    stats = asyncio.run(run())
+    assert stats["tasks"]["gestures"]["expired"] == 1
+    assert stats["tasks"]["gestures"]["dispatched"] == 1
+
+
+def test_deadline_counts_from_arrival():
+    async def run():
+        scheduler = InferenceScheduler(RecordingExecutor(), concurrency=1, deadline_ms=10)
+        try:
+            await scheduler.submit("a", "a", b"", "gestures", received_at=time.perf_counter() - 1)
+        except FrameExpired:
+            return True
+        return False
+
+    assert asyncio.run(run())
+
+
+def test_unknown_tasks_are_rejected():
+    async def run():
+        scheduler = InferenceScheduler(RecordingExecutor(), concurrency=1)
+        for task in ("juggling", 5):
+            try:
+                scheduler.submit("a", "a", b"", task)
+            except ValueError:
+                continue
+            raise AssertionError(f"Accepted task {task!r}")
+        return scheduler.stats()
+
+    stats = asyncio.run(run())
+    assert list(stats["tasks"]) == ["eye_contact", "name_response", "gestures", "repetitive"]
+
+
+if __name__ == "__main__":
+    test_sessions_share_inference_time_fairly()
+    test_stale_frames_expire()
+    test_deadline_counts_from_arrival()
+    test_unknown_tasks_are_rejected()
+    print("PASS: InferenceScheduler")
@@ -0,0 +1,97 @@
+import asyncio
+
+import numpy as np
+from inference_workers import InferenceWorkerPool
+
+
+class EchoEngine:
+    """Stands in for TrackingEngine inside the worker processes."""
+
+    def __init__(self):
+        self.frames = 0
+
+    def process_frame(self, image_data, task, timestamp=None):
+        self.frames += 1
+        pixels = np.frombuffer(image_data, np.uint8)
+        return {"task": task, "checksum": int(pixels.sum()), "frames": self.frames,
+                "shared": isinstance(image_data, memoryview), "timestamp": timestamp}
+
+    def reset_session(self):
+        self.frames = 0
+
+    def model_status(self):
+        return {"frames": self.frames}
+
+
+def test_frames_are_handed_over_through_shared_memory():
+    pool = InferenceWorkerPool(workers=2, slots=1, slot_size=64, engine_factory=EchoEngine)
+    try:
+        first, second = pool.create_engine(), pool.create_engine()
+        assert first.worker is not second.worker
+
+        small = bytes(range(48))
+        analysis, compute = first.process_frame(memoryview(small), "repetitive", 1.5).result(10)
+        assert analysis == {"task": "repetitive", "checksum": sum(small), "frames": 1,
+                            "shared": True, "timestamp": 1.5}
+        assert compute >= 0
+
+        # Too large for a slot: sent inline
+        large = bytes(200)
+        analysis, _ = first.process_frame(large, "gestures").result(10)
+        assert analysis["shared"] is False and analysis["frames"] == 2
+
+        # Engines keep their own state; resets reach the right one
+        assert second.process_frame(small, "eye_contact").result(10)[0]["frames"] == 1
+        first.reset_session()
+        assert first.model_status() == {"frames": 0}
+        assert second.model_status() == {"frames": 1}
+
+        stats = pool.stats()
+        assert [worker["free_slots"] for worker in stats] == [1, 1]
+        assert sum(worker["inline_frames"] for worker in stats) == 1
+    finally:
+        pool.shutdown()
+
+
+def test_concurrent_frames_from_the_event_loop():
+    pool = InferenceWorkerPool(workers=1, slots=2, slot_size=1024, engine_factory=EchoEngine)
+
+    async def run(engines):
+        frames = [np.full(512, i, np.uint8).tobytes() for i in range(12)]
+        futures = [asyncio.wrap_future(engines[i % 3].process_frame(frame, "eye_contact"))
+                   for i, frame in enumerate(frames)]
+        return [analysis["checksum"] for analysis, _ in await asyncio.gather(*futures)]
+
+    try:
+        engines = [pool.create_engine() for _ in range(3)]
+        checksums = asyncio.run(run(engines))
+        assert checksums == [512 * i for i in range(12)]
+    finally:
+        pool.shutdown()
+
+
+def test_dead_workers_are_restarted():
+    pool = InferenceWorkerPool(workers=1, slots=1, slot_size=64, engine_factory=EchoEngine)
+    try:
+        engine = pool.create_engine()
+        dead = engine.worker
+        dead.process.kill()
+        dead.process.join(10)
+        try:
+            engine.model_status()
+            assert False, "call on a dead worker should fail"
+        except RuntimeError:
+            pass
+
+        replacement = pool.create_engine()
+        assert replacement.worker is not dead and replacement.worker.alive
+        assert replacement.process_frame(bytes(8), "eye_contact").result(10)[0]["frames"] == 1
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    test_frames_are_handed_over_through_shared_memory()
+    test_concurrent_frames_from_the_event_loop()
+    test_dead_workers_are_restarted()
+    print("PASS: inference workers")
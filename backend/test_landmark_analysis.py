@@ -0,0 +1,80 @@
+import numpy as np
+from landmark_analysis import FACE_MESH_POINTS, FACE_POINTS, LandmarkAnalyzer, face_results, parse_pose
+from pose_tracker import LANDMARK_INDICES, LANDMARK_NAMES
+
+
+def reference_gaze(mesh, gaze_ema):
+    """Gaze and yaw as TrackingEngine computed them from the raw face mesh."""
+    def eye_ratio(eye_points, iris_point):
+        xs = [mesh[idx][0] for idx in eye_points]
+        width = max(xs) - min(xs)
+        if width == 0:
+            return 0.5
+        return (mesh[iris_point][0] - min(xs)) / width
+
+    head_yaw = mesh[1][0] - (mesh[234][0] + mesh[454][0]) / 2
+    raw_gaze = (eye_ratio([33, 133], 468) + eye_ratio([362, 263], 473)) / 2.0
+    raw_gaze = (raw_gaze - 0.5) * 2.0 + 0.5
+    final_gaze = max(0.0, min(1.0, raw_gaze + head_yaw * 4.0))
+    return head_yaw, 0.2 * final_gaze + 0.8 * gaze_ema
+
+
+def test_face_results_match_engine_logic():
+    rng = np.random.default_rng(5)
+    analyzer = LandmarkAnalyzer()
+    gaze_ema = 0.5
+    for _ in range(20):
+        mesh = rng.uniform(0.3, 0.7, (FACE_MESH_POINTS, 3)).tolist()
+        head_yaw, gaze_ema = reference_gaze(mesh, gaze_ema)
+
+        # Full mesh from the client, as objects
+        points = [{"x": x, "y": y, "z": z} for x, y, z in mesh]
+        results = analyzer.analyze("eye_contact", {"face": points})
+        assert abs(results["head_yaw"] - head_yaw) < 1e-12
+        assert abs(results["gaze_x"] - gaze_ema) < 1e-12
+        assert results["face_points"].shape == (len(FACE_POINTS), 2)
+        assert list(results["timings"]) == ["landmarks"]
+
+    subset = np.array([mesh[idx][:2] for idx in FACE_POINTS])
+    assert face_results(subset, 0.5)["face_x"] == mesh[1][0]
+
+
+def test_client_pose_runs_pose_tracker():
+    rng = np.random.default_rng(6)
+    analyzer = LandmarkAnalyzer()
+    for i in range(40):
+        pose = rng.uniform(0.4, 0.6, (33, 3)).tolist()
+        results = analyzer.analyze("repetitive", {"pose": pose}, timestamp=i / 30)
+
+    assert results["pose_detected"]
+    assert results["pose_landmarks"].shape == (len(LANDMARK_NAMES), 4)
+    assert np.allclose(results["pose_landmarks"][:, :3], np.array(pose)[list(LANDMARK_INDICES)])
+    assert np.all(results["pose_landmarks"][:, 3] == 1.0)
+    assert results["movement_score"] == sum(results["movement_counters"].values()) > 0
+    assert analyzer.analyze("repetitive", {"pose": None})["pose_detected"] is False
+    assert analyzer.analyze("gestures", {"hands": [{}, {}]})["hand_count"] == 2
+
+
+def test_malformed_landmarks_are_rejected():
+    analyzer = LandmarkAnalyzer()
+    for task, landmarks in [
+        ("eye_contact", {"face": [[0.5, 0.5]] * 10}),
+        ("eye_contact", {"face": "mesh"}),
+        ("repetitive", {"pose": [[0.5, 0.5]] * 13}),
+        ("repetitive", {"pose": [[float("nan")] * 4] * 13}),
+        ("gestures", {"hands": -1}),
+        ("gestures", [1, 2]),
+    ]:
+        try:
+            analyzer.analyze(task, landmarks)
+        except ValueError:
+            continue
+        raise AssertionError(f"Accepted {landmarks!r}")
+    assert parse_pose([[0.5, 0.5, 0.0, 0.9]] * 13)[0, 3] == 0.9
+
+
+if __name__ == "__main__":
+    test_face_results_match_engine_logic()
+    test_client_pose_runs_pose_tracker()
+    test_malformed_landmarks_are_rejected()
+    print("PASS: landmark analysis")
@@ -0,0 +1,62 @@
+import random
+
+from logic_engine import NeuroLensLogicEngine, logic_engine
+
+
+def random_metrics(rng):
+    total = rng.choice([0, 39, 40, rng.randint(40, 5000)])
+    face = rng.randint(0, total)
+    social = rng.randint(0, face)
+    return {
+        "totalFrames": total,
+        "framesFaceDetected": face,
+        "framesSocialSide": social,
+        "framesGeometricSide": rng.randint(0, face - social),
+        "sideSwitchCount": rng.randint(0, 8),
+        "durationSec": rng.random() * 60,
+    }
+
+
+def test_batch_matches_analyze():
+    rng = random.Random(7)
+    sessions = [random_metrics(rng) for _ in range(2500)]
+    results = list(logic_engine.analyze_batch(sessions, chunk_size=1000))
+    assert results == [logic_engine.analyze(metrics) for metrics in sessions]
+    assert {result["classifications"]["dominantFocus"] for result in results if "classifications" in result} == {
+        "geometric", "social", "mixed/no strong preference"}
+
+
+def test_unscorable_entries_yield_none():
+    good = {"totalFrames": 100, "framesFaceDetected": 90, "framesSocialSide": 80,
+            "framesGeometricSide": 5, "sideSwitchCount": 3}
+    missing = {"totalFrames": 100, "framesFaceDetected": 90}
+    results = list(logic_engine.analyze_batch([missing, good, "not metrics", {}]))
+    assert results[0] is None and results[2] is None
+    assert results[1] == logic_engine.analyze(good)
+    assert results[3]["interpretation"] == "Insufficient data."
+
+
+def test_thresholds_change_the_rules_version():
+    engine = NeuroLensLogicEngine()
+    metrics = {"totalFrames": 100, "framesFaceDetected": 90, "framesSocialSide": 60,
+               "framesGeometricSide": 20, "sideSwitchCount": 3}
+    version = engine.rules_version
+    assert engine.analyze(metrics)["classifications"]["dominantFocus"] == "mixed/no strong preference"
+
+    engine.set_thresholds(preference=0.6)
+    assert engine.rules_version != version
+    assert engine.analyze(metrics)["classifications"]["dominantFocus"] == "social"
+    assert list(engine.analyze_batch([metrics])) == [engine.analyze(metrics)]
+    try:
+        engine.set_thresholds(preferance=0.6)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown threshold accepted")
+
+
+if __name__ == "__main__":
+    test_batch_matches_analyze()
+    test_unscorable_entries_yield_none()
+    test_thresholds_change_the_rules_version()
+    print("PASS: logic engine")
@@ -0,0 +1,50 @@
+from metrics import MetricsRegistry
+
+
+def test_prometheus_text_format():
+    registry = MetricsRegistry()
+    frames = registry.counter("frames_total", "Frames", ("task",))
+    latency = registry.histogram("stage_seconds", "Latency", ("stage",), buckets=(0.01, 0.1))
+
+    frames.inc(task="eye_contact")
+    frames.inc(2, task="eye_contact")
+    latency.observe(0.005, stage="decode")
+    latency.observe(0.05, stage="decode")
+    latency.observe(5.0, stage="decode")
+
+    lines = registry.render().splitlines()
+    assert "# TYPE frames_total counter" in lines
+    assert 'frames_total{task="eye_contact"} 3.0' in lines
+    # Buckets are cumulative and end with +Inf == count
+    assert 'stage_seconds_bucket{stage="decode",le="0.01"} 1' in lines
+    assert 'stage_seconds_bucket{stage="decode",le="0.1"} 2' in lines
+    assert 'stage_seconds_bucket{stage="decode",le="+Inf"} 3' in lines
+    assert 'stage_seconds_count{stage="decode"} 3' in lines
+
+
+def test_labels_must_match():
+    registry = MetricsRegistry()
+    frames = registry.counter("frames_total", "Frames", ("task",))
+    try:
+        frames.inc(model="hands")
+    except ValueError:
+        return
+    raise AssertionError("mismatched labels accepted")
+
+
+def test_mixed_label_types_still_render():
+    registry = MetricsRegistry()
+    frames = registry.counter("frames_total", "Frames", ("task",))
+    latency = registry.histogram("stage_seconds", "Latency", ("task",), buckets=(0.1,))
+    for task in ("gestures", 5, None):
+        frames.inc(task=task)
+        latency.observe(0.01, task=task)
+    lines = registry.render().splitlines()
+    assert 'frames_total{task="5"} 1.0' in lines
+
+
+if __name__ == "__main__":
+    test_prometheus_text_format()
+    test_labels_must_match()
+    test_mixed_label_types_still_render()
+    print("PASS: metrics exposition")
@@ -0,0 +1,47 @@
+import numpy as np
+from pose_tracker import LANDMARK_NAMES, PoseTracker, landmarks_to_dict
+from rolling_window import RollingWindow
+
+
+def test_rolling_window_matches_numpy():
+    rng = np.random.default_rng(3)
+    window = RollingWindow(30, 10)
+    history = []
+    for value in rng.uniform(0, 1, 500):
+        window.append(value)
+        history = (history + [value])[-30:]
+        recent = history[-10:]
+        assert abs(window.mean - np.mean(recent)) < 1e-9
+        assert abs(window.variance - np.var(recent)) < 1e-9
+    assert np.allclose(window.values(), history)
+
+
+def reference_counts(frames, threshold):
+    """Movement counters as the original per-landmark dict loop computed them."""
+    counts, prev = {}, None
+    for frame in frames:
+        if prev is not None:
+            for row, name in enumerate(LANDMARK_NAMES):
+                if np.sqrt(np.sum((frame[row, :3] - prev[row, :3]) ** 2)) > threshold:
+                    counts[name] = counts.get(name, 0) + 1
+        prev = frame
+    return counts
+
+
+def test_vectorized_movements_match_reference():
+    rng = np.random.default_rng(4)
+    frames = [rng.uniform(0.4, 0.6, (len(LANDMARK_NAMES), 4)) for _ in range(50)]
+    tracker = PoseTracker()
+    for frame in frames:
+        tracker._detect_movements(frame)
+        patterns = tracker._detect_patterns(frame)
+
+    assert tracker.movement_counters == reference_counts(frames, tracker.movement_threshold)
+    assert patterns["total_movements"] == sum(tracker.movement_counters.values())
+    assert set(landmarks_to_dict(frames[0])["LEFT_WRIST"]) == {"x", "y", "z", "visibility"}
+
+
+if __name__ == "__main__":
+    test_rolling_window_matches_numpy()
+    test_vectorized_movements_match_reference()
+    print("PASS: pose tracker")
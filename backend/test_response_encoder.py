@@ -0,0 +1,68 @@
+import json
+
+import numpy as np
+from pose_tracker import LANDMARK_NAMES, landmarks_to_dict
+from response_encoder import ResponseEncoder
+
+
+def repetitive_reply(seq, landmarks, score):
+    return {
+        "status": "processed",
+        "dropped_frames": 0,
+        "seq": seq,
+        "captured_at": seq * 33.0,
+        "pose_detected": True,
+        "landmarks": landmarks_to_dict(landmarks),
+        "movement_score": score,
+    }
+
+
+def test_default_is_the_full_reply():
+    landmarks = np.full((len(LANDMARK_NAMES), 4), 0.5)
+    reply = repetitive_reply(1, landmarks, 2.0)
+    assert json.loads(ResponseEncoder().encode(reply)) == reply
+
+
+def test_negotiated_fields_arrays_and_deltas():
+    encoder = ResponseEncoder.from_query({
+        "fields": "pose_detected,landmarks,movement_score", "landmarks": "array", "delta": "1",
+    })
+    landmarks = np.random.default_rng(7).uniform(0, 1, (len(LANDMARK_NAMES), 4))
+
+    first = json.loads(encoder.encode(repetitive_reply(1, landmarks, 2.0), {"pose_landmarks": landmarks}))
+    assert set(first) == {"status", "seq", "captured_at", "pose_detected", "landmarks", "movement_score"}
+    assert np.allclose(first["landmarks"], landmarks, atol=1e-4)
+
+    # Nothing but the score changed: only it is sent
+    second = json.loads(encoder.encode(repetitive_reply(2, landmarks, 3.0)))
+    assert second == {"status": "processed", "seq": 2, "captured_at": 66.0, "movement_score": 3.0}
+
+    # Pose lost: the reply has no landmarks or score, so the client drops them
+    lost = repetitive_reply(3, landmarks, 0.0)
+    lost["pose_detected"] = False
+    del lost["landmarks"], lost["movement_score"]
+    third = json.loads(encoder.encode(lost))
+    assert third == {"status": "processed", "seq": 3, "captured_at": 99.0, "pose_detected": False,
+                     "landmarks": None, "movement_score": None}
+
+
+def test_reply_rate_and_validation():
+    encoder = ResponseEncoder.from_query({"every": "3", "landmarks": "none"})
+    landmarks = np.zeros((len(LANDMARK_NAMES), 4))
+    sent = [encoder.encode(repetitive_reply(seq, landmarks, 0.0)) for seq in range(7)]
+    assert [payload is not None for payload in sent] == [True, False, False, True, False, False, True]
+    assert "landmarks" not in json.loads(sent[0])
+
+    for query in ({"every": "0"}, {"every": "x"}, {"landmarks": "xml"}):
+        try:
+            ResponseEncoder.from_query(query)
+        except ValueError:
+            continue
+        raise AssertionError(f"Accepted {query}")
+
+
+if __name__ == "__main__":
+    test_default_is_the_full_reply()
+    test_negotiated_fields_arrays_and_deltas()
+    test_reply_rate_and_validation()
+    print("PASS: response encoder")
@@ -0,0 +1,40 @@
+import time
+
+from result_cache import ResultCache, payload_key
+
+
+def test_key_ignores_key_order():
+    assert payload_key({"totalFrames": 50, "sideSwitchCount": 2}) == \
+        payload_key({"sideSwitchCount": 2, "totalFrames": 50})
+    assert payload_key({"totalFrames": 50}) != payload_key({"totalFrames": 51})
+
+
+def test_lru_ttl_and_rule_changes():
+    cache = ResultCache(max_entries=2, ttl=60)
+    assert cache.get("a", "v1") is None
+    cache.put("a", "v1", {"score": 1})
+    cache.put("b", "v1", {"score": 2})
+    assert cache.get("a", "v1") == {"score": 1}
+
+    # "b" is the least recently used
+    cache.put("c", "v1", {"score": 3})
+    assert cache.get("b", "v1") is None
+    assert cache.get("a", "v1") is not None and cache.get("c", "v1") is not None
+    assert (cache.hits, cache.misses) == (3, 2)
+
+    # New thresholds: everything cached is dropped
+    assert cache.get("a", "v2") is None
+    assert cache.stats()["entries"] == 0
+    cache.put("a", "v1", {"score": 1})      # scored under the old rules
+    assert cache.stats()["entries"] == 0
+
+    cache.ttl = 0.01
+    cache.put("a", "v2", {"score": 1})
+    time.sleep(0.02)
+    assert cache.get("a", "v2") is None
+
+
+if __name__ == "__main__":
+    test_key_ignores_key_order()
+    test_lru_ttl_and_rule_changes()
+    print("PASS: result cache")
@@ -0,0 +1,46 @@
+import tempfile
+
+import numpy as np
+from session_log import SessionLogSink, read_binary_log
+
+
+def test_binary_log_round_trip():
+    with tempfile.TemporaryDirectory() as directory:
+        sink = SessionLogSink(directory, flush_interval=60)
+        log = sink.open("binary", ["NOSE", "LEFT_WRIST", "HANDS"], ["", "hand_flapping"])
+
+        landmarks = np.array([[0.1, 0.2, 0.3, 1.0], [0.4, 0.5, 0.6, 1.0]])
+        log.movements(np.array([False, True]), landmarks, timestamp=100.0)
+        log.pattern(2, 1, y=0.7, timestamp=101.0)
+        log.close()
+        # Nothing is written on the caller's thread
+        assert log.records_written == 0
+        sink.flush()
+
+        header, records = read_binary_log(log.path)
+        assert header["landmarks"] == ["NOSE", "LEFT_WRIST", "HANDS"]
+        assert records["landmark"].tolist() == [1, 2]
+        assert records["pattern"].tolist() == [0, 1]
+        assert records["timestamp"].tolist() == [100.0, 101.0]
+        assert np.allclose(records["x"], [0.4, 0.0]) and np.allclose(records["y"], [0.5, 0.7])
+        assert log not in sink._logs
+
+
+def test_csv_log_has_legacy_columns():
+    with tempfile.TemporaryDirectory() as directory:
+        sink = SessionLogSink(directory, flush_interval=60)
+        log = sink.open("csv", ["NOSE"], [""])
+        log.movements(np.array([True]), np.array([[0.25, 0.5, 0.0, 1.0]]))
+        log.close()
+        sink.flush()
+
+        with open(log.path) as f:
+            lines = f.read().splitlines()
+        assert lines[0] == "timestamp,landmark,x,y,z,movement_detected,pattern_type"
+        assert lines[1].split(",")[1:] == ["NOSE", "0.25", "0.5", "0", "True", ""]
+
+
+if __name__ == "__main__":
+    test_binary_log_round_trip()
+    test_csv_log_has_legacy_columns()
+    print("PASS: session log")
@@ -0,0 +1,134 @@
+import json
+
+from session_metrics import (TASK_STATES, NameResponseState, SessionMetrics, TaskState,
+                             create_session_metrics)
+
+
+def test_only_the_session_task_state_is_created():
+    session = SessionMetrics()
+    response = {}
+    session.update("gestures", {"hands_detected": True}, response)
+    session.update("gestures", {"hands_detected": False}, {})
+    session.update("unknown", {}, {})
+
+    assert list(session.states) == ["gestures"]
+    assert response == {"hands_detected": True}
+    metrics = session.as_dict()
+    assert metrics["totalFrames"] == 3
+    assert metrics["handsDetectedFrames"] == 1
+    assert set(metrics) == set(create_session_metrics())
+    assert all(not hasattr(state_class(), "__dict__") for state_class in TASK_STATES.values())
+
+
+def test_task_states_must_implement_update_and_metrics():
+    try:
+        class Incomplete(TaskState):
+            __slots__ = ()
+
+            def update(self, session, analysis, response):
+                pass
+    except TypeError as e:
+        assert "write_metrics" in str(e)
+    else:
+        raise AssertionError("TaskState without write_metrics was accepted")
+
+
+def test_reset_yaw_command():
+    session = SessionMetrics()
+    for yaw in (0.0, 0.08, 0.02):
+        response = {}
+        session.update("name_response", {"face_detected": True, "head_yaw": yaw}, response)
+    assert session.as_dict()["maxYawChange"] == 0.08
+    assert response["head_turn_detected"] is False
+
+    session.command("reset_yaw")
+    session.update("name_response", {"face_detected": True, "head_yaw": 0.03}, {})
+    state = session.states["name_response"]
+    assert isinstance(state, NameResponseState)
+    assert (state.initial_yaw, state.max_yaw_change) == (0.03, 0.0)
+
+
+def test_turns_before_the_name_is_called_do_not_count():
+    session = SessionMetrics()
+    # Looking around while waiting for the name
+    for yaw in (0.0, 0.2, 0.3, 0.1) * 10:
+        session.update("name_response", {"face_detected": True, "head_yaw": yaw}, {})
+    session.command("reset_yaw")
+    # Still, after the name
+    for _ in range(30):
+        session.update("name_response", {"face_detected": True, "head_yaw": 0.1}, {})
+
+    report = session.report("name_response")
+    assert report["metrics"]["headTurnFrames"] == 0
+    assert report["metrics"]["responseFrames"] == 30
+    assert report["classifications"]["nameResponse"] == "no response observed"
+    assert report["screeningScore"] == 2
+
+
+def test_resumed_session_continues_counting():
+    def pose_frame(body_x, moves):
+        return {"pose_detected": True, "body_x": body_x, "movement_counters": {"LEFT_WRIST": moves},
+                "repetitive_patterns": {"hand_flapping": moves > 2, "total_movements": moves}}
+
+    session = SessionMetrics()
+    for moves in (1, 2, 3):
+        session.update("repetitive", pose_frame(0.5, moves), {})
+    snapshot = json.loads(json.dumps(session.snapshot()))
+
+    # The new connection's pose tracker counts from zero again
+    resumed = SessionMetrics.restore(snapshot)
+    response = {}
+    resumed.update("repetitive", pose_frame(0.6, 1), response)
+    metrics = resumed.as_dict()
+    assert metrics["totalFrames"] == 4
+    assert metrics["landmarkMovements"] == {"LEFT_WRIST": 4}
+    assert metrics["totalRepetitiveMovements"] == response["total_movements"] == 4
+    assert metrics["bodyMovementSum"] == 0.0
+
+
+def test_task_report_and_score_timeline():
+    session = SessionMetrics(window_seconds=2.0)
+    # 3 s of hands, then 2 s without, at 30 fps
+    for i in range(150):
+        session.update("gestures", {"hands_detected": i < 90}, {}, 100 + i / 30)
+
+    report = session.report("gestures")
+    assert report["metrics"] == {"totalFrames": 150, "handsDetectedFrames": 90}
+    assert report["scores"]["handsRate"] == 0.6
+    assert report["screeningScore"] == 0
+
+    timeline = session.timeline("gestures")
+    assert timeline["starts"] == [0.0, 2.0, 4.0]
+    assert timeline["frames"] == [60, 60, 30]
+    assert timeline["scores"]["handsRate"] == [1.0, 0.5, 0.0]
+    assert session.report("eye_contact") is None and session.timeline("eye_contact") is None
+
+
+def test_timeline_survives_a_resume():
+    session = SessionMetrics(window_seconds=1.0)
+    for i in range(45):
+        session.update("vocalization", {"rms": 0.1, "is_speech": i % 3 == 0, "is_silence": False,
+                                        "volume_level": "low"}, {}, i / 30)
+    snapshot = json.loads(json.dumps(session.snapshot()))
+
+    # The new connection's clock starts elsewhere
+    resumed = SessionMetrics.restore(snapshot, window_seconds=1.0)
+    response = {}
+    resumed.update("vocalization", {"rms": 0.1, "is_speech": True, "is_silence": False,
+                                    "volume_level": "low"}, response, 5000.0)
+    assert response["total_chunks"] == 46 and response["speech_chunks"] == 16
+    timeline = resumed.timeline("vocalization")
+    assert timeline["starts"] == [0.0, 1.0, 2.0]
+    assert timeline["frames"] == [30, 15, 1]
+    assert resumed.report("vocalization")["metrics"]["totalChunks"] == 46
+
+
+if __name__ == "__main__":
+    test_only_the_session_task_state_is_created()
+    test_task_states_must_implement_update_and_metrics()
+    test_reset_yaw_command()
+    test_turns_before_the_name_is_called_do_not_count()
+    test_resumed_session_continues_counting()
+    test_task_report_and_score_timeline()
+    test_timeline_survives_a_resume()
+    print("PASS: session metrics")
@@ -0,0 +1,60 @@
+import os
+import random
+import tempfile
+
+import numpy as np
+from replay import replay_file, replay_records
+from session_metrics import SessionMetrics
+from session_recording import SessionRecorder, open_recording
+
+
+def f32(value):
+    # Recordings store float32; compare against what the file can hold
+    return float(np.float32(value))
+
+
+def test_replay_matches_live_metrics():
+    rng = random.Random(11)
+    live = SessionMetrics()
+    with tempfile.TemporaryDirectory() as directory:
+        recorder = SessionRecorder(os.path.join(directory, "s.nlrec"), "s1", block_size=16)
+        frame = 0
+        for task in ("eye_contact", "name_response", "gestures"):
+            for _ in range(100):
+                frame += 1
+                if rng.random() < 0.05:
+                    recorder.append(task, frame / 15, None)
+                    continue
+                if task == "gestures":
+                    analysis = {"hands_detected": rng.random() > 0.5, "hand_count": 1}
+                else:
+                    analysis = {"face_detected": rng.random() > 0.2, "gaze_x": f32(rng.random()),
+                                "head_yaw": f32(rng.uniform(-0.1, 0.1)), "face_x": 0.5,
+                                "face_y": 0.5, "face_points": np.zeros((9, 2))}
+                recorder.append(task, frame / 15, analysis)
+                live.update(task, analysis, {})
+        try:
+            recorder.append("juggling", 0.0, None)
+            raise AssertionError("Recorded an unknown task")
+        except ValueError:
+            pass
+        recorder.close().result()
+
+        header, records = open_recording(recorder.path)
+        assert header["session_id"] == "s1"
+        assert len(records) == 300
+        replayed = replay_records(records).as_dict()
+        del records
+
+        # Each task is scored from its own state, as the live report command does
+        result = replay_file(recorder.path)
+        for task in ("eye_contact", "name_response", "gestures"):
+            assert result["tasks"][task]["analysis"] == live.report(task), task
+
+    for key, value in live.as_dict().items():
+        assert replayed[key] == value, key
+
+
+if __name__ == "__main__":
+    test_replay_matches_live_metrics()
+    print("PASS: session recording replay")
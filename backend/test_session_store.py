@@ -0,0 +1,48 @@
+import os
+import tempfile
+import time
+
+from session_store import SessionStore
+
+
+def test_checkpoints_round_trip_and_expire():
+    with tempfile.TemporaryDirectory() as directory:
+        store = SessionStore(os.path.join(directory, "sessions.db"), ttl=60, evict_every=2)
+        store.save("a", "analyze", {"task": "eye_contact", "metrics": {"total_frames": 3}})
+        store.save("a", "analyze", {"task": "eye_contact", "metrics": {"total_frames": 4}})
+        assert store.load("a", "analyze")["metrics"]["total_frames"] == 4
+        assert store.load("a", "audio") is None
+        assert store.load("b", "analyze") is None
+
+        # Another process on the host sees the same checkpoints
+        other = SessionStore(store.path, ttl=60)
+        assert other.load("a", "analyze")["task"] == "eye_contact"
+
+        other.ttl = 0.01
+        time.sleep(0.02)
+        assert other.load("a", "analyze") is None
+        other.evict_expired()
+        assert store.load("a", "analyze") is None
+        store.close()
+        other.close()
+
+
+def test_stale_connection_cannot_overwrite_a_resumed_session():
+    with tempfile.TemporaryDirectory() as directory:
+        store = SessionStore(os.path.join(directory, "sessions.db"), ttl=60)
+        assert store.resume("a", "analyze") == (None, 0)
+        assert store.save("a", "analyze", {"frames": 10})
+
+        # The client reconnects while the old socket is still closing
+        state, generation = store.resume("a", "analyze")
+        assert state == {"frames": 10} and generation == 1
+        assert store.save("a", "analyze", {"frames": 15}, generation)
+        assert not store.save("a", "analyze", {"frames": 12})
+        assert store.load("a", "analyze") == {"frames": 15}
+        store.close()
+
+
+if __name__ == "__main__":
+    test_checkpoints_round_trip_and_expire()
+    test_stale_connection_cannot_overwrite_a_resumed_session()
+    print("PASS: session store")
@@ -0,0 +1,66 @@
+import json
+import tempfile
+import threading
+import time
+
+from session_trace import INFERENCE_TRACK, SessionTrace, StackSampler
+
+
+def test_frame_spans_written_as_chrome_trace():
+    trace = SessionTrace("abc", "analyze")
+    message = {"task": "gestures", "seq": 5, "received_at": 10.0}
+    analysis = {"started_at": 10.002, "timings": {"decode": 0.001, "hands": 0.004}}
+    trace.frame(message, 10.001, analysis, 10.008)
+    trace.span("send", 10.008, 10.009)
+
+    with tempfile.TemporaryDirectory() as directory:
+        with open(trace.save(directory)) as f:
+            events = json.load(f)["traceEvents"]
+
+    spans = {event["name"]: event for event in events if event["ph"] == "X"}
+    assert set(spans) == {"receive", "inference", "queue", "decode", "hands", "send"}
+    # Engine stages are laid out back to back from the engine's start time
+    assert spans["decode"]["ts"] == 10.002e6
+    assert abs(spans["hands"]["ts"] - 10.003e6) < 1e-3
+    assert spans["hands"]["tid"] == INFERENCE_TRACK
+    assert spans["hands"]["args"] == {"task": "gestures", "seq": 5}
+
+
+def _spin_in_session(engine, stop):
+    engine.active_thread = threading.get_ident()
+    while not stop.is_set():
+        pass
+
+
+def _spin_elsewhere(stop):
+    while not stop.is_set():
+        pass
+
+
+class FakeEngine:
+    active_thread = None
+
+
+def test_sampler_only_samples_the_session_threads():
+    stop, engine = threading.Event(), FakeEngine()
+    threads = [threading.Thread(target=_spin_in_session, args=(engine, stop), name="session"),
+               threading.Thread(target=_spin_elsewhere, args=(stop,), name="other")]
+    sampler = StackSampler(interval_ms=1)
+    sampler.engine = engine
+    for thread in threads:
+        thread.start()
+    sampler.start()
+    time.sleep(0.1)
+    sampler.stop()
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert sampler.samples > 0 and sampler.stacks
+    assert all(stack.startswith("session;") for stack in sampler.stacks)
+
+
+if __name__ == "__main__":
+    test_frame_spans_written_as_chrome_trace()
+    test_sampler_only_samples_the_session_threads()
+    print("PASS: session trace")
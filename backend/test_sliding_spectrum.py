@@ -0,0 +1,40 @@
+import numpy as np
+from sliding_spectrum import SlidingSpectrum
+
+
+def irregular_times(count, rng, start=50.0):
+    # ~15 fps webcam frames with jitter
+    return start + np.cumsum(rng.uniform(0.05, 0.085, count))
+
+
+def test_streaming_sums_match_direct_dft():
+    rng = np.random.default_rng(5)
+    spectrum = SlidingSpectrum(2, capacity=32)
+    times = irregular_times(300, rng)
+    values = rng.uniform(0, 1, (300, 2))
+    for t, v in zip(times, values):
+        spectrum.update(t, v)
+
+    window_t = times[-32:] - times[0]
+    window_v = values[-32:]
+    direct = window_v.T @ np.exp(-2j * np.pi * np.outer(window_t, spectrum.frequencies))
+    assert np.allclose(spectrum._sums[:-1], direct)
+
+
+def test_rhythm_detected_and_single_movement_ignored():
+    rng = np.random.default_rng(6)
+    spectrum = SlidingSpectrum(2)
+    for i, t in enumerate(irregular_times(200, rng)):
+        flapping = 0.5 + 0.1 * np.sin(2 * np.pi * 2.5 * t)
+        one_reach = 0.5 + (0.3 if i > 150 else 0.0) + rng.normal(0, 0.002)
+        spectrum.update(t, (flapping, one_reach))
+
+    frequency, periodicity = spectrum.dominant()
+    assert frequency[0] == 2.5 and periodicity[0] > 0.9
+    assert periodicity[1] < 0.3
+
+
+if __name__ == "__main__":
+    test_streaming_sums_match_direct_dft()
+    test_rhythm_detected_and_single_movement_ignored()
+    print("PASS: sliding spectrum")
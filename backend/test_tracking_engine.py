@@ -0,0 +1,44 @@
+import cv2
+import numpy as np
+from tracking_engine import TrackingEngine
+
+
+def test_models_are_built_lazily():
+    engine = TrackingEngine(preload=[])
+    status = engine.model_status()
+    assert set(status) == set(TrackingEngine.MODEL_BUILDERS)
+    assert not any(entry["loaded"] for entry in status.values())
+
+    # Resetting a session must not force the pose graph to load
+    engine.reset_session()
+    assert not engine.model_status()["pose_tracker"]["loaded"]
+
+
+def test_unknown_model_is_rejected():
+    engine = TrackingEngine(preload=[])
+    try:
+        engine.load_model("iris")
+    except ValueError:
+        return
+    raise AssertionError("Loaded an unknown model")
+
+
+def test_decode_image_accepts_bytes_and_base64():
+    import base64
+    ok, jpeg = cv2.imencode(".jpg", np.full((24, 32, 3), 128, np.uint8))
+    assert ok
+
+    engine = TrackingEngine(preload=[])
+    from_bytes = engine.decode_image(memoryview(jpeg.tobytes()))
+    data_url = "data:image/jpeg;base64," + base64.b64encode(jpeg.tobytes()).decode()
+    from_base64 = engine.decode_image(data_url)
+
+    assert from_bytes.shape == (24, 32, 3)
+    assert np.array_equal(from_bytes, from_base64)
+
+
+if __name__ == "__main__":
+    test_models_are_built_lazily()
+    test_unknown_model_is_rejected()
+    test_decode_image_accepts_bytes_and_base64()
+    print("PASS: TrackingEngine")
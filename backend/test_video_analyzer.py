@@ -0,0 +1,85 @@
+import os
+import random
+import tempfile
+
+import cv2
+import numpy as np
+from session_metrics import SessionMetrics
+from video_analyzer import _track_boundaries, merge_chunk_metrics, plan_chunks, read_frames
+
+
+def synthetic_analyses(task, count, rng):
+    analyses = []
+    for _ in range(count):
+        if task == "eye_contact":
+            analyses.append({"face_detected": rng.random() > 0.2, "gaze_x": rng.random()})
+        elif task == "name_response":
+            analyses.append({"face_detected": rng.random() > 0.2, "head_yaw": rng.uniform(-0.1, 0.1)})
+        else:
+            analyses.append({"pose_detected": rng.random() > 0.2, "body_x": rng.random()})
+    return analyses
+
+
+def single_pass(task, analyses):
+    session = SessionMetrics()
+    for analysis in analyses:
+        session.update(task, analysis, {})
+    return session.as_dict()
+
+
+def chunked(task, analyses, size):
+    chunks = []
+    for start in range(0, len(analyses), size):
+        session, edges = SessionMetrics(), {}
+        for analysis in analyses[start:start + size]:
+            session.update(task, analysis, {})
+            _track_boundaries(edges, task, analysis, session)
+        chunks.append({"metrics": session.as_dict(), "edges": edges})
+    return merge_chunk_metrics(chunks)
+
+
+def test_chunked_metrics_match_single_pass():
+    rng = random.Random(7)
+    for task in ("eye_contact", "name_response", "repetitive"):
+        analyses = synthetic_analyses(task, 500, rng)
+        expected = single_pass(task, analyses)
+        for size in (1, 7, 64, 500):
+            merged = chunked(task, analyses, size)
+            for key in ("totalFrames", "framesFaceDetected", "framesSocialSide",
+                        "framesGeometricSide", "sideSwitchCount", "lastSide",
+                        "initialYaw", "maxYawChange", "headTurnFrames", "lastBodyX"):
+                assert merged[key] == expected[key], (task, size, key)
+            assert abs(merged["bodyMovementSum"] - expected["bodyMovementSum"]) < 1e-9
+
+
+def test_chunks_align_with_stride():
+    chunks = plan_chunks(frame_count=1000, fps=30, stride=4, chunk_seconds=10)
+    assert chunks[0] == (0, 300)
+    assert all(start % 4 == 0 for start, _ in chunks)
+    assert chunks[-1][1] == 1000
+
+
+def test_chunks_read_contiguous_frames():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "levels.avi")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (32, 32))
+        for level in range(40):
+            writer.write(np.full((32, 32, 3), level * 6, np.uint8))
+        writer.release()
+
+        read = []
+        for start, end in plan_chunks(frame_count=40, fps=30, stride=2, chunk_seconds=0.4):
+            capture = cv2.VideoCapture(path)
+            levels = [(index, round(frame.mean() / 6)) for index, frame in read_frames(capture, start, end, 2)]
+            capture.release()
+            read.extend(levels)
+
+    # Every second frame exactly once, each chunk starting on its own frame
+    assert read == [(index, index) for index in range(0, 40, 2)]
+
+
+if __name__ == "__main__":
+    test_chunked_metrics_match_single_pass()
+    test_chunks_align_with_stride()
+    test_chunks_read_contiguous_frames()
+    print("PASS: video analyzer merge")
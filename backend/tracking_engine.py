@@ -1,176 +1,224 @@
-import mediapipe as mp
-import cv2
 import numpy as np
 import base64
-from pose_tracker import PoseTracker
+import time
+import config
+from frame_decoder import FrameDecoder
+from model_registry import ModelRegistry
+from landmark_analysis import FACE_POINTS, face_results, hand_results, pose_results
+from pose_tracker import POSE_SETTINGS, PoseTracker
 
 class TrackingEngine:
-    def __init__(self):
+    # Graphs each task needs; everything else stays unloaded for the session
+    TASK_MODELS = {
+        "eye_contact": ("face_mesh",),
+        "name_response": ("face_mesh",),
+        "gestures": ("hands",),
+        "repetitive": ("pose_tracker",),
+    }
+
+    def __init__(self, preload=config.PRELOAD_MODELS):
+        # MediaPipe graphs are built on first use (see load_model) and
+        # owned by this engine's registry, so duplicates are shared
+        self.registry = ModelRegistry()
+        self._models = {}
+        self.model_load_times = {}
+        self.model_warmup_times = {}
+
+        # Decodes straight to RGB at inference resolution, reusing buffers
+        self.decoder = FrameDecoder()
+
+        # Smoothing state
+        self.gaze_ema = 0.5
+
+        for name in preload:
+            self.load_model(name)
+
+    def _build_face_mesh(self):
         # Face Mesh for Gaze & Head Pose
-        self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
+        return self.registry.get(
+            "face_mesh",
             max_num_faces=1,
             refine_landmarks=True,
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5
         )
-        
-        # Pose for Body Movement (Repetitive behaviors)
-        self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
-        
+
+    def _build_pose(self):
+        # Pose for Body Movement (Repetitive behaviors), shared with PoseTracker
+        return self.registry.get("pose", **POSE_SETTINGS)
+
+    def _build_hands(self):
         # Hands for Gestures (Pointing)
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
+        return self.registry.get(
+            "hands",
             max_num_hands=2,
             min_detection_confidence=0.3, # Lowered for better detection
             min_tracking_confidence=0.3
         )
-        
-        # Advanced Pose Tracker for detailed analysis
-        self.pose_tracker = PoseTracker(movement_threshold=0.02)
-        
-        # Smoothing state
-        self.gaze_ema = 0.5
 
-    def process_frame(self, image_data_base64, task_type="eye_contact"):
+    def _build_pose_tracker(self):
+        # Advanced Pose Tracker for detailed analysis; its graph is built now
+        # so that loading the task's models really loads them
+        self.registry.get("pose", **POSE_SETTINGS)
+        return PoseTracker(movement_threshold=0.02, model_registry=self.registry)
+
+    MODEL_BUILDERS = {
+        "face_mesh": _build_face_mesh,
+        "pose": _build_pose,
+        "hands": _build_hands,
+        "pose_tracker": _build_pose_tracker,
+    }
+
+    def load_model(self, name):
+        """Returns the named graph, building it (and timing the build) on first use."""
+        model = self._models.get(name)
+        if model is None:
+            if name not in self.MODEL_BUILDERS:
+                raise ValueError(f"Unknown model '{name}'")
+            start = time.perf_counter()
+            model = self.MODEL_BUILDERS[name](self)
+            self.model_load_times[name] = time.perf_counter() - start
+            self._models[name] = model
+        return model
+
+    @property
+    def face_mesh(self):
+        return self.load_model("face_mesh")
+
+    @property
+    def pose(self):
+        return self.load_model("pose")
+
+    @property
+    def hands(self):
+        return self.load_model("hands")
+
+    @property
+    def pose_tracker(self):
+        return self.load_model("pose_tracker")
+
+    def load_task_models(self, task_type):
+        for name in self.TASK_MODELS.get(task_type, ()):
+            self.load_model(name)
+
+    def warm_up(self, models=None):
+        """
+        Pushes a synthetic frame through each graph so the first real frame
+        does not pay for lazy MediaPipe initialisation. Loads the graphs if
+        needed. Defaults to every graph already loaded.
+        """
+        if models is None:
+            models = list(self._models)
+
+        blank = np.zeros((480, 640, 3), dtype=np.uint8)
+        for name in models:
+            model = self.load_model(name)
+            start = time.perf_counter()
+            if name == "pose_tracker":
+                model.pose.process(blank)
+            else:
+                model.process(blank)
+            self.model_warmup_times[name] = time.perf_counter() - start
+
+        # Warm-up frames must not count towards a session's tracking state
+        self.reset_session()
+        return self.model_status()
+
+    def model_status(self):
+        """Which graphs are loaded and how long loading/warm-up took (ms)."""
+        status = {}
+        for name in self.MODEL_BUILDERS:
+            entry = {"loaded": name in self._models}
+            if name in self.model_load_times:
+                entry["load_ms"] = round(self.model_load_times[name] * 1000, 1)
+            if name in self.model_warmup_times:
+                entry["warmup_ms"] = round(self.model_warmup_times[name] * 1000, 1)
+            status[name] = entry
+        return status
+
+    def decode_image(self, image_data, task_type=None):
+        """
+        Decodes a JPEG frame into an RGB image at the task's inference
+        resolution (see FrameDecoder). image_data is either raw bytes
+        (binary protocol, decoded without copying) or a base64 string /
+        data URL (legacy JSON protocol).
+        """
+        if isinstance(image_data, str):
+            if ',' in image_data:
+                image_data = image_data.split(',')[1]
+            image_data = base64.b64decode(image_data)
+
+        nparr = np.frombuffer(image_data, np.uint8)
+        return self.decoder.decode(nparr, task_type)
+
+    def process_frame(self, image_data, task_type="eye_contact", timestamp=None):
         """
         Processes a frame based on the task type.
+        image_data: raw JPEG bytes or a base64 encoded JPEG.
+        timestamp: capture time in seconds, for time-based pose analysis.
         """
         try:
-            # Decode image
-            if ',' in image_data_base64:
-                image_data_base64 = image_data_base64.split(',')[1]
-            
-            image_bytes = base64.b64decode(image_data_base64)
-            nparr = np.frombuffer(image_bytes, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            # Decode image (RGB, shared by every model below)
+            start = time.perf_counter()
+            image_rgb = self.decode_image(image_data, task_type)
+            timings = {"decode": time.perf_counter() - start}
             
-            if image is None:
+            if image_rgb is None:
                 return None
 
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            results = {}
+            results = self.analyze_rgb(image_rgb, task_type, timings, timestamp)
+            if results is not None:
+                results["started_at"] = start
+            return results
+
+        except Exception as e:
+            print(f"Error processing frame: {e}")
+            return None
+
+    def analyze_rgb(self, image_rgb, task_type="eye_contact", timings=None, timestamp=None):
+        """
+        Runs the task's models on an RGB image at inference resolution
+        (from decode_image, or FrameDecoder.prepare for video frames).
+        results["timings"] holds the seconds spent in each stage, in order.
+        """
+        try:
+            timings = {} if timings is None else timings
+            results = {"timings": timings}
 
             # 1. Eye Contact / Face Logic
             if task_type in ["eye_contact", "name_response"]:
-                face_results = self.face_mesh.process(image_rgb)
-                if face_results.multi_face_landmarks:
-                    results["face_detected"] = True
-                    landmarks = face_results.multi_face_landmarks[0].landmark
-                    
-                    # Nose tip (1)
-                    nose = landmarks[1]
-                    results["face_x"] = nose.x
-                    results["face_y"] = nose.y
-                    
-                    # Head Pose Approximation
-                    left_ear = landmarks[234]
-                    right_ear = landmarks[454]
-                    mid_ear_x = (left_ear.x + right_ear.x) / 2
-                    # Yaw: Positive = Left turn (user's right), Negative = Right turn
-                    # Reverting to nose - mid_ear based on user feedback of inversion
-                    results["head_yaw"] = nose.x - mid_ear_x 
-                    
-                    # Real Gaze Detection (Iris Tracking)
-                    # Left Eye Indices: 33 (Inner), 133 (Outer), 468 (Iris)
-                    # Right Eye Indices: 362 (Inner), 263 (Outer), 473 (Iris)
-                    
-                    try:
-                        # Helper to get eye ratio (0.0=Left, 1.0=Right)
-                        def get_eye_ratio(eye_points, iris_point):
-                            xs = [landmarks[idx].x for idx in eye_points]
-                            min_x = min(xs)
-                            max_x = max(xs)
-                            width = max_x - min_x
-                            if width == 0: return 0.5
-                            # Normalize iris position within eye width
-                            # 0.0 = Left side of eye (Screen Left), 1.0 = Right side of eye (Screen Right)
-                            return (landmarks[iris_point].x - min_x) / width
-
-                        # Left Eye (33, 133)
-                        l_ratio = get_eye_ratio([33, 133], 468)
-                        
-                        # Right Eye (362, 263)
-                        r_ratio = get_eye_ratio([362, 263], 473)
-                        
-                        # Average Gaze
-                        raw_gaze = (l_ratio + r_ratio) / 2.0
-                        
-                        # Apply Sensitivity Multiplier to Eye Movement
-                        sensitivity = 2.0 
-                        raw_gaze = (raw_gaze - 0.5) * sensitivity + 0.5
-                        
-                        # Integrate Head Yaw (Head Turn)
-                        # If user turns head Left (Negative Yaw), push gaze Left.
-                        # If user turns head Right (Positive Yaw), push gaze Right.
-                        # Yaw is typically small (-0.1 to 0.1), so we need a large weight.
-                        head_yaw = results.get("head_yaw", 0)
-                        yaw_weight = 4.0
-                        
-                        combined_gaze = raw_gaze + (head_yaw * yaw_weight)
-                        
-                        # Clamp to 0.0 - 1.0
-                        final_gaze = max(0.0, min(1.0, combined_gaze))
-                        
-                        # Apply Smoothing (Exponential Moving Average)
-                        alpha = 0.2 
-                        self.gaze_ema = (alpha * final_gaze) + ((1 - alpha) * self.gaze_ema)
-                        
-                        results["gaze_x"] = self.gaze_ema
-                        
-                    except Exception as e:
-                        print(f"Gaze calc error: {e}")
-                        results["gaze_x"] = 0.5 # Fallback to center
+                face_mesh = self.face_mesh
+                start = time.perf_counter()
+                mesh_results = face_mesh.process(image_rgb)
+                timings["face_mesh"] = time.perf_counter() - start
+                if mesh_results.multi_face_landmarks:
+                    landmarks = mesh_results.multi_face_landmarks[0].landmark
+                    points = np.array([(landmarks[idx].x, landmarks[idx].y) for idx in FACE_POINTS])
+                    # Gaze, yaw and smoothing are shared with client-supplied landmarks
+                    results.update(face_results(points, self.gaze_ema))
+                    self.gaze_ema = results["gaze_x"]
                 else:
                     results["face_detected"] = False
 
             # 2. Gestures Logic (Hands)
             if task_type == "gestures":
-                hand_results = self.hands.process(image_rgb)
-                if hand_results.multi_hand_landmarks:
-                    results["hands_detected"] = True
-                    # Check for pointing (Index finger extended, others curled)
-                    # Simplified: Just detect if hand is present and raised
-                    results["hand_count"] = len(hand_results.multi_hand_landmarks)
-                else:
-                    results["hands_detected"] = False
+                hands = self.hands
+                start = time.perf_counter()
+                detected_hands = hands.process(image_rgb)
+                timings["hands"] = time.perf_counter() - start
+                # Check for pointing (Index finger extended, others curled)
+                # Simplified: Just detect if hand is present and raised
+                results.update(hand_results(len(detected_hands.multi_hand_landmarks or ())))
 
             # 3. Repetitive Behavior Logic (Advanced Pose)
             if task_type == "repetitive":
                 # Use advanced pose tracker for detailed analysis
-                pose_data = self.pose_tracker.process_frame(image)
+                pose_tracker = self.pose_tracker
+                start = time.perf_counter()
+                pose_data = pose_tracker.process_rgb(image_rgb, timestamp)
+                timings["pose_tracker"] = time.perf_counter() - start
                 
-                if pose_data and pose_data.get("pose_detected"):
-                    results["pose_detected"] = True
-                    
-                    # Get landmarks data
-                    landmarks = pose_data.get("landmarks", {})
-                    
-                    # Calculate body center X for basic tracking
-                    if "LEFT_SHOULDER" in landmarks and "RIGHT_SHOULDER" in landmarks:
-                        left_shoulder = landmarks["LEFT_SHOULDER"]
-                        right_shoulder = landmarks["RIGHT_SHOULDER"]
-                        results["body_x"] = (left_shoulder["x"] + right_shoulder["x"]) / 2
-                    else:
-                        results["body_x"] = 0.5
-                    
-                    # Include detailed landmark data
-                    results["landmarks"] = landmarks
-                    results["movement_counters"] = pose_data.get("movement_counters", {})
-                    results["repetitive_patterns"] = pose_data.get("repetitive_patterns", {})
-                    
-                    # Calculate overall movement score
-                    patterns = pose_data.get("repetitive_patterns", {})
-                    results["movement_score"] = patterns.get("total_movements", 0)
-                    results["hand_flapping_detected"] = patterns.get("hand_flapping", False)
-                    results["rocking_detected"] = patterns.get("rocking", False)
-                    results["arm_swaying_detected"] = patterns.get("arm_swaying", False)
-                else:
-                    results["pose_detected"] = False
+                results.update(pose_results(pose_data))
 
             return results
 
@@ -180,4 +228,17 @@ class TrackingEngine:
     
     def reset_pose_tracking(self):
         """Reset the pose tracker counters for a new session."""
-        self.pose_tracker.reset_counters()
+        if "pose_tracker" in self._models:
+            self.pose_tracker.reset_counters()
+
+    def shutdown(self):
+        """Release every MediaPipe graph held by this engine."""
+        if "pose_tracker" in self._models:
+            self.pose_tracker.close_log()
+        self.registry.close()
+        self._models.clear()
+
+    def reset_session(self):
+        """Clear all per-session temporal state, keeping the loaded graphs."""
+        self.gaze_ema = 0.5
+        self.reset_pose_tracking()
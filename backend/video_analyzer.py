@@ -0,0 +1,269 @@
+"""
+Offline analysis of recorded screening videos.
+
+The recording is split into time chunks that are analysed in parallel
+worker processes, each with its own TrackingEngine. Every chunk streams its
+frames with cv2.VideoCapture (only every `stride`-th frame is analysed),
+accumulates the same session metrics as the live /ws/analyze handler, and
+the chunk metrics are merged in order before being scored by the logic
+engine.
+
+Chunking is an approximation of one sequential pass: each chunk starts
+with a fresh TrackingEngine, so the gaze smoothing (EMA) and the pose
+tracker's movement histories restart at every chunk boundary, and the
+first frames of a chunk can be analysed slightly differently. Longer
+chunks make this rarer.
+
+Usage:
+    python video_analyzer.py recording.mp4 --tasks eye_contact --stride 2
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+import config
+from logic_engine import logic_engine
+from session_metrics import DEFAULT_THRESHOLDS, SessionMetrics, create_session_metrics
+from tracking_engine import TrackingEngine
+
+DEFAULT_CHUNK_SECONDS = 60.0
+
+
+def probe_video(path):
+    """
+    (frame count, fps) of a video file. Containers without a frame count in
+    their header (e.g. WebM from MediaRecorder) are counted by demuxing
+    every frame. Raises ValueError if unreadable or empty.
+    """
+    capture = cv2.VideoCapture(path)
+    try:
+        if not capture.isOpened():
+            raise ValueError(f"Cannot open video '{path}'")
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        if frame_count <= 0:
+            frame_count = 0
+            while capture.grab():
+                frame_count += 1
+    finally:
+        capture.release()
+    if frame_count == 0:
+        raise ValueError(f"No frames could be read from '{path}'")
+    return frame_count, fps
+
+
+def plan_chunks(frame_count, fps, stride=1, chunk_seconds=DEFAULT_CHUNK_SECONDS):
+    """
+    [(start_frame, end_frame)] covering the video. Chunk starts are
+    multiples of `stride`, so striding inside each chunk samples exactly
+    the frames a single sequential pass would.
+    """
+    chunk_frames = max(stride, int(chunk_seconds * fps) // stride * stride)
+    return [
+        (start, min(start + chunk_frames, frame_count))
+        for start in range(0, frame_count, chunk_frames)
+    ]
+
+
+def _track_boundaries(edges, task, analysis, session):
+    """Remember the first/last per-frame state merge_chunk_metrics needs."""
+    if task == "eye_contact":
+        last_side = session.states["eye_contact"].last_side
+        if last_side != "none" and "firstSide" not in edges:
+            edges["firstSide"] = last_side
+    elif task == "name_response":
+        if analysis.get("face_detected"):
+            yaw = analysis["head_yaw"]
+            edges.setdefault("firstYaw", yaw)
+            edges["minYaw"] = min(edges.get("minYaw", yaw), yaw)
+            edges["maxYaw"] = max(edges.get("maxYaw", yaw), yaw)
+            # Turns are relative to the session's first yaw, which only the
+            # merge knows
+            edges.setdefault("yaws", []).append(yaw)
+    elif task == "repetitive":
+        if analysis.get("pose_detected"):
+            edges.setdefault("firstBodyX", analysis["body_x"])
+
+
+def read_frames(capture, start_frame, end_frame, stride=1):
+    """
+    (index, BGR frame) for every `stride`-th frame of [start_frame,
+    end_frame). The frames before the chunk are grabbed and discarded
+    rather than seeked past: CAP_PROP_POS_FRAMES seeks land on the wrong
+    frame for many codecs (index-less WebM in particular), which would
+    make chunks overlap or leave gaps.
+    """
+    for _ in range(start_frame):
+        if not capture.grab():
+            return
+    for index in range(start_frame, end_frame):
+        if (index - start_frame) % stride:
+            # Skipped frames are demuxed but never converted or analysed
+            if not capture.grab():
+                return
+            continue
+        ok, frame = capture.read()
+        if not ok:
+            return
+        yield index, frame
+
+
+def analyze_chunk(path, start_frame, end_frame, tasks, stride=1):
+    """
+    Worker entry point: analyse frames [start_frame, end_frame) of the video
+    for every task. Returns {task: {"metrics": ..., "edges": ...}}.
+    """
+    engines = {task: TrackingEngine() for task in tasks}
+    sessions = {task: SessionMetrics() for task in tasks}
+    edges = {task: {} for task in tasks}
+
+    capture = cv2.VideoCapture(path)
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        for index, frame in read_frames(capture, start_frame, end_frame, stride):
+            for task in tasks:
+                engine = engines[task]
+                analysis = engine.analyze_rgb(engine.decoder.prepare(frame, task), task,
+                                              timestamp=index / fps)
+                if analysis:
+                    sessions[task].update(task, analysis, {})
+                    _track_boundaries(edges[task], task, analysis, sessions[task])
+    finally:
+        capture.release()
+        for engine in engines.values():
+            engine.shutdown()
+
+    return {task: {"metrics": sessions[task].as_dict(), "edges": edges[task]} for task in tasks}
+
+
+def merge_chunk_metrics(chunks):
+    """
+    Merge per-chunk session metrics (in time order) into the metrics a
+    single pass over the same per-frame analyses would have produced (the
+    analyses themselves differ near chunk boundaries, see the module
+    docstring). Switches and body
+    movement across chunk boundaries and the yaw change and head turns
+    relative to the session's first yaw are reconstructed from each chunk's
+    edges.
+    """
+    merged = create_session_metrics()
+    initial_yaw = None
+    yaws = []
+    movement_counters = {}
+
+    for chunk in chunks:
+        metrics = chunk["metrics"]
+        edges = chunk["edges"]
+
+        for key in ("totalFrames", "framesFaceDetected", "framesSocialSide",
+                    "framesGeometricSide", "sideSwitchCount", "handsDetectedFrames",
+                    "bodyMovementSum", "totalRepetitiveMovements"):
+            merged[key] += metrics[key]
+
+        # Eye contact: a side change across the chunk boundary is a switch
+        if "firstSide" in edges:
+            if merged["lastSide"] != "none" and edges["firstSide"] != merged["lastSide"]:
+                merged["sideSwitchCount"] += 1
+            merged["lastSide"] = metrics["lastSide"]
+
+        # Name response: yaw change is measured from the session's first yaw
+        if "firstYaw" in edges:
+            if initial_yaw is None:
+                initial_yaw = edges["firstYaw"]
+            change = max(abs(edges["maxYaw"] - initial_yaw), abs(edges["minYaw"] - initial_yaw))
+            merged["maxYawChange"] = max(merged["maxYawChange"], change)
+            yaws.extend(edges["yaws"])
+
+        # Repetitive: include the movement between the two chunks
+        if "firstBodyX" in edges:
+            if merged["lastBodyX"] is not None:
+                merged["bodyMovementSum"] += abs(edges["firstBodyX"] - merged["lastBodyX"])
+            merged["lastBodyX"] = metrics["lastBodyX"]
+
+        for name, count in metrics["landmarkMovements"].items():
+            movement_counters[name] = movement_counters.get(name, 0) + count
+        for pattern, detected in metrics["repetitivePatterns"].items():
+            merged["repetitivePatterns"][pattern] = merged["repetitivePatterns"][pattern] or detected
+
+    merged["initialYaw"] = initial_yaw
+    threshold = DEFAULT_THRESHOLDS["head_turn_yaw"]
+    merged["headTurnFrames"] = sum(abs(yaw - initial_yaw) > threshold for yaw in yaws)
+    merged["landmarkMovements"] = movement_counters
+    return merged
+
+
+def analyze_video(path, tasks=("eye_contact",), stride=1,
+                  chunk_seconds=DEFAULT_CHUNK_SECONDS, workers=config.INFERENCE_WORKERS):
+    """
+    Analyse a recorded video for `tasks`. Returns, per task, the merged
+    session metrics and the logic engine's analysis of them.
+    """
+    if stride < 1:
+        raise ValueError("stride must be at least 1")
+    if not (math.isfinite(chunk_seconds) and chunk_seconds > 0):
+        raise ValueError("chunk_seconds must be a positive number")
+    unknown = set(tasks) - set(TrackingEngine.TASK_MODELS)
+    if unknown:
+        raise ValueError(f"Unknown tasks: {sorted(unknown)}")
+
+    frame_count, fps = probe_video(path)
+    chunks = plan_chunks(frame_count, fps, stride, chunk_seconds)
+
+    # Spawned, not forked: the API process may hold threads and MediaPipe state
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(chunks))),
+                             mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [
+            pool.submit(analyze_chunk, path, start, end, list(tasks), stride)
+            for start, end in chunks
+        ]
+        results = [future.result() for future in futures]
+
+    report = {
+        "video": {
+            "frames": frame_count,
+            "fps": fps,
+            "duration_sec": frame_count / fps if fps else 0.0,
+            "stride": stride,
+            "chunks": len(chunks),
+        },
+        "tasks": {},
+    }
+    for task in tasks:
+        metrics = merge_chunk_metrics([result[task] for result in results])
+        # Timing fields as the frontend would post them to /api/analyze
+        metrics["durationSec"] = report["video"]["duration_sec"]
+        report["tasks"][task] = {
+            "metrics": metrics,
+            "analysis": logic_engine.analyze_task(task, metrics),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse a recorded screening video")
+    parser.add_argument("video")
+    parser.add_argument("--tasks", default="eye_contact",
+                        help="comma separated: " + ",".join(TrackingEngine.TASK_MODELS))
+    parser.add_argument("--stride", type=int, default=1, help="analyse every Nth frame")
+    parser.add_argument("--chunk-seconds", type=float, default=DEFAULT_CHUNK_SECONDS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    report = analyze_video(
+        args.video,
+        tasks=[task.strip() for task in args.tasks.split(",") if task.strip()],
+        stride=args.stride,
+        chunk_seconds=args.chunk_seconds,
+        workers=args.workers,
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,22 +2,29 @@ import React, { useEffect, useRef, useState } from 'react';
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 import { Eye, Video, Wifi } from 'lucide-react';
-import { API_URL } from '@/config';
+import { API_URL, RECONNECT_DELAY_MS, withSession } from '@/config';
 
 interface EyeContactData {
     eye_contact_score: 0 | 1 | 2;
     duration_seconds: number;
     raw_metrics?: any;
+    ai_report?: any;
 }
 
 interface EyeContactModuleProps {
     onComplete: (data: EyeContactData) => void;
 }
 
+// How long to wait for the server's report before falling back to /api/analyze
+const REPORT_TIMEOUT_MS = 3000;
+
 export const EyeContactModule: React.FC<EyeContactModuleProps> = ({ onComplete }) => {
     const videoRef = useRef<HTMLVideoElement>(null);
     const canvasRef = useRef<HTMLCanvasElement>(null);
     const wsRef = useRef<WebSocket | null>(null);
+    // Server session to resume if the socket drops
+    const sessionIdRef = useRef<string | null>(null);
+    const unmountedRef = useRef(false);
 
     const [stream, setStream] = useState<MediaStream | null>(null);
     const [isRecording, setIsRecording] = useState(false);
@@ -35,17 +42,33 @@ export const EyeContactModule: React.FC<EyeContactModuleProps> = ({ onComplete }
         startTime: 0
     });
 
+    // Result waiting for the server's end-of-task report
+    const pendingResultRef = useRef<EyeContactData | null>(null);
+    const reportTimeoutRef = useRef<ReturnType<typeof setTimeout> | null>(null);
+
+    // Hands the pending result on, with the server's report if it came;
+    // without one the local counters are scored by /api/analyze instead
+    const completePending = (report?: unknown) => {
+        if (reportTimeoutRef.current) clearTimeout(reportTimeoutRef.current);
+        reportTimeoutRef.current = null;
+        const result = pendingResultRef.current;
+        pendingResultRef.current = null;
+        if (result) onComplete(report ? { ...result, ai_report: report } : result);
+    };
+
     useEffect(() => {
         startCamera();
+        unmountedRef.current = false;
         connectWebSocket();
         return () => {
             stopCamera();
+            unmountedRef.current = true;
             if (wsRef.current) wsRef.current.close();
         };
     }, []);
 
     const connectWebSocket = () => {
-        const wsUrl = API_URL.replace(/^http/, 'ws') + '/ws/analyze';
+        const wsUrl = withSession(API_URL.replace(/^http/, 'ws') + '/ws/analyze', sessionIdRef.current);
         const ws = new WebSocket(wsUrl);
 
         ws.onopen = () => {
@@ -55,6 +78,16 @@ export const EyeContactModule: React.FC<EyeContactModuleProps> = ({ onComplete }
 
         ws.onmessage = (event) => {
             const data = JSON.parse(event.data);
+            // Session ID for resuming after a dropped connection; not a frame result
+            if (data.status === 'session') {
+                sessionIdRef.current = data.session_id;
+                return;
+            }
+            if (data.status === 'report') {
+                // Scored from the server-side session; no counters to resubmit
+                completePending(data.report);
+                return;
+            }
             setFeedback(data);
 
             // Update local metrics for final submission
@@ -66,7 +99,15 @@ export const EyeContactModule: React.FC<EyeContactModuleProps> = ({ onComplete }
             }
         };
 
-        ws.onclose = () => setIsConnected(false);
+        ws.onclose = () => {
+            setIsConnected(false);
+            completePending();
+            // Reconnect to the same session unless the module is gone
+            setTimeout(() => {
+                if (!unmountedRef.current) connectWebSocket();
+            }, RECONNECT_DELAY_MS);
+        };
+        ws.onerror = () => completePending();
         wsRef.current = ws;
     };
 
@@ -156,7 +197,7 @@ export const EyeContactModule: React.FC<EyeContactModuleProps> = ({ onComplete }
         setIsRecording(false);
         const duration = (Date.now() - metricsRef.current.startTime) / 1000;
 
-        onComplete({
+        const result: EyeContactData = {
             eye_contact_score: 0,
             duration_seconds: duration,
             raw_metrics: {
@@ -165,7 +206,16 @@ export const EyeContactModule: React.FC<EyeContactModuleProps> = ({ onComplete }
                 durationSec: duration,
                 endTime: Date.now()
             }
-        });
+        };
+
+        if (wsRef.current?.readyState === WebSocket.OPEN) {
+            pendingResultRef.current = result;
+            reportTimeoutRef.current = setTimeout(() => completePending(), REPORT_TIMEOUT_MS);
+            wsRef.current.send(JSON.stringify({ task: "eye_contact", command: "report" }));
+        } else {
+            // Offline: the local counters are scored by /api/analyze instead
+            onComplete(result);
+        }
     };
 
     return (
@@ -2,7 +2,7 @@ import React, { useEffect, useRef, useState } from 'react';
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 import { Hand, Wifi } from 'lucide-react';
-import { API_URL } from '@/config';
+import { API_URL, RECONNECT_DELAY_MS, withSession } from '@/config';
 
 interface GesturesData {
     gesture_joint_attention_score: 0 | 1 | 2;
@@ -17,6 +17,9 @@ export const GesturesModule: React.FC<GesturesModuleProps> = ({ onComplete }) =>
     const videoRef = useRef<HTMLVideoElement>(null);
     const canvasRef = useRef<HTMLCanvasElement>(null);
     const wsRef = useRef<WebSocket | null>(null);
+    // Server session to resume if the socket drops
+    const sessionIdRef = useRef<string | null>(null);
+    const unmountedRef = useRef(false);
 
     const [stream, setStream] = useState<MediaStream | null>(null);
     const [isRecording, setIsRecording] = useState(false);
@@ -26,22 +29,35 @@ export const GesturesModule: React.FC<GesturesModuleProps> = ({ onComplete }) =>
 
     useEffect(() => {
         startCamera();
+        unmountedRef.current = false;
         connectWebSocket();
         return () => {
             stopCamera();
+            unmountedRef.current = true;
             if (wsRef.current) wsRef.current.close();
         };
     }, []);
 
     const connectWebSocket = () => {
-        const wsUrl = API_URL.replace(/^http/, 'ws') + '/ws/analyze';
+        const wsUrl = withSession(API_URL.replace(/^http/, 'ws') + '/ws/analyze', sessionIdRef.current);
         const ws = new WebSocket(wsUrl);
         ws.onopen = () => setIsConnected(true);
         ws.onmessage = (event) => {
             const data = JSON.parse(event.data);
+            // Session ID for resuming after a dropped connection; not a frame result
+            if (data.status === 'session') {
+                sessionIdRef.current = data.session_id;
+                return;
+            }
             setFeedback(data);
         };
-        ws.onclose = () => setIsConnected(false);
+        ws.onclose = () => {
+            setIsConnected(false);
+            // Reconnect to the same session unless the module is gone
+            setTimeout(() => {
+                if (!unmountedRef.current) connectWebSocket();
+            }, RECONNECT_DELAY_MS);
+        };
         wsRef.current = ws;
     };
 
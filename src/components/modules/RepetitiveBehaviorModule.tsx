@@ -2,7 +2,7 @@ import React, { useEffect, useRef, useState } from 'react';
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 import { Activity, Wifi } from 'lucide-react';
-import { API_URL } from '@/config';
+import { API_URL, RECONNECT_DELAY_MS, withSession } from '@/config';
 
 interface RepetitiveData {
     repetitive_behavior_score: 0 | 1 | 2;
@@ -17,6 +17,9 @@ export const RepetitiveBehaviorModule: React.FC<RepetitiveBehaviorModuleProps> =
     const videoRef = useRef<HTMLVideoElement>(null);
     const canvasRef = useRef<HTMLCanvasElement>(null);
     const wsRef = useRef<WebSocket | null>(null);
+    // Server session to resume if the socket drops
+    const sessionIdRef = useRef<string | null>(null);
+    const unmountedRef = useRef(false);
 
     const [stream, setStream] = useState<MediaStream | null>(null);
     const [isRecording, setIsRecording] = useState(false);
@@ -26,22 +29,36 @@ export const RepetitiveBehaviorModule: React.FC<RepetitiveBehaviorModuleProps> =
 
     useEffect(() => {
         startCamera();
+        unmountedRef.current = false;
         connectWebSocket();
         return () => {
             stopCamera();
+            unmountedRef.current = true;
             if (wsRef.current) wsRef.current.close();
         };
     }, []);
 
     const connectWebSocket = () => {
-        const wsUrl = API_URL.replace(/^http/, 'ws') + '/ws/analyze';
+        // Only the fields shown here, and only when they change
+        const wsUrl = withSession(API_URL.replace(/^http/, 'ws') + '/ws/analyze?fields=pose_detected,movement_score&delta=1', sessionIdRef.current);
         const ws = new WebSocket(wsUrl);
         ws.onopen = () => setIsConnected(true);
         ws.onmessage = (event) => {
             const data = JSON.parse(event.data);
-            setFeedback(data);
+            // Session ID for resuming after a dropped connection; not a frame result
+            if (data.status === 'session') {
+                sessionIdRef.current = data.session_id;
+                return;
+            }
+            setFeedback((prev: any) => ({ ...prev, ...data }));
+        };
+        ws.onclose = () => {
+            setIsConnected(false);
+            // Reconnect to the same session unless the module is gone
+            setTimeout(() => {
+                if (!unmountedRef.current) connectWebSocket();
+            }, RECONNECT_DELAY_MS);
         };
-        ws.onclose = () => setIsConnected(false);
         wsRef.current = ws;
     };
 
@@ -3,7 +3,7 @@ import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 import { Progress } from "@/components/ui/progress";
 import { Mic, MessageCircle, Wifi } from 'lucide-react';
-import { API_URL } from '@/config';
+import { API_URL, RECONNECT_DELAY_MS, withSession } from '@/config';
 
 interface VocalizationData {
     vocalization_score: 0 | 1 | 2;
@@ -16,6 +16,9 @@ interface VocalizationModuleProps {
 
 export const VocalizationModule: React.FC<VocalizationModuleProps> = ({ onComplete }) => {
     const wsRef = useRef<WebSocket | null>(null);
+    // Server session to resume if the socket drops
+    const sessionIdRef = useRef<string | null>(null);
+    const unmountedRef = useRef(false);
     const audioContextRef = useRef<AudioContext | null>(null);
     const processorRef = useRef<ScriptProcessorNode | null>(null);
     const streamRef = useRef<MediaStream | null>(null);
@@ -27,22 +30,35 @@ export const VocalizationModule: React.FC<VocalizationModuleProps> = ({ onComple
     const [feedback, setFeedback] = useState<any>(null);
 
     useEffect(() => {
+        unmountedRef.current = false;
         connectWebSocket();
         return () => {
             stopRecording();
+            unmountedRef.current = true;
             if (wsRef.current) wsRef.current.close();
         };
     }, []);
 
     const connectWebSocket = () => {
-        const wsUrl = API_URL.replace(/^http/, 'ws') + '/ws/audio';
+        const wsUrl = withSession(API_URL.replace(/^http/, 'ws') + '/ws/audio', sessionIdRef.current);
         const ws = new WebSocket(wsUrl);
         ws.onopen = () => setIsConnected(true);
         ws.onmessage = (event) => {
             const data = JSON.parse(event.data);
+            // Session ID for resuming after a dropped connection; not a frame result
+            if (data.status === 'session') {
+                sessionIdRef.current = data.session_id;
+                return;
+            }
             setFeedback(data);
         };
-        ws.onclose = () => setIsConnected(false);
+        ws.onclose = () => {
+            setIsConnected(false);
+            // Reconnect to the same session unless the module is gone
+            setTimeout(() => {
+                if (!unmountedRef.current) connectWebSocket();
+            }, RECONNECT_DELAY_MS);
+        };
         wsRef.current = ws;
     };
 
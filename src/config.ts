@@ -3,3 +3,11 @@ const storedUrl = typeof window !== 'undefined' ? localStorage.getItem("custom_a
 // Default to the hosted backend, but allow override via env var or local storage
 export const API_URL = storedUrl || import.meta.env.VITE_API_URL || "https://autismind-ai.onrender.com";
 console.log("API URL configured as:", API_URL);
+
+// Delay before a module's dropped socket reconnects to resume its session
+export const RECONNECT_DELAY_MS = 1000;
+
+// Socket URL resuming the server-side session `sessionId`, if there is one
+// (see backend/session_store.py)
+export const withSession = (url: string, sessionId: string | null) =>
+    sessionId ? `${url}${url.includes('?') ? '&' : '?'}session=${encodeURIComponent(sessionId)}` : url;
@@ -63,16 +63,19 @@ export const ScreeningFlow: React.FC = () => {
                 };
             }
 
-            // Call Python Backend
-            const response = await fetch(`${API_URL}/api/analyze`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(backendPayload),
-            });
-
-            const analysisResult = await response.json();
+            // The eye contact module normally brings the server's report of
+            // its live session; otherwise score the local counters
+            let analysisResult = finalData.ai_report;
+            if (!analysisResult) {
+                const response = await fetch(`${API_URL}/api/analyze`, {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify(backendPayload),
+                });
+                analysisResult = await response.json();
+            }
             console.log("Backend Analysis:", analysisResult);
 
             // Merge Backend Analysis with Frontend Scores (from other modules)